@@ -4,7 +4,11 @@ cd $1
 tar -cvf - * | docker cp - pskg:/var/lib/neo4j/import
 cd -
 
-echo "Copying load.cypher to container..."
-docker cp neo4j/load_data/load.cypher pskg:/var/lib/neo4j/import
+# build_pskg_graph.py writes load.cypher with the load files, the repository copy
+# only matches the default configuration
+if [ ! -f $1/load.cypher ]; then
+    echo "Copying load.cypher to container..."
+    docker cp neo4j/load_data/load.cypher pskg:/var/lib/neo4j/import
+fi
 
 echo "done!"
@@ -1,504 +1,421 @@
-// Tested with Neo4J 4.4.4
-// Node key unique attributes
+// Generated by build_pskg_graph.py from the load schemas of the generators, do not
+// edit.  Tested with Neo4J 4.4.4
 
 RETURN "Creating constraints..." AS `Action:`;
-CREATE CONSTRAINT caseIdConstraint          IF NOT EXISTS ON (c:Case)         ASSERT c.CaseId         IS UNIQUE;
-CREATE CONSTRAINT vaxIdConstraint           IF NOT EXISTS ON (v:Vaccine)      ASSERT v.VaccineId      IS UNIQUE;
-CREATE CONSTRAINT medIdConstraint           IF NOT EXISTS ON (m:Medication)   ASSERT m.MedicationId   IS UNIQUE;
-CREATE CONSTRAINT expIdConstraint           IF NOT EXISTS ON (e:ExposureData) ASSERT e.ExposureId     IS UNIQUE;
-CREATE CONSTRAINT countryCodeConstraint     IF NOT EXISTS ON (c:Country)      ASSERT c.CountryCode    IS UNIQUE;
-CREATE CONSTRAINT continentCodeConstraint   IF NOT EXISTS ON (c:Continent)    ASSERT c.ContinentCode  IS UNIQUE;
-CREATE CONSTRAINT meddraSMQConstraint       IF NOT EXISTS ON (m:MeddraSmq)    ASSERT m.MeddraSmqCode  IS UNIQUE;
-CREATE CONSTRAINT meddraLLTIdConstraint     IF NOT EXISTS ON (m:MeddraLLT)    ASSERT m.MeddraId       IS UNIQUE;
-CREATE CONSTRAINT meddraPTIdConstraint      IF NOT EXISTS ON (m:MeddraPT)     ASSERT m.MeddraId       IS UNIQUE;
-CREATE CONSTRAINT meddraHLTIdConstraint     IF NOT EXISTS ON (m:MeddraHLT)    ASSERT m.MeddraId       IS UNIQUE;
-CREATE CONSTRAINT meddraHLGTdConstraint     IF NOT EXISTS ON (m:MeddraHLGT)   ASSERT m.MeddraId       IS UNIQUE;
-CREATE CONSTRAINT meddraSOCIdConstraint     IF NOT EXISTS ON (m:MeddraSOC)    ASSERT m.MeddraId       IS UNIQUE;
-CREATE CONSTRAINT MeddraCqConstraint        IF NOT EXISTS ON (azm: MeddraCq)  ASSERT azm.Name         IS UNIQUE;
-
-// Nodes
+CREATE CONSTRAINT caseCaseIdConstraint IF NOT EXISTS ON (n:Case) ASSERT n.CaseId IS UNIQUE;
+CREATE CONSTRAINT vaccineVaccineIdConstraint IF NOT EXISTS ON (n:Vaccine) ASSERT n.VaccineId IS UNIQUE;
+CREATE CONSTRAINT medicationMedicationIdConstraint IF NOT EXISTS ON (n:Medication) ASSERT n.MedicationId IS UNIQUE;
+CREATE CONSTRAINT countryCountryCodeConstraint IF NOT EXISTS ON (n:Country) ASSERT n.CountryCode IS UNIQUE;
+CREATE CONSTRAINT continentContinentCodeConstraint IF NOT EXISTS ON (n:Continent) ASSERT n.ContinentCode IS UNIQUE;
+CREATE CONSTRAINT exposureDataExposureIdConstraint IF NOT EXISTS ON (n:ExposureData) ASSERT n.ExposureId IS UNIQUE;
+CREATE CONSTRAINT meddraPTMeddraIdConstraint IF NOT EXISTS ON (n:MeddraPT) ASSERT n.MeddraId IS UNIQUE;
+CREATE CONSTRAINT meddraHLTMeddraIdConstraint IF NOT EXISTS ON (n:MeddraHLT) ASSERT n.MeddraId IS UNIQUE;
+CREATE CONSTRAINT meddraHLGTMeddraIdConstraint IF NOT EXISTS ON (n:MeddraHLGT) ASSERT n.MeddraId IS UNIQUE;
+CREATE CONSTRAINT meddraSOCMeddraIdConstraint IF NOT EXISTS ON (n:MeddraSOC) ASSERT n.MeddraId IS UNIQUE;
+CREATE CONSTRAINT meddraLLTMeddraIdConstraint IF NOT EXISTS ON (n:MeddraLLT) ASSERT n.MeddraId IS UNIQUE;
+CREATE CONSTRAINT meddraCqNameConstraint IF NOT EXISTS ON (n:MeddraCq) ASSERT n.Name IS UNIQUE;
+CREATE CONSTRAINT meddraSmqMeddraSmqCodeConstraint IF NOT EXISTS ON (n:MeddraSmq) ASSERT n.MeddraSmqCode IS UNIQUE;
+CREATE CONSTRAINT caseGroupCaseGroupIdConstraint IF NOT EXISTS ON (n:CaseGroup) ASSERT n.CaseGroupId IS UNIQUE;
+RETURN "Creating indexes..." AS `Action:`;
+CREATE INDEX caseDataSourceIndex IF NOT EXISTS FOR (n:Case) ON (n.DataSource);
+CREATE INDEX caseSourceCaseIdIndex IF NOT EXISTS FOR (n:Case) ON (n.SourceCaseId);
+CREATE INDEX meddraPTNameMeddraTypeIndex IF NOT EXISTS FOR (n:MeddraPT) ON (n.Name, n.MeddraType);
 
 RETURN "Loading Case.tsv..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///Case.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (c:Case {
-    CaseId: r.CaseId})
+MERGE (n:Case {CaseId: r.CaseId})
 SET
-    c.SourceCaseId       = r.SourceCaseId,
-    c.DataSource         = r.DataSource,
-    c.Tag                = r.Tag,
-    c.ReportedDate       = datetime(r.ReportedDate),
-    c.ReceivedDate       = datetime(r.ReceivedDate),
-    c.PatientAgeRangeMin = toFloat(r.PatientAgeRangeMin),
-    c.PatientAgeRangeMax = toFloat(r.PatientAgeRangeMax),
-    c.PatientGender      = r.PatientGender,
-    c.PatientOutcome     = split(r.PatientOutcome,","),
-    c.PatientRecovered   = toBoolean(r.PatientRecovered),
-    c.DeathDate          = datetime(r.DeathDate),
-    c.HospitalizationLengthInDays = toInteger(r.HospitalizationLengthInDays),
-    c.ReportType         = r.ReportType,
-    c.Current            = true;
-
-RETURN "Create Indexes on Case" AS `Action:`;
-CREATE INDEX FOR (c:Case) on (c.DataSource);
-CREATE INDEX FOR (c:Case) on (c.SourceCaseId);
-
-// Previous Case Versions
-// Some data sources, such as EudraVigilance, include the concept of updated cases.
-// This statement identifies these cases and uses an APOC function to build 
-// a linked list of starting from the current case through each prior case.
-// Each previous version's Current flag is set to false.
-
-RETURN "Build Links to Previous Case Versions" AS `Action:`;
-
-MATCH (c:Case {DataSource:'EUDRAVIGILANCE'}) 
-WITH c, c.SourceCaseId AS GroupId 
-ORDER BY GroupId, c.CaseId DESC
-WITH COLLECT(c) AS CaseNodes, COUNT(c) AS GroupSize, GroupId
-WHERE GroupSize > 1
-CALL apoc.nodes.link(CaseNodes,'PREVIOUS_VERSION')
-RETURN COUNT(*) AS `Revised Cases`;
-
-RETURN "Set flag on previous versions" as `Action:`;
-
-MATCH (cc:Case {DataSource:'EUDRAVIGILANCE'})-[:PREVIOUS_VERSION *..]->(pc:Case)
-SET pc.Current = False;
+    n.SourceCaseId                = r.SourceCaseId,
+    n.DataSource                  = r.DataSource,
+    n.Tag                         = r.Tag,
+    n.ReportedDate                = datetime(r.ReportedDate),
+    n.ReceivedDate                = datetime(r.ReceivedDate),
+    n.PatientAgeRangeMin          = toFloat(r.PatientAgeRangeMin),
+    n.PatientAgeRangeMax          = toFloat(r.PatientAgeRangeMax),
+    n.PatientGender               = r.PatientGender,
+    n.PatientOutcome              = split(r.PatientOutcome, ","),
+    n.PatientRecovered            = toBoolean(r.PatientRecovered),
+    n.DeathDate                   = datetime(r.DeathDate),
+    n.HospitalizationLengthInDays = toInteger(r.HospitalizationLengthInDays),
+    n.ReportType                  = r.ReportType,
+    n.Current                     = toBoolean(r.Current);
 
-// Vaccine.tsv
-// NOTE:
 // VAERS data are used to set initial names for vaccines, as it is currently the most
-// comprehensive source of vaccine names.  Thus a CASE statement with ON MATCH/ON CREATE
-// clauses is used to not reset previously set values during import, and a NULL/not empty 
-// check is needed for this.
+// comprehensive source of vaccine names, so properties already set by earlier rows are kept.
 // Moving forward names from sources will be validated and aligned to a common terminology,
 // which will eliminate the need for this prioritization.
-
 RETURN "Loading Vaccine.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///Vaccine.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (v:Vaccine {
-    VaccineId: r.VaccineId})
-ON CREATE
-    SET  v.VaxType      = TRIM(r.VaxType),
-         v.RxNormCui    = TRIM(r.RxNormCui),
-         v.GenericName  = TRIM(r.GenericName),
-         v.TradeName    = TRIM(r.TradeName),
-         v.Manufacturer = TRIM(r.Manufacturer),
-         v.Description  = TRIM(r.Description)
-ON MATCH
-    SET  v.GenericName  =  CASE WHEN (v.GenericName IS NULL OR v.GenericName = '') 
-                                     AND r.GenericName IS NOT NULL 
-                                     AND TRIM(r.GenericName) <> '' 
-                                THEN TRIM(r.GenericName) 
-                                ELSE v.GenericName 
-                           END,
-         v.Manufacturer =  CASE WHEN (v.TradeName IS NULL OR v.TradeName = '') 
-                                      AND r.TradeName IS NOT NULL 
-                                      AND TRIM(r.TradeName) <> '' 
-                                THEN TRIM(r.TradeName) 
-                                ELSE v.TradeName 
-                           END,
-         v.Manufacturer =  CASE WHEN (v.Manufacturer IS NULL OR v.Manufacturer = '') 
-                                      AND r.Manufacturer IS NOT NULL 
-                                      AND TRIM(r.Manufacturer) <> '' 
-                                THEN TRIM(r.Manufacturer) 
-                                ELSE v.Manufacturer 
-                           END,
-         v.VaxType      =  CASE WHEN (v.VaxType IS NULL OR v.VaxType = '') 
-                                      AND r.VaxType IS NOT NULL 
-                                      AND TRIM(r.VaxType) <> '' 
-                                THEN TRIM(r.VaxType) 
-                                ELSE v.VaxType
-                           END,
-         v.RxNormCui     = CASE WHEN (v.RxNormCui IS NULL OR v.RxNormCui = '' ) 
-                                      AND r.RxNormCui IS NOT NULL 
-                                      AND TRIM(r.RxNormCui) <> '' 
-                                THEN TRIM(r.RxNormCui) 
-                                ELSE v.RxNormCui 
-                           END,
-         v.Description =   CASE WHEN (v.Description IS NULL OR v.Description = '') 
-                                      AND r.Description IS NOT NULL AND TRIM(r.Description) <> '' 
-                                THEN TRIM(r.Description) 
-                                ELSE v.Description 
-                           END;
-
+MERGE (n:Vaccine {VaccineId: r.VaccineId})
+SET
+    n.VaxType      = coalesce(n.VaxType, r.VaxType),
+    n.RxNormCui    = coalesce(n.RxNormCui, r.RxNormCui),
+    n.GenericName  = coalesce(n.GenericName, r.GenericName),
+    n.TradeName    = coalesce(n.TradeName, r.TradeName),
+    n.Manufacturer = coalesce(n.Manufacturer, r.Manufacturer),
+    n.Description  = coalesce(n.Description, r.Description);
 
 RETURN "Loading Medication.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///Medication.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (m:Medication {
-    MedicationId: r.MedicationId})
+MERGE (n:Medication {MedicationId: r.MedicationId})
 SET
-    m.RxNormCui   = r.RxNormCui,
-    m.GenericName = r.GenericName,
-    m.TradeName   = r.TradeName,
-    m.Description = r.Description;
-
+    n.RxNormCui   = r.RxNormCui,
+    n.GenericName = r.GenericName,
+    n.TradeName   = r.TradeName,
+    n.Description = r.Description;
 
 RETURN "Loading Country.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///Country.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (c:Country {
-    CountryCode: r.CountryCode})
+MERGE (n:Country {CountryCode: r.CountryCode})
 SET
-    c.Name                      = r.Name,
-    c.Population                = toInteger(r.Population),
-    c.AgeDistribution           = r.AgeDistribution,
-    c.SocioEconomicDistribution = r.SocioEconomicDistribution,
-    c.GenderDistribution        = r.GenderDistribution,
-    c.RacialDistribution        = r.RacialDistribution,
-    c.InformationDate           = datetime(r.InformationDate);
+    n.Name                      = r.Name,
+    n.Population                = toInteger(r.Population),
+    n.AgeDistribution           = r.AgeDistribution,
+    n.SocioEconomicDistribution = r.SocioEconomicDistribution,
+    n.GenderDistribution        = r.GenderDistribution,
+    n.RacialDistribution        = r.RacialDistribution,
+    n.InformationDate           = datetime(r.InformationDate);
 
 RETURN "Loading Continent.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///Continent.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (c:Continent {
-    ContinentCode: r.ContinentCode})
+MERGE (n:Continent {ContinentCode: r.ContinentCode})
 SET
-    c.Name = r.Name;
+    n.Name = r.Name;
 
 RETURN "Loading ExposureData.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///ExposureData.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (e:ExposureData {
-    ExposureId: r.ExposureId})
-SET
-    e.DataSource        = r.DataSource,
-    e.StartDate         = datetime(r.StartDate),
-    e.EndDate           = datetime(r.EndDate),
-    e.GroupAgeMin       = toFloat(r.GroupAgeMin),
-    e.GroupAgeMax       = toFloat(r.GroupAgeMax),
-    e.GroupGender       = r.GroupGender,
-    e.GroupRace         = r.GroupRace,
-    e.GroupCondition    = r.GroupCondition,
-    e.Count             = toInteger(r.Count),
-    e.DoseIdentifier    = r.DoseIdentifier,
-    e.SubRegion         = r.SubRegion;
-
-RETURN "Loading MeddraSmq.tsv..." AS `Action:`;
-LOAD CSV WITH HEADERS FROM "file:///MeddraSmq.tsv" AS r
-FIELDTERMINATOR '\t'
-MERGE (m:MeddraSmq {
-    MeddraSmqCode: toInteger(r.MeddraSmqCode)})
+MERGE (n:ExposureData {ExposureId: r.ExposureId})
 SET
-    m.Name            = r.Name,
-    m.SmqLevel        = r.MeddraSmqLevel,
-    m.SmqDescription  = r.MeddraSmqDescription,
-    m.SmqSource       = r.MeddraSmqSource,
-    m.SmqNote         = r.MeddraSmqNote,
-    m.SmqVersion      = r.MeddraSmqVersion,
-    m.SmqAlgorithm    = r.MeddraSmqAlgorithm,
-    m.SmqStatus       = r.MeddraSmqStatus;
-
-// Create MedDRA nodes
-// A single TSV file is created by the import process
-// and contains information on all MedDRA object types (i.e.
-// SOC, HGLT, HLT, PT, LLT). Cypher does not contain
-// the concept of setting a label dyamically, so
-// FOREACH statements are used to create each distinct
-// MedDRA label 
-// 
+    n.DataSource     = r.DataSource,
+    n.StartDate      = datetime(r.StartDate),
+    n.EndDate        = datetime(r.EndDate),
+    n.Count          = toInteger(r.Count),
+    n.GroupAgeMin    = toFloat(r.GroupAgeMin),
+    n.GroupAgeMax    = toFloat(r.GroupAgeMax),
+    n.GroupGender    = r.GroupGender,
+    n.GroupRace      = r.GroupRace,
+    n.GroupCondition = r.GroupCondition,
+    n.DoseIdentifier = r.DoseIdentifier,
+    n.SubRegion      = r.SubRegion;
+
+// MedDRA terms are merged with the label of their MeddraType, by a FOREACH per label from
+// a file of all terms, or from one file per label with MedDRA.TERM_FILES_BY_TYPE set.
 RETURN "Loading MeddraTerm.tsv..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///MeddraTerm.tsv" AS r
 FIELDTERMINATOR '\t'
-FOREACH ( ignoreMe IN
-CASE
-WHEN r.MeddraType = 'LLT' THEN [1] ELSE [] END | 
-    MERGE (m:MeddraLLT {
-        MeddraId: r.MeddraId})
+FOREACH (ignoreMe IN CASE WHEN r.MeddraType = 'PT' THEN [1] ELSE [] END |
+    MERGE (n:MeddraPT {MeddraId: r.MeddraId})
     SET
-        m.MeddraCode    = toInteger(r.MeddraCode),
-        m.MeddraType    = r.MeddraType,
-        m.Name          = r.Name,
-        m.MeddraVersion = r.MeddraVersion
+        n.MeddraCode    = toInteger(r.MeddraCode),
+        n.MeddraType    = r.MeddraType,
+        n.Name          = r.Name,
+        n.MeddraVersion = r.MeddraVersion
 )
-FOREACH ( ignoreMe IN
-CASE
-WHEN r.MeddraType = 'PT' THEN [1] ELSE [] END |
-    MERGE (m:MeddraPT {
-        MeddraId: r.MeddraId})
+FOREACH (ignoreMe IN CASE WHEN r.MeddraType = 'HLT' THEN [1] ELSE [] END |
+    MERGE (n:MeddraHLT {MeddraId: r.MeddraId})
     SET
-        m.MeddraCode    = toInteger(r.MeddraCode),
-        m.MeddraType    = r.MeddraType,
-        m.Name          = r.Name,
-        m.MeddraVersion = r.MeddraVersion
+        n.MeddraCode    = toInteger(r.MeddraCode),
+        n.MeddraType    = r.MeddraType,
+        n.Name          = r.Name,
+        n.MeddraVersion = r.MeddraVersion
 )
-FOREACH ( ignoreMe IN
-CASE
-WHEN r.MeddraType = 'HLT' THEN [1] ELSE [] END |
-    MERGE (m:MeddraHLT {
-        MeddraId: r.MeddraId})
+FOREACH (ignoreMe IN CASE WHEN r.MeddraType = 'HLGT' THEN [1] ELSE [] END |
+    MERGE (n:MeddraHLGT {MeddraId: r.MeddraId})
     SET
-        m.MeddraCode    = toInteger(r.MeddraCode),
-        m.MeddraType    = r.MeddraType,
-        m.Name          = r.Name,
-        m.MeddraVersion = r.MeddraVersion
+        n.MeddraCode    = toInteger(r.MeddraCode),
+        n.MeddraType    = r.MeddraType,
+        n.Name          = r.Name,
+        n.MeddraVersion = r.MeddraVersion
 )
-FOREACH ( ignoreMe IN
-CASE
-WHEN r.MeddraType = 'HLGT' THEN [1] ELSE [] END |
-    MERGE (m:MeddraHLGT {
-        MeddraId: r.MeddraId})
+FOREACH (ignoreMe IN CASE WHEN r.MeddraType = 'SOC' THEN [1] ELSE [] END |
+    MERGE (n:MeddraSOC {MeddraId: r.MeddraId})
     SET
-        m.MeddraCode    = toInteger(r.MeddraCode),
-        m.MeddraType    = r.MeddraType,
-        m.Name          = r.Name,
-        m.MeddraVersion = r.MeddraVersion
+        n.MeddraCode    = toInteger(r.MeddraCode),
+        n.MeddraType    = r.MeddraType,
+        n.Name          = r.Name,
+        n.MeddraVersion = r.MeddraVersion
 )
-FOREACH ( ignoreMe IN 
-CASE
-WHEN r.MeddraType = 'SOC' THEN [1] ELSE [] END |
-    MERGE (m:MeddraSOC {
-        MeddraId: r.MeddraId})
+FOREACH (ignoreMe IN CASE WHEN r.MeddraType = 'LLT' THEN [1] ELSE [] END |
+    MERGE (n:MeddraLLT {MeddraId: r.MeddraId})
     SET
-        m.MeddraCode    = toInteger(r.MeddraCode),
-        m.MeddraType    = r.MeddraType,
-        m.Name          = r.Name,
-        m.MeddraVersion = r.MeddraVersion
+        n.MeddraCode    = toInteger(r.MeddraCode),
+        n.MeddraType    = r.MeddraType,
+        n.Name          = r.Name,
+        n.MeddraVersion = r.MeddraVersion
 );
 
-RETURN "Creating Index on MeddraPT [Name,MeddraType]" AS `Action:`;
+RETURN "Loading MeddraCq.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
+LOAD CSV WITH HEADERS FROM "file:///MeddraCq.tsv" AS r
+FIELDTERMINATOR '\t'
+MERGE (n:MeddraCq {Name: r.Name})
+SET
+    n.Abbreviation = r.Abbreviation,
+    n.Description  = r.Description,
+    n.Authors      = r.Authors,
+    n.CreatedDate  = datetime(r.CreatedDate),
+    n.Source       = r.Source;
 
-CREATE INDEX FOR (m:MeddraPT) on (m.Name, m.MeddraType);
+RETURN "Loading MeddraSmq.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
+LOAD CSV WITH HEADERS FROM "file:///MeddraSmq.tsv" AS r
+FIELDTERMINATOR '\t'
+MERGE (n:MeddraSmq {MeddraSmqCode: toInteger(r.MeddraSmqCode)})
+SET
+    n.Name           = r.Name,
+    n.SmqLevel       = r.SmqLevel,
+    n.SmqDescription = r.SmqDescription,
+    n.SmqSource      = r.SmqSource,
+    n.SmqNote        = r.SmqNote,
+    n.SmqVersion     = r.SmqVersion,
+    n.SmqStatus      = r.SmqStatus,
+    n.SmqAlgorithm   = r.SmqAlgorithm;
 
 RETURN "Loading CaseGroup.tsv..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CaseGroup.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (cg:CaseGroup {
-    CaseGroupId: r.CaseGroupId})
+MERGE (n:CaseGroup {CaseGroupId: r.CaseGroupId})
 SET
-    cg.Name         = r.Name,
-    cg.Abbreviation = r.Abbreviation,
-    cg.Description  = r.Description;
-
+    n.Name         = r.Name,
+    n.Abbreviation = r.Abbreviation,
+    n.Description  = r.Description;
 
-// Edges
+// Some data sources, such as EudraVigilance, include the concept of updated cases.
+// The import process orders the versions of each case, writes the Current flag of
+// each version to Case.tsv, and links each version to the one before it.  Versions
+// may span source files, so every version with a later version is also marked as
+// not current here.
+RETURN "Loading CasePreviousVersion.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
+LOAD CSV WITH HEADERS FROM "file:///CasePreviousVersion.tsv" AS r
+FIELDTERMINATOR '\t'
+MATCH (s:Case {CaseId: r.CaseId})
+MATCH (t:Case {CaseId: r.PreviousCaseId})
+MERGE (s)-[e:PREVIOUS_VERSION]->(t)
+SET
+    t.Current = false;
 
-RETURN "Loading CasePrescribedMedication.tsv..." AS `Action:`;
+RETURN "Loading CasePrescribedMedication.tsv (Case -> Medication)..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CasePrescribedMedication.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (c:Case {
-    CaseId: r.CaseId})
-MATCH (m:Medication {
-    MedicationId: r.MedicationId})
-MERGE (c)-[p:PRESCRIBED]->(m)
+MATCH (s:Case {CaseId: r.CaseId})
+MATCH (t:Medication {MedicationId: r.MedicationId})
+MERGE (s)-[e:PRESCRIBED]->(t)
 SET
-    p.StartDate         = datetime(r.StartDate),
-    p.StopDate          = datetime(r.StopDate),
-    p.Route             = r.Route,
-    p.Duration          = CASE WHEN toFloat(r.Duration) > 0 THEN toFloat(r.Duration) ELSE NULL END,
-    p.Dosage            = toFloat(r.Dosage),
-    p.Units             = r.Units,
-    p.Evidence          = r.Evidence,
-    p.Characterization  = r.Characterization;
-
-RETURN "Loading CasePrescribedMedication.tsv (for Indication)..." AS `Action:`;
+    e.StartDate        = datetime(r.StartDate),
+    e.StopDate         = datetime(r.StopDate),
+    e.Route            = r.Route,
+    e.Duration         = toFloat(r.Duration),
+    e.Dosage           = toFloat(r.Dosage),
+    e.Units            = r.Units,
+    e.Evidence         = r.Evidence,
+    e.Characterization = r.Characterization;
+
+RETURN "Loading CasePrescribedMedication.tsv (Case -> MeddraPT)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CasePrescribedMedication.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (c:Case {
-    CaseId: r.CaseId})
-MATCH (m:MeddraPT { Name:r.Indication, MeddraType:'PT'})
-MERGE (c)-[:MEDICATED_FOR_INDICATION]->(m);
+MATCH (s:Case {CaseId: r.CaseId})
+MATCH (t:MeddraPT {MeddraId: r.IndicationMeddraId})
+MERGE (s)-[e:MEDICATED_FOR_INDICATION]->(t);
 
-RETURN "Loading CaseAdministeredVaccine.tsv..." AS `Action:`;
+RETURN "Loading CaseAdministeredVaccine.tsv (Case -> Vaccine)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CaseAdministeredVaccine.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (c:Case {
-    CaseId: r.CaseId})
-MATCH (v:Vaccine {
-    VaccineId: r.VaccineId})
-MERGE (c)-[a:ADMINISTERED]->(v)
+MATCH (s:Case {CaseId: r.CaseId})
+MATCH (t:Vaccine {VaccineId: r.VaccineId})
+MERGE (s)-[e:ADMINISTERED]->(t)
 SET
-    a.VaccineDate       = datetime(r.VaccineDate),
-    a.VaccineLot        = r.VaccineLot,
-    a.VaccineRoute      = r.VaccineRoute,
-    a.VaccineSite       = r.VaccineSite,
-    a.Dosage            = r.Dosage,
-    a.Duration          = CASE WHEN toFloat(r.Duration) > 0 THEN toFloat(r.Duration) ELSE NULL END,
-    a.Characterization  = r.Characterization;
-
-RETURN "Loading CaseAdministeredVaccine.tsv (for Indication)..." AS `Action:`;
+    e.VaccineDate      = datetime(r.VaccineDate),
+    e.VaccineLot       = r.VaccineLot,
+    e.VaccineRoute     = r.VaccineRoute,
+    e.VaccineSite      = r.VaccineSite,
+    e.Dosage           = r.Dosage,
+    e.Duration         = toFloat(r.Duration),
+    e.Characterization = r.Characterization;
+
+RETURN "Loading CaseAdministeredVaccine.tsv (Case -> MeddraPT)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CaseAdministeredVaccine.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (c:Case {
-    CaseId: r.CaseId})
-MATCH (m:MeddraPT {Name:r.Indication, MeddraType:'PT'})
-MERGE (c)-[:VACCINATED_FOR_INDICATION]->(m);
+MATCH (s:Case {CaseId: r.CaseId})
+MATCH (t:MeddraPT {MeddraId: r.IndicationMeddraId})
+MERGE (s)-[e:VACCINATED_FOR_INDICATION]->(t);
 
 RETURN "Loading CaseReportedFromCountry.tsv..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CaseReportedFromCountry.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (c:Case {
-    CaseId: r.CaseId})
-MATCH (co:Country {
-    CountryCode: r.Country})
-MERGE (c)-[e:REPORTED_FROM]->(co)
+MATCH (s:Case {CaseId: r.CaseId})
+MATCH (t:Country {CountryCode: r.Country})
+MERGE (s)-[e:REPORTED_FROM]->(t)
 SET
     e.SubRegion = r.SubRegion;
 
-RETURN "Loading ContainsCase.tsv..." AS `Action:`;
-USING PERIODIC COMMIT 1000
-LOAD CSV WITH HEADERS FROM "file:///ContainsCase.tsv" AS r
-FIELDTERMINATOR '\t'
-MATCH (c:Case {
-    CaseId: r.CaseId})
-MATCH (cg:CaseGroup {
-    CaseGroupId: r.CaseGroupId})
-MERGE (cg)-[:CONTAINS_CASE]->(c);
-
 RETURN "Loading CaseReportedAEMeddraTerm.tsv..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CaseReportedAEMeddraTerm.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (c:Case {
-    CaseId: r.CaseId})
-MATCH (m:MeddraPT {
-    Name: r.MeddraTerm, MeddraType:'PT'})
-MERGE (c)-[e:REPORTED_AE]->(m)
+MATCH (s:Case {CaseId: r.CaseId})
+MATCH (t:MeddraPT {MeddraId: r.MeddraId})
+MERGE (s)-[e:REPORTED_AE]->(t)
 SET
-    e.OnsetDate     = datetime(r.OnsetDate),
-    e.LengthInDays  = toInteger(r.LengthInDays);
+    e.OnsetDate    = datetime(r.OnsetDate),
+    e.LengthInDays = toInteger(r.LengthInDays);
 
 RETURN "Loading CountryInContinent.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CountryInContinent.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (co:Country {
-    CountryCode: r.CountryCode})
-MATCH (c:Continent {
-    ContinentCode: r.ContinentCode})
-MERGE (co)-[:IN]->(c);
+MATCH (s:Country {CountryCode: r.CountryCode})
+MATCH (t:Continent {ContinentCode: r.ContinentCode})
+MERGE (s)-[e:IN]->(t);
 
 RETURN "Loading CountryHasExposureData.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///CountryHasExposureData.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (co:Country {
-    CountryCode: r.CountryCode})
-MATCH (e:ExposureData {
-    ExposureId: r.ExposureId})
-MERGE (co)-[:HAS]->(e);
+MATCH (s:Country {CountryCode: r.CountryCode})
+MATCH (t:ExposureData {ExposureId: r.ExposureId})
+MERGE (s)-[e:HAS]->(t);
 
 RETURN "Loading VaccineHasExposureData.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///VaccineHasExposureData.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (v:Vaccine {
-    VaccineId: r.VaccineId})
-MATCH (e:ExposureData {
-    ExposureId: r.ExposureId})
-MERGE (v)-[:HAS]->(e);
+MATCH (s:Vaccine {VaccineId: r.VaccineId})
+MATCH (t:ExposureData {ExposureId: r.ExposureId})
+MERGE (s)-[e:HAS]->(t);
 
-RETURN "Loading MeddraOntology.tsv (LLTs -> PTs)..." AS `Action:`;
+RETURN "Loading MeddraCqLinks.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
+LOAD CSV WITH HEADERS FROM "file:///MeddraCqLinks.tsv" AS r
+FIELDTERMINATOR '\t'
+MATCH (s:MeddraCq {Name: r.Name})
+MATCH (t:MeddraPT {MeddraId: r.MeddraId})
+MERGE (s)-[e:MEDDRA_CQ_CONTAINS]->(t);
+
+RETURN "Loading MeddraOntology.tsv (MeddraLLT -> MeddraPT)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///MeddraOntology.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (m_llt_f:MeddraLLT {
-    MeddraId: r.MeddraIdFrom})
-MATCH (m_pt_t:MeddraPT {
-    MeddraId: r.MeddraIdTo})
-MERGE (m_llt_f)-[:MEDDRA_LINK]->(m_pt_t);
+MATCH (s:MeddraLLT {MeddraId: r.MeddraIdFrom})
+MATCH (t:MeddraPT {MeddraId: r.MeddraIdTo})
+MERGE (s)-[e:MEDDRA_LINK]->(t);
 
-RETURN "Loading MeddraOntology.tsv (PTs -> HLTs)..." AS `Action:`;
+RETURN "Loading MeddraOntology.tsv (MeddraPT -> MeddraHLT)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///MeddraOntology.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (m_pt_f:MeddraPT {
-    MeddraId: r.MeddraIdFrom})
-MATCH (m_hlt_t:MeddraHLT {
-    MeddraId: r.MeddraIdTo})
-MERGE (m_pt_f)-[l:MEDDRA_LINK]->(m_hlt_t)
-SET     l.PrimarySoc = r.PrimarySoc;
-
-RETURN "Loading MeddraOntology.tsv (HLTs to HLGTs)..." AS `Action:`;
+MATCH (s:MeddraPT {MeddraId: r.MeddraIdFrom})
+MATCH (t:MeddraHLT {MeddraId: r.MeddraIdTo})
+MERGE (s)-[e:MEDDRA_LINK]->(t)
+SET
+    e.PrimarySoc = r.PrimarySoc;
+
+RETURN "Loading MeddraOntology.tsv (MeddraHLT -> MeddraHLGT)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///MeddraOntology.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (m_hlt_f:MeddraHLT {
-    MeddraId: r.MeddraIdFrom})
-MATCH (m_hlgt_t:MeddraHLGT {
-    MeddraId: r.MeddraIdTo})
-MERGE (m_hlt_f)-[:MEDDRA_LINK]->(m_hlgt_t);
+MATCH (s:MeddraHLT {MeddraId: r.MeddraIdFrom})
+MATCH (t:MeddraHLGT {MeddraId: r.MeddraIdTo})
+MERGE (s)-[e:MEDDRA_LINK]->(t);
 
-RETURN "Loading MeddraOntology.tsv (HLGTs to SOCs)..." AS `Action:`;
+RETURN "Loading MeddraOntology.tsv (MeddraHLGT -> MeddraSOC)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///MeddraOntology.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (m_hlgt_f:MeddraHLGT {
-    MeddraId: r.MeddraIdFrom})
-MATCH (m_soc_t:MeddraSOC {
-    MeddraId: r.MeddraIdTo})
-MERGE (m_hlgt_f)-[:MEDDRA_LINK]->(m_soc_t);
+MATCH (s:MeddraHLGT {MeddraId: r.MeddraIdFrom})
+MATCH (t:MeddraSOC {MeddraId: r.MeddraIdTo})
+MERGE (s)-[e:MEDDRA_LINK]->(t);
+
+RETURN "Loading MeddraSmqContainsSmq.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
+LOAD CSV WITH HEADERS FROM "file:///MeddraSmqContainsSmq.tsv" AS r
+FIELDTERMINATOR '\t'
+MATCH (s:MeddraSmq {MeddraSmqCode: toInteger(r.MeddraSmqCode)})
+MATCH (t:MeddraSmq {MeddraSmqCode: toInteger(r.MeddraId)})
+MERGE (s)-[e:MEDDRA_SMQ_CONTAINS]->(t)
+SET
+    e.Scope               = r.Scope,
+    e.Status              = r.Status,
+    e.Category            = r.Category,
+    e.Weight              = toFloat(r.Weight),
+    e.AdditionVersion     = r.AdditionVersion,
+    e.LastModifiedVersion = r.LastModifiedVersion;
 
 RETURN "Loading MeddraSmqContainsTerm.tsv..." AS `Action:`;
 USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///MeddraSmqContainsTerm.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (s:MeddraSmq {
-    MeddraSmqCode: toInteger(r.MeddraSmqCode)})
-MATCH (m:MeddraPT {
-    MeddraId: r.MeddraId})
-MERGE (s)-[l:MEDDRA_SMQ_CONTAINS]->(m)
+MATCH (s:MeddraSmq {MeddraSmqCode: toInteger(r.MeddraSmqCode)})
+MATCH (t:MeddraPT {MeddraId: r.MeddraId})
+MERGE (s)-[e:MEDDRA_SMQ_CONTAINS]->(t)
 SET
-    l.Scope                 = r.Scope,
-    l.Status                = r.Status,
-    l.Category              = r.Category,
-    l.Weight                = toFloat(r.Weight),
-    l.AdditionVersion       = r.AdditionVersion,
-    l.LastModifiedVersion   = r.LastModifiedVersion;
-
-RETURN "Loading MeddraSmqContainsSmq.tsv..." AS `Action:`;
+    e.Scope               = r.Scope,
+    e.Status              = r.Status,
+    e.Category            = r.Category,
+    e.Weight              = toFloat(r.Weight),
+    e.AdditionVersion     = r.AdditionVersion,
+    e.LastModifiedVersion = r.LastModifiedVersion;
+
+RETURN "Loading MeddraSmqClosure.tsv (MeddraSmq -> MeddraPT)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
-LOAD CSV WITH HEADERS FROM "file:///MeddraSmqContainsSmq.tsv" AS r
+LOAD CSV WITH HEADERS FROM "file:///MeddraSmqClosure.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (s:MeddraSmq {
-    MeddraSmqCode: toInteger(r.MeddraSmqCode)})
-MATCH (m:MeddraSmq {
-    MeddraSmqCode: toInteger(r.MeddraId)})
-MERGE (s)-[l:MEDDRA_SMQ_CONTAINS]->(m)
+MATCH (s:MeddraSmq {MeddraSmqCode: toInteger(r.MeddraSmqCode)})
+MATCH (t:MeddraPT {MeddraId: r.MeddraId})
+MERGE (s)-[e:MEDDRA_SMQ_CLOSURE {Scope: r.Scope, Category: r.Category}]->(t)
 SET
-    l.Scope                 = r.Scope,
-    l.Status                = r.Status,
-    l.Category              = r.Category,
-    l.Weight                = toFloat(r.Weight),
-    l.AdditionVersion       = r.AdditionVersion,
-    l.LastModifiedVersion   = r.LastModifiedVersion;
+    e.Status     = r.Status,
+    e.Weight     = toFloat(r.Weight),
+    e.ViaSmqCode = toInteger(r.ViaSmqCode),
+    e.Depth      = toInteger(r.Depth);
 
-RETURN "Loading MeddraCq.tsv..." AS `Action:`;
+RETURN "Loading MeddraSmqClosure.tsv (MeddraSmq -> MeddraLLT)..." AS `Action:`;
 USING PERIODIC COMMIT 1000
-LOAD CSV WITH HEADERS FROM "file:///MeddraCq.tsv" AS r
+LOAD CSV WITH HEADERS FROM "file:///MeddraSmqClosure.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (azm: MeddraCq {
-    Name: r.Name})
+MATCH (s:MeddraSmq {MeddraSmqCode: toInteger(r.MeddraSmqCode)})
+MATCH (t:MeddraLLT {MeddraId: r.MeddraId})
+MERGE (s)-[e:MEDDRA_SMQ_CLOSURE {Scope: r.Scope, Category: r.Category}]->(t)
 SET
-    azm.Abbreviation	 = r.Abbreviation,
-    azm.Description	     = r.Description,
-    azm.Authors	         = r.Authors,
-    azm.CreatedDate	     = datetime(r.CreatedDate),
-    azm.Version          = r.Version;
+    e.Status     = r.Status,
+    e.Weight     = toFloat(r.Weight),
+    e.ViaSmqCode = toInteger(r.ViaSmqCode),
+    e.Depth      = toInteger(r.Depth);
 
-RETURN "Loading MeddraCqLinks.tsv..." AS `Action:`;
-LOAD CSV WITH HEADERS FROM "file:///MeddraCqLinks.tsv" AS r
+RETURN "Loading ContainsCase.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
+LOAD CSV WITH HEADERS FROM "file:///ContainsCase.tsv" AS r
 FIELDTERMINATOR '\t'
-MATCH (azm:MeddraCq {
-    Name: r.Name})
-MATCH (m:MeddraPT {
-    Name: r.PT, MeddraType: 'PT'})
-MERGE (azm)-[:MEDDRA_CQ_CONTAINS]->(m);
+MATCH (s:CaseGroup {CaseGroupId: r.CaseGroupId})
+MATCH (t:Case {CaseId: r.CaseId})
+MERGE (s)-[e:CONTAINS_CASE]->(t);
 
 RETURN "Loading Manifest.tsv..." AS `Action:`;
+USING PERIODIC COMMIT 1000
 LOAD CSV WITH HEADERS FROM "file:///Manifest.tsv" AS r
 FIELDTERMINATOR '\t'
-MERGE (m:Manifest { Path: r.Path, 
-                    Tag: CASE r.Tag WHEN NULL THEN '(no tag)' ELSE r.Tag END, 
-                    Rows:toFloat(r.Rows), 
-                    Size:toFloat(r.Size), 
-                    LastModified:datetime(r.LastModified)})
-SET m.Md5 = r.Md5;
+MERGE (n:Manifest {Path: r.Path, Tag: r.Tag, Rows: toFloat(r.Rows), Size: toFloat(r.Size), LastModified: datetime(r.LastModified)})
+SET
+    n.Md5 = r.Md5;
 
 RETURN "Load Complete..." AS `Action:`;
 
@@ -515,13 +432,13 @@ RETURN "Setting VAERS Quality Attributes..." AS `Action:`;
 // These quality checks help eliminate COVID19 vaccines with incorrect
 // vaccination dates (e.g. predating the availabilitiy of COVID19 vaccines)
 // and questionable onset times.
-MATCH (c:Case {DataSource:'VAERS'}) -[r:REPORTED_AE]->(md:MeddraPT) 
+MATCH (c:Case {DataSource:'VAERS'}) -[r:REPORTED_AE]->(md:MeddraPT)
 MATCH (c) -[:ADMINISTERED]->(v:Vaccine {VaxType:'COVID19'})
-WHERE   r.OnsetDate >= datetime('2020-12-01')  
-        AND r.LengthInDays < 100 
-        AND c.ReceivedDate >= datetime('2020-12-01') 
+WHERE   r.OnsetDate >= datetime('2020-12-01')
+        AND r.LengthInDays < 100
+        AND c.ReceivedDate >= datetime('2020-12-01')
         AND EXISTS(c.PatientAgeRangeMin) SET c.VaersQC = 1;
 
 RETURN "Post Import Processing Complete." AS `Action:`;
 
-RETURN "PSKG Graph Loaded." AS `Action:`;
\ No newline at end of file
+RETURN "PSKG Graph Loaded." AS `Action:`;
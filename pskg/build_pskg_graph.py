@@ -31,6 +31,7 @@ from data_nodes import (
     geocoding,
     meddracq,
     meddra,
+    meddra_delta,
     case_group,
 )
 from data_edges import (
@@ -41,6 +42,7 @@ from data_edges import (
     eu_case_reported_ae_meddra_term,
     vaers_case_reported_from,
     eu_case_reported_from,
+    eu_case_previous_version,
     geocoding_relationships,
     az_country_has_exposure,
     cdc_country_has_exposure,
@@ -50,8 +52,17 @@ from data_edges import (
     meddra_ontology,
     case_group_case,
 )
-from data_prep import eudravigilance, vaers
-from graph_objects import utils as gu
+from data_prep import (
+    csv_engine,
+    drug_resolution,
+    dtype_plan,
+    eudravigilance,
+    meddra_dictionary,
+    meddracq_index,
+    term_resolution,
+    vaers,
+)
+from graph_objects import load_scripts, utils as gu
 
 #
 # Helper functions
@@ -93,13 +104,18 @@ def main(
     output_path=None,
     output_bucket=None,
     output_key=None,
+    previous_meddra_version=None,
+    previous_meddra_folder_path=None,
 ):
     """
     Top level load function.  Attempt to load all specified data and produce TSV files for loading into Neo4J.
+    When previous_meddra_version is given, MedDRA delta files from that version replace the full MedDRA files.
     """
 
     logger.info(f"Starting import {datetime.now()}")
     logger.info(f"MedDRA: {cfg['MedDRA']['VERSION']}")
+    if previous_meddra_version:
+        logger.info(f"MedDRA delta from: {previous_meddra_version}")
     logger.info(f"Eudravigilance: {eudra_dataset_tag}")
     logger.info(f"AZ Exposure: {az_exposure_tag}")
     if vaers_combined_file:
@@ -113,11 +129,24 @@ def main(
 
     logger.info(f"Output Version: {output_data_version}")
 
+    csv_options = cfg.get("CSV", {})
+    csv_engine.set_csv_engine(
+        engine=csv_options.get("ENGINE", "pandas"),
+        block_size=csv_options.get("BLOCK_SIZE"),
+    )
+    dtype_plan.set_memory_report(cfg.get("DTYPES", {}).get("MEMORY_REPORT", False))
+
+    segment_cache_path = cfg["VAERS"].get("SEGMENT_CACHE")
+    segment_cache = gu.SegmentCache(segment_cache_path) if segment_cache_path else None
+
     if output_path:
         # Writing to local file system
         logger.info(f"Writing to local file system: {output_path}")
         output_manager = gu.ImportPoolManager(
-            s3_output_bucket=None, s3_output_key=None, output_folder=output_path
+            s3_output_bucket=None,
+            s3_output_key=None,
+            output_folder=output_path,
+            segment_cache=segment_cache,
         )
     else:
         # Writing to S3
@@ -129,6 +158,7 @@ def main(
             s3_output_bucket=final_bucket,
             s3_output_key=final_output_key,
             output_folder=None,
+            segment_cache=segment_cache,
         )
 
     if data_path:
@@ -200,9 +230,24 @@ def main(
         )
         vaers_vaccine_types_path = None
 
+    # Unchanged VAERS tags reuse output from the previous build, sources are only
+    # fingerprinted when a segment cache is configured
+    vaers_fingerprints = vaers.get_tag_fingerprints(vaers_components)
+    vaers_vaccine_types_fingerprint = None
+    if segment_cache is not None:
+        vaers_vaccine_types_fingerprint = gu.source_fingerprint(
+            s3_bucket=input_bucket,
+            s3_key=vaers_vaccine_types_s3_key,
+            file_path=vaers_vaccine_types_path,
+        )
+
     ####
     #### Organize EudraVigilance source data
     ####
+    eudravigilance.set_xml_parse_workers(
+        cfg["EudraVigilance"].get("XML_PARSE_WORKERS", 1)
+    )
+    drug_resolution.set_cache_file(cfg["EudraVigilance"].get("DRUG_RESOLUTION_CACHE"))
     eu_files = eudravigilance.find_line_listing_files(
         input_bucket=input_bucket,
         data_set_tag=eudra_dataset_tag,
@@ -215,21 +260,27 @@ def main(
     ####
 
     # Gather all Case Node information
-    case_pool = gu.Pool(name="Cases", output_file=cfg["Nodes"]["CASE_FILENAME"])
+    case_pool = gu.Pool(
+        name="Cases",
+        output_file=cfg["Nodes"]["CASE_FILENAME"],
+        generator_class=eu_case.EudraVigilanceCase,
+    )
     ev_source = cfg["EudraVigilance"]["EV_SOURCE"]
     logger.info(f"ev_source: {ev_source}")
     logger.info(f"Registering cases in {case_pool}")
     for _, r in (
         vaers_components[["key", "file_path", "tag"]].drop_duplicates().iterrows()
     ):
-        case_pool.register(
-            vaers_case.VaersCase(
-                data_set_tag=r["tag"],
-                s3_bucket=input_bucket,
-                s3_key=r["key"],
-                file_path=r["file_path"],
-            )
+        graph_obj = vaers_case.VaersCase(
+            data_set_tag=r["tag"],
+            s3_bucket=input_bucket,
+            s3_key=r["key"],
+            file_path=r["file_path"],
+        )
+        graph_obj.set_segment_key(
+            r["key"], r["file_path"], vaers_fingerprints[r["tag"]]
         )
+        case_pool.register(graph_obj)
 
     for _, r in eu_files[["key", "file_path"]].iterrows():
         case_pool.register(
@@ -245,22 +296,29 @@ def main(
 
     # Gather all Vaccine Node information
     vaccine_pool = gu.Pool(
-        name="Vaccines", output_file=cfg["Nodes"]["VACCINE_FILENAME"]
+        name="Vaccines",
+        output_file=cfg["Nodes"]["VACCINE_FILENAME"],
+        generator_class=eu_drug.EudraVigilanceVaccine,
     )
     logger.info(f"Registering vaccines in {vaccine_pool}")
     for _, r in (
         vaers_components[["file_path", "key", "tag"]].drop_duplicates().iterrows()
     ):
-        vaccine_pool.register(
-            vaers_vaccine.VaersVaccine(
-                data_set_tag=r["tag"],
-                s3_bucket=input_bucket,
-                s3_key=r["key"],
-                file_path=r["file_path"],
-                desc_s3_key=vaers_vaccine_types_s3_key,
-                desc_file_path=vaers_vaccine_types_path,
-            )
+        graph_obj = vaers_vaccine.VaersVaccine(
+            data_set_tag=r["tag"],
+            s3_bucket=input_bucket,
+            s3_key=r["key"],
+            file_path=r["file_path"],
+            desc_s3_key=vaers_vaccine_types_s3_key,
+            desc_file_path=vaers_vaccine_types_path,
+        )
+        graph_obj.set_segment_key(
+            r["key"],
+            r["file_path"],
+            vaers_fingerprints[r["tag"]],
+            vaers_vaccine_types_fingerprint,
         )
+        vaccine_pool.register(graph_obj)
     for _, r in eu_files[["key", "file_path"]].iterrows():
         vaccine_pool.register(
             eu_drug.EudraVigilanceVaccine(
@@ -276,7 +334,9 @@ def main(
     # Gather all Medication Node information
     # Note medications are only available in EV records currently
     medication_pool = gu.Pool(
-        name="Medications", output_file=cfg["Nodes"]["MEDICATION_FILENAME"]
+        name="Medications",
+        output_file=cfg["Nodes"]["MEDICATION_FILENAME"],
+        generator_class=eu_drug.EudraVigilanceMedication,
     )
     logger.info(f"Registering medications in {medication_pool}")
     for _, r in eu_files[["key", "file_path"]].iterrows():
@@ -338,18 +398,53 @@ def main(
     output_manager.register(exposure_pool)
 
     # Gather MedDRA Nodes
-    meddra_nodes_pool = gu.Pool(
-        name="MedDRA", output_file=cfg["Nodes"]["MEDDRA_TERM_FILENAME"]
+    meddra_dictionary.set_cache_folder(cfg["MedDRA"].get("DICTIONARY_CACHE"))
+    term_resolution.set_meddra_source(
+        version=cfg["MedDRA"]["VERSION"],
+        s3_bucket=input_bucket,
+        s3_key=f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}",
+        folder_path=meddra_folder_path,
     )
-    logger.info(f"Registering MedDRA Terms in {meddra_nodes_pool}")
-    meddra_nodes_pool.register(
-        meddra.MeddraTerm(
-            s3_bucket=input_bucket,
-            s3_key=f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}",
-            folder_path=meddra_folder_path,
+    # MedDRA term pools by type, when written one file per label
+    meddra_term_pools = {}
+    # MedDRA delta pools with previous_meddra_version, applied by their own script
+    meddra_delta_pools = []
+    if previous_meddra_version is None and cfg["MedDRA"].get("TERM_FILES_BY_TYPE"):
+        for meddra_type in meddra_dictionary.TERM_TYPES:
+            meddra_nodes_pool = gu.Pool(
+                name=f"MedDRA{meddra_type}",
+                output_file=cfg["Nodes"]["MEDDRA_TERM_TYPE_FILENAME"].format(
+                    meddra_type=meddra_type
+                ),
+            )
+            logger.info(
+                f"Registering MedDRA {meddra_type} Terms in {meddra_nodes_pool}"
+            )
+            meddra_nodes_pool.register(
+                meddra.MeddraTerm(
+                    s3_bucket=input_bucket,
+                    s3_key=f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}",
+                    folder_path=meddra_folder_path,
+                    meddra_version=cfg["MedDRA"]["VERSION"],
+                    meddra_types=[meddra_type],
+                )
+            )
+            output_manager.register(meddra_nodes_pool)
+            meddra_term_pools[meddra_type] = meddra_nodes_pool
+    elif previous_meddra_version is None:
+        meddra_nodes_pool = gu.Pool(
+            name="MedDRA", output_file=cfg["Nodes"]["MEDDRA_TERM_FILENAME"]
         )
-    )
-    output_manager.register(meddra_nodes_pool)
+        logger.info(f"Registering MedDRA Terms in {meddra_nodes_pool}")
+        meddra_nodes_pool.register(
+            meddra.MeddraTerm(
+                s3_bucket=input_bucket,
+                s3_key=f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}",
+                folder_path=meddra_folder_path,
+                meddra_version=cfg["MedDRA"]["VERSION"],
+            )
+        )
+        output_manager.register(meddra_nodes_pool)
 
     # Gather MedDRA Custom Query Node information
     meddra_cq_pool = gu.Pool(
@@ -358,6 +453,7 @@ def main(
     logger.info(f"Registering Meddra Custom Queries in {meddra_cq_pool}")
 
     meddracq_project_folder = get_meddracq_project_folder(cfg)
+    meddracq_index.set_cache_folder(cfg["MedDRACQ"].get("INDEX_CACHE"))
     meddra_cq_pool.register(meddracq.MeddraCq(file_path=meddracq_project_folder))
 
     logger.info(
@@ -365,19 +461,21 @@ def main(
     )
     output_manager.register(meddra_cq_pool)
 
-    # MedDRA SMQs
-    meddra_smq_smq_pool = gu.Pool(
-        name="MedDRA_SMQ", output_file=cfg["Nodes"]["MEDDRA_SMQ_FILENAME"]
-    )
-    logger.info(f"Registering MedDRA SMQs in {meddra_smq_smq_pool}")
-    meddra_smq_smq_pool.register(
-        meddra.MeddraSMQ(
-            s3_bucket=input_bucket,
-            s3_key=f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}",
-            folder_path=meddra_folder_path,
+    if previous_meddra_version is None:
+        # MedDRA SMQs
+        meddra_smq_smq_pool = gu.Pool(
+            name="MedDRA_SMQ", output_file=cfg["Nodes"]["MEDDRA_SMQ_FILENAME"]
         )
-    )
-    output_manager.register(meddra_smq_smq_pool)
+        logger.info(f"Registering MedDRA SMQs in {meddra_smq_smq_pool}")
+        meddra_smq_smq_pool.register(
+            meddra.MeddraSMQ(
+                s3_bucket=input_bucket,
+                s3_key=f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}",
+                folder_path=meddra_folder_path,
+                meddra_version=cfg["MedDRA"]["VERSION"],
+            )
+        )
+        output_manager.register(meddra_smq_smq_pool)
 
     # Case Groups
     case_group_pool = gu.Pool(
@@ -390,8 +488,30 @@ def main(
     ####
     #### Create Edges
     ####
+    # Links between versions of updated EV cases, written after the Cases pool
+    case_version_pool = gu.Pool(
+        name="CasePreviousVersion",
+        output_file=cfg["Edges"]["CASE_PREVIOUS_VERSION_FILENAME"],
+        generator_class=eu_case_previous_version.EudraVigilanceCasePreviousVersion,
+    )
+    for _, r in eu_files[["key", "file_path"]].iterrows():
+        case_version_pool.register(
+            eu_case_previous_version.EudraVigilanceCasePreviousVersion(
+                data_set_tag=eu_cutoff_tag,
+                s3_bucket=input_bucket,
+                s3_key=r["key"],
+                file_path=r["file_path"],
+                ev_source=ev_source,
+            )
+        )
+    output_manager.register(case_version_pool)
+
     case_meds_pool = gu.Pool(
-        name="CasePrescribedMeds", output_file=cfg["Edges"]["PRESCRIBED_FILENAME"]
+        name="CasePrescribedMeds",
+        output_file=cfg["Edges"]["PRESCRIBED_FILENAME"],
+        generator_class=(
+            eu_case_prescribed_medication.EudraVigilanceCasePrescribedMedication
+        ),
     )
     # NOTE: Currently no medication Rx information available in VAERS in a structured format.
     for _, r in eu_files[["key", "file_path"]].iterrows():
@@ -408,19 +528,23 @@ def main(
     output_manager.register(case_meds_pool)
 
     case_admin_pool = gu.Pool(
-        name="CaseAdminVaccines", output_file=cfg["Edges"]["ADMINISTERED_FILENAME"]
+        name="CaseAdminVaccines",
+        output_file=cfg["Edges"]["ADMINISTERED_FILENAME"],
+        generator_class=eu_case_administered_vaccine.EudraVigilanceAdministeredVaccine,
     )
     for _, r in (
         vaers_components[["file_path", "key", "tag"]].drop_duplicates().iterrows()
     ):
-        case_admin_pool.register(
-            vaers_case_administered_vaccine.VaersCaseAdministeredVaccine(
-                data_set_tag=r["tag"],
-                s3_bucket=input_bucket,
-                s3_key=r["key"],
-                file_path=r["file_path"],
-            )
+        graph_obj = vaers_case_administered_vaccine.VaersCaseAdministeredVaccine(
+            data_set_tag=r["tag"],
+            s3_bucket=input_bucket,
+            s3_key=r["key"],
+            file_path=r["file_path"],
+        )
+        graph_obj.set_segment_key(
+            r["key"], r["file_path"], vaers_fingerprints[r["tag"]]
         )
+        case_admin_pool.register(graph_obj)
     for _, r in eu_files[["key", "file_path"]].iterrows():
         case_admin_pool.register(
             eu_case_administered_vaccine.EudraVigilanceAdministeredVaccine(
@@ -434,19 +558,23 @@ def main(
     output_manager.register(case_admin_pool)
 
     case_country_pool = gu.Pool(
-        name="CaseCountries", output_file=cfg["Edges"]["REPORTED_FROM_FILENAME"]
+        name="CaseCountries",
+        output_file=cfg["Edges"]["REPORTED_FROM_FILENAME"],
+        generator_class=eu_case_reported_from.EudraVigilanceCaseReportedFrom,
     )
     for _, r in (
         vaers_components[["file_path", "key", "tag"]].drop_duplicates().iterrows()
     ):
-        case_country_pool.register(
-            vaers_case_reported_from.VaersCaseReportedFrom(
-                data_set_tag=r["tag"],
-                s3_bucket=input_bucket,
-                s3_key=r["key"],
-                file_path=r["file_path"],
-            )
+        graph_obj = vaers_case_reported_from.VaersCaseReportedFrom(
+            data_set_tag=r["tag"],
+            s3_bucket=input_bucket,
+            s3_key=r["key"],
+            file_path=r["file_path"],
+        )
+        graph_obj.set_segment_key(
+            r["key"], r["file_path"], vaers_fingerprints[r["tag"]]
         )
+        case_country_pool.register(graph_obj)
     for _, r in eu_files[["key", "file_path"]].iterrows():
         case_country_pool.register(
             eu_case_reported_from.EudraVigilanceCaseReportedFrom(
@@ -460,19 +588,29 @@ def main(
     output_manager.register(case_country_pool)
 
     case_reported_ae_pool = gu.Pool(
-        name="CaseReportedAEs", output_file=cfg["Edges"]["REPORTED_AE_FILENAME"]
+        name="CaseReportedAEs",
+        output_file=cfg["Edges"]["REPORTED_AE_FILENAME"],
+        generator_class=(
+            eu_case_reported_ae_meddra_term.EudraVigilanceCaseReportedAEMeddraTerm
+        ),
     )
     for _, r in (
         vaers_components[["file_path", "key", "tag"]].drop_duplicates().iterrows()
     ):
-        case_reported_ae_pool.register(
-            vaers_case_reported_ae_meddra_term.VaersCaseReportedAEMeddraTerm(
-                data_set_tag=r["tag"],
-                s3_bucket=input_bucket,
-                s3_key=r["key"],
-                file_path=r["file_path"],
-            )
+        graph_obj = vaers_case_reported_ae_meddra_term.VaersCaseReportedAEMeddraTerm(
+            data_set_tag=r["tag"],
+            s3_bucket=input_bucket,
+            s3_key=r["key"],
+            file_path=r["file_path"],
+        )
+        # MeddraIds depend on the MedDRA version used for term resolution
+        graph_obj.set_segment_key(
+            r["key"],
+            r["file_path"],
+            vaers_fingerprints[r["tag"]],
+            cfg["MedDRA"]["VERSION"],
         )
+        case_reported_ae_pool.register(graph_obj)
     for _, r in eu_files[["key", "file_path"]].iterrows():
         case_reported_ae_pool.register(
             eu_case_reported_ae_meddra_term.EudraVigilanceCaseReportedAEMeddraTerm(
@@ -554,53 +692,101 @@ def main(
     )
     output_manager.register(meddracq_links_pool)
 
-    ###
-    ### MedDRA Ontology
-    meddra_ontology_pool = gu.Pool(
-        "MeddraOntology", output_file=cfg["Edges"]["MEDDRA_ONTOLOGY_FILENAME"]
-    )
-    meddra_key_version = f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}"
-    meddra_ontology_pool.register(
-        meddra_ontology.MeddraOntology(
-            s3_bucket=input_bucket,
-            s3_key=meddra_key_version,
-            folder_path=meddra_folder_path,
+    if previous_meddra_version is None:
+        ###
+        ### MedDRA Ontology
+        meddra_ontology_pool = gu.Pool(
+            "MeddraOntology", output_file=cfg["Edges"]["MEDDRA_ONTOLOGY_FILENAME"]
         )
-    )
-    output_manager.register(meddra_ontology_pool)
+        meddra_key_version = f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}"
+        meddra_ontology_pool.register(
+            meddra_ontology.MeddraOntology(
+                s3_bucket=input_bucket,
+                s3_key=meddra_key_version,
+                folder_path=meddra_folder_path,
+                meddra_version=cfg["MedDRA"]["VERSION"],
+            )
+        )
+        output_manager.register(meddra_ontology_pool)
 
-    ###
-    ### MedDRA SMQ Links
-    meddra_smq_smq_pool = gu.Pool(
-        "MeddraSMQtoSMQ", output_file=cfg["Edges"]["MEDDRA_SMQ_SMQ_LINK_FILENAME"]
-    )
-    meddra_smq_smq_pool.register(
-        meddra_ontology.MeddraSMQContainsTerm(
-            smq=True,
-            s3_bucket=input_bucket,
-            s3_key=meddra_key_version,
-            folder_path=meddra_folder_path,
+        ###
+        ### MedDRA SMQ Links
+        meddra_smq_smq_pool = gu.Pool(
+            "MeddraSMQtoSMQ", output_file=cfg["Edges"]["MEDDRA_SMQ_SMQ_LINK_FILENAME"]
         )
-    )
-    output_manager.register(meddra_smq_smq_pool)
+        meddra_smq_smq_pool.register(
+            meddra_ontology.MeddraSMQContainsTerm(
+                smq=True,
+                s3_bucket=input_bucket,
+                s3_key=meddra_key_version,
+                folder_path=meddra_folder_path,
+                meddra_version=cfg["MedDRA"]["VERSION"],
+            )
+        )
+        output_manager.register(meddra_smq_smq_pool)
 
-    meddra_smq_term_pool = gu.Pool(
-        "MeddraSMQtoPT", output_file=cfg["Edges"]["MEDDRA_SMQ_TERM_LINK_FILENAME"]
-    )
-    meddra_smq_term_pool.register(
-        meddra_ontology.MeddraSMQContainsTerm(
-            smq=False,
-            s3_bucket=input_bucket,
-            s3_key=meddra_key_version,
-            folder_path=meddra_folder_path,
+        meddra_smq_term_pool = gu.Pool(
+            "MeddraSMQtoPT", output_file=cfg["Edges"]["MEDDRA_SMQ_TERM_LINK_FILENAME"]
         )
-    )
-    output_manager.register(meddra_smq_term_pool)
+        meddra_smq_term_pool.register(
+            meddra_ontology.MeddraSMQContainsTerm(
+                smq=False,
+                s3_bucket=input_bucket,
+                s3_key=meddra_key_version,
+                folder_path=meddra_folder_path,
+                meddra_version=cfg["MedDRA"]["VERSION"],
+            )
+        )
+        output_manager.register(meddra_smq_term_pool)
+
+        meddra_smq_closure_pool = gu.Pool(
+            "MeddraSMQClosure", output_file=cfg["Edges"]["MEDDRA_SMQ_CLOSURE_FILENAME"]
+        )
+        meddra_smq_closure_pool.register(
+            meddra_ontology.MeddraSMQClosure(
+                s3_bucket=input_bucket,
+                s3_key=meddra_key_version,
+                folder_path=meddra_folder_path,
+                meddra_version=cfg["MedDRA"]["VERSION"],
+            )
+        )
+        output_manager.register(meddra_smq_closure_pool)
+    else:
+        ###
+        ### MedDRA deltas from previous_meddra_version (MedDRA.DELTA)
+        logger.info(f"MedDRA delta from {previous_meddra_version}")
+        meddra_key_version = f"{cfg['MedDRA']['KEY']}/{cfg['MedDRA']['VERSION']}"
+        for delta_class, file_name in [
+            (meddra_delta.MeddraTermDelta, "TERM_FILENAME"),
+            (meddra_delta.MeddraSMQDelta, "SMQ_FILENAME"),
+            (meddra_delta.MeddraOntologyDelta, "ONTOLOGY_FILENAME"),
+            (meddra_delta.MeddraSMQContainsDelta, "SMQ_CONTAINS_FILENAME"),
+            (meddra_delta.MeddraSMQClosureDelta, "SMQ_CLOSURE_FILENAME"),
+        ]:
+            delta_pool = gu.Pool(
+                delta_class.__name__,
+                output_file=cfg["MedDRA"]["DELTA"][file_name],
+            )
+            delta_pool.register(
+                delta_class(
+                    s3_bucket=input_bucket,
+                    s3_key=meddra_key_version,
+                    folder_path=meddra_folder_path,
+                    meddra_version=cfg["MedDRA"]["VERSION"],
+                    previous_s3_key=f"{cfg['MedDRA']['KEY']}/{previous_meddra_version}",
+                    previous_folder_path=previous_meddra_folder_path,
+                    previous_version=previous_meddra_version,
+                )
+            )
+            output_manager.register(delta_pool)
+            meddra_delta_pools.append(delta_pool)
 
     ###
     ### Case Groups (CaseContains.tsv)
     case_group_contains_pool = gu.Pool(
-        name="CaseGroupLinks", output_file=cfg["Edges"]["CONTAINS_CASE_FILENAME"]
+        name="CaseGroupLinks",
+        output_file=cfg["Edges"]["CONTAINS_CASE_FILENAME"],
+        generator_class=case_group_case.EudraVigilanceCaseGroupCase,
     )
 
     for _, r in eu_files[["key", "file_path"]].iterrows():
@@ -619,6 +805,44 @@ def main(
     ### CREATE ALL LOAD FILES
     ###
     output_manager.create_output()
+    delta_files = [pool.output_file for pool in meddra_delta_pools]
+    output_manager.write_text(
+        load_scripts.load_script(
+            [f for f in output_manager.load_files() if f[0] not in delta_files]
+        ),
+        cfg["Neo4J"]["LOAD_SCRIPT"],
+        description="load script",
+    )
+    if meddra_delta_pools:
+        # Version of the terms after the delta, from the MedDRA release file
+        term_delta = meddra_delta_pools[0].graph_object_list[0]
+        output_manager.write_text(
+            load_scripts.meddra_delta_script(
+                [(pool.output_file, pool.load_schema()) for pool in meddra_delta_pools],
+                meddra_version=term_delta.release_version(),
+                term_labels=list(meddra.MEDDRA_LABELS.values()),
+            ),
+            cfg["MedDRA"]["DELTA"]["LOAD_SCRIPT"],
+            description="load script",
+        )
+    if meddra_term_pools:
+        meddra_term_files = {
+            meddra_type: (pool.output_file, pool.load_schema())
+            for meddra_type, pool in meddra_term_pools.items()
+        }
+        for script_name, script in load_scripts.meddra_term_scripts(
+            meddra_term_files, script_name=cfg["MedDRA"]["TERM_LOAD_SCRIPT"]
+        ).items():
+            output_manager.write_text(script, script_name, description="load script")
+    output_manager.write_report(
+        term_resolution.unresolved_report(),
+        cfg["MedDRA"]["UNRESOLVED_TERMS_FILENAME"],
+        description="unresolved MedDRA terms",
+    )
+
+    memory_report_df = dtype_plan.memory_report()
+    if not memory_report_df.empty:
+        logger.info(f"Frame memory (MB):\n{memory_report_df.to_string(index=False)}")
 
     if output_path:
         logger.info(f"Output ready in local folder: {output_path}")
@@ -667,6 +891,19 @@ if __name__ == "__main__":
         help="Path to local folder containing MedDRA files.",
     )
 
+    parser.add_argument(
+        "--meddra_diff_from",
+        default=None,
+        help="Previous MedDRA version (e.g. v23.1), write MedDRA delta files from it in place of full MedDRA files",
+        metavar="vNN.N",
+    )
+
+    parser.add_argument(
+        "--previous_meddra_folder_path",
+        default=None,
+        help="Path to local folder containing MedDRA files of the --meddra_diff_from version.",
+    )
+
     parser.add_argument(
         "--vaers_combined",
         help="Use single VAERS archive labeled with this date, given as YYYY-MM-DD (e.g. 2021-10-18)",
@@ -828,6 +1065,8 @@ if __name__ == "__main__":
             or cfg["S3_Locations"]["S3_OUTPUT_BUCKET"],
             output_key=parsed_args.output_key or cfg["S3_Locations"]["S3_OUTPUT_KEY"],
             output_data_version=parsed_args.output_data_version,
+            previous_meddra_version=parsed_args.meddra_diff_from,
+            previous_meddra_folder_path=parsed_args.previous_meddra_folder_path,
             cfg=cfg,
         )
     except Exception as x:
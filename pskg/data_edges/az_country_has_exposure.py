@@ -86,6 +86,8 @@ class AZCountryHasExposure(country_has_exposure.CountryHasExposure):
 
         final_df = result_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logging.info(f"{len(final_df)} written.")
@@ -38,12 +38,12 @@ class AZVaccineHasExposure(vaccine_has_exposure.VaccineHasExposure):
 
         df["drug"] = "VAXZEVRIA"
         df["Manufacturer"] = "AstraZeneca"
-        df["VaccineId"] = df.apply(
-            idm.get_vaccine_id, data_source=self.data_source, axis=1
-        )
+        df["VaccineId"] = idm.get_vaccine_ids(df, data_source=self.data_source)
 
         final_df = df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} written.")
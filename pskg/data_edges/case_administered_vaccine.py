@@ -2,20 +2,45 @@
 ### Class Defining CaseAdministeredVaccine.tsv
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class CaseAdministeredVaccine(utils.Generator):
-    _output_columns = [
-        "CaseId",
-        "VaccineId",
-        "VaccineDate",
-        "VaccineLot",
-        "VaccineRoute",
-        "VaccineSite",
-        "Indication",
-        "Characterization",
-        "Dosage",
-        "Units",
-        "Duration",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("CaseId"),
+            schema.Column("VaccineId"),
+            schema.Column("VaccineDate", "datetime"),
+            schema.Column("VaccineLot"),
+            schema.Column("VaccineRoute"),
+            schema.Column("VaccineSite"),
+            schema.Column("Indication"),
+            schema.Column("IndicationMeddraId"),
+            schema.Column("Characterization"),
+            schema.Column("Dosage"),
+            schema.Column("Units"),
+            schema.Column("Duration", "float", positive=True),
+        ],
+        merges=[
+            schema.Relationship(
+                "ADMINISTERED",
+                start=schema.Endpoint("Case", "CaseId"),
+                end=schema.Endpoint("Vaccine", "VaccineId"),
+                properties=[
+                    "VaccineDate",
+                    "VaccineLot",
+                    "VaccineRoute",
+                    "VaccineSite",
+                    "Dosage",
+                    "Duration",
+                    "Characterization",
+                ],
+            ),
+            schema.Relationship(
+                "VACCINATED_FOR_INDICATION",
+                start=schema.Endpoint("Case", "CaseId"),
+                end=schema.Endpoint("MeddraPT", "MeddraId", "IndicationMeddraId"),
+            ),
+        ],
+    )
+    _output_columns = _schema.column_names
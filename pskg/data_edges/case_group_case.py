@@ -6,13 +6,23 @@ import logging
 from pathlib import Path
 
 from pandas.io.formats.format import set_eng_float_format
-from graph_objects import utils
-from data_prep import eudravigilance as eu
+from graph_objects import schema, utils
+from data_prep import eudravigilance as eu, ids
 from data_nodes.case_group import EudraVigilanceCaseGroup
 
 
 class CaseGroup(utils.Generator):
-    _output_columns = ["CaseGroupId", "CaseId"]
+    _schema = schema.LoadSchema(
+        columns=[schema.Column("CaseGroupId"), schema.Column("CaseId")],
+        merges=[
+            schema.Relationship(
+                "CONTAINS_CASE",
+                start=schema.Endpoint("CaseGroup", "CaseGroupId"),
+                end=schema.Endpoint("Case", "CaseId"),
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
 
 
 class EudraVigilanceCaseGroupCase(CaseGroup):
@@ -94,10 +104,12 @@ class EudraVigilanceCaseGroupCase(CaseGroup):
             right_on="Name",
             how="left",
         )
-        result_df["CaseId"] = result_df.apply(eu.derive_case_id, axis=1)
+        result_df["CaseId"] = eu.derive_case_codes(result_df)
 
         final_df = result_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, sep="\t", index=False, header=None, mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, sep="\t", index=False, header=None, mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
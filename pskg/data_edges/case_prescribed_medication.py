@@ -2,20 +2,46 @@
 ### Prescribed medication
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class CasePrescribedMedication(utils.Generator):
-    _output_columns = [
-        "CaseId",
-        "MedicationId",
-        "StartDate",
-        "StopDate",
-        "Duration",
-        "Dosage",
-        "Units",
-        "Route",
-        "Indication",
-        "Evidence",
-        "Characterization",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("CaseId"),
+            schema.Column("MedicationId"),
+            schema.Column("StartDate", "datetime"),
+            schema.Column("StopDate", "datetime"),
+            schema.Column("Duration", "float", positive=True),
+            schema.Column("Dosage", "float"),
+            schema.Column("Units"),
+            schema.Column("Route"),
+            schema.Column("Indication"),
+            schema.Column("IndicationMeddraId"),
+            schema.Column("Evidence"),
+            schema.Column("Characterization"),
+        ],
+        merges=[
+            schema.Relationship(
+                "PRESCRIBED",
+                start=schema.Endpoint("Case", "CaseId"),
+                end=schema.Endpoint("Medication", "MedicationId"),
+                properties=[
+                    "StartDate",
+                    "StopDate",
+                    "Route",
+                    "Duration",
+                    "Dosage",
+                    "Units",
+                    "Evidence",
+                    "Characterization",
+                ],
+            ),
+            schema.Relationship(
+                "MEDICATED_FOR_INDICATION",
+                start=schema.Endpoint("Case", "CaseId"),
+                end=schema.Endpoint("MeddraPT", "MeddraId", "IndicationMeddraId"),
+            ),
+        ],
+    )
+    _output_columns = _schema.column_names
@@ -2,8 +2,25 @@
 ### Class Defining CaseReportedAEMeddraTerm.tsv
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class CaseReportedAEMeddraTerm(utils.Generator):
-    _output_columns = ["CaseId", "MeddraTerm", "OnsetDate", "LengthInDays"]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("CaseId"),
+            schema.Column("MeddraTerm"),
+            schema.Column("MeddraId"),
+            schema.Column("OnsetDate", "datetime"),
+            schema.Column("LengthInDays", "integer"),
+        ],
+        merges=[
+            schema.Relationship(
+                "REPORTED_AE",
+                start=schema.Endpoint("Case", "CaseId"),
+                end=schema.Endpoint("MeddraPT", "MeddraId"),
+                properties=["OnsetDate", "LengthInDays"],
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
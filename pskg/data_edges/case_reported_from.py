@@ -2,8 +2,23 @@
 ### Class Defining CaseReportedFrom.tsv
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class CaseReportedFrom(utils.Generator):
-    _output_columns = ["CaseId", "Country", "SubRegion"]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("CaseId"),
+            schema.Column("Country"),
+            schema.Column("SubRegion"),
+        ],
+        merges=[
+            schema.Relationship(
+                "REPORTED_FROM",
+                start=schema.Endpoint("Case", "CaseId"),
+                end=schema.Endpoint("Country", "CountryCode", "Country"),
+                properties=["SubRegion"],
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
@@ -42,6 +42,8 @@ class CDCCountryHasExposure(country_has_exposure.CountryHasExposure):
         df["CountryCode"] = self.country_code
 
         final_df = df[self._output_columns].drop_duplicates()
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} written.")
@@ -37,16 +37,17 @@ class CDCVaccineHasExposure(vaccine_has_exposure.VaccineHasExposure):
 
         self.manifest_data.append(self.get_manifest_data(df=df))
 
-        df["VaccineId"] = df.apply(
-            idm.get_vaccine_id,
+        df["VaccineId"] = idm.get_vaccine_ids(
+            df,
             data_source=self.data_source,
             drug_column="VAX_NAME",
             manufacturer_column="VAX_NAME",
-            axis=1,
         )
-        df["ExposureId"] = df.apply(cdc.derive_exposure_id, axis=1)
+        df["ExposureId"] = cdc.derive_exposure_ids(df)
 
         final_df = df[self._output_columns].drop_duplicates()
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} written.")
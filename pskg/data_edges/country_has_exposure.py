@@ -2,8 +2,18 @@
 ### Class Defining CountryHasExposure.tsv
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class CountryHasExposure(utils.Generator):
-    _output_columns = ["ExposureId", "CountryCode"]
+    _schema = schema.LoadSchema(
+        columns=[schema.Column("ExposureId"), schema.Column("CountryCode")],
+        merges=[
+            schema.Relationship(
+                "HAS",
+                start=schema.Endpoint("Country", "CountryCode"),
+                end=schema.Endpoint("ExposureData", "ExposureId"),
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
@@ -3,8 +3,8 @@ import logging
 import numpy as np
 
 from data_nodes.eu_drug import EudraVigilanceHelper
-from data_prep import eudravigilance as eu
-from data_prep import id_management as idm
+from data_prep import eudravigilance as eu, ids, term_resolution
+from data_prep import normalize
 from . import case_administered_vaccine
 
 
@@ -47,6 +47,7 @@ class EudraVigilanceAdministeredVaccine(
         self.ev_source = ev_source
         if self.ev_source == "Public":
             self.case_id_column_name = "EU Local Number"
+        self.expect_drug_mentions(ev_source=self.ev_source)
 
     def write_objects(self, output_stream):
 
@@ -69,10 +70,6 @@ class EudraVigilanceAdministeredVaccine(
         )
 
         if not eu_suspect_med_df.empty:
-            eu_suspect_med_df["VaccineId"] = eu_suspect_med_df.apply(
-                idm.get_vaccine_id, data_source=self.data_source, axis=1
-            )
-
             eu_suspect_med_df["VaccineDate"] = ""
             eu_suspect_med_df["VaccineLot"] = ""
 
@@ -81,8 +78,8 @@ class EudraVigilanceAdministeredVaccine(
             )
             eu_suspect_med_df["VaccineSite"] = ""
             eu_suspect_med_df["VaccineRoute"] = eu_suspect_med_df["route"]
-            eu_suspect_med_df["Duration"] = eu_suspect_med_df["duration"].apply(
-                eu.convert_duration_to_days
+            eu_suspect_med_df["Duration"] = normalize.apply_unique(
+                eu_suspect_med_df["duration"], eu.convert_duration_to_days
             )
             eu_suspect_med_df["Characterization"] = np.where(
                 eu_suspect_med_df["characterization"].fillna("") == "",
@@ -92,9 +89,15 @@ class EudraVigilanceAdministeredVaccine(
                 ),
             )
 
+            eu_suspect_med_df["IndicationMeddraId"] = term_resolution.resolve_terms(
+                eu_suspect_med_df["Indication"],
+                data_source=self.data_source,
+                field="VaccinatedForIndication",
+            )
+
             suspect_final_df = eu_suspect_med_df[self._output_columns].drop_duplicates()
             if not suspect_final_df.empty:
-                suspect_final_df.to_csv(
+                self.format_output(ids.format_id_columns(suspect_final_df)).to_csv(
                     output_stream, header=None, index=False, sep="\t", mode="a"
                 )
 
@@ -103,10 +106,6 @@ class EudraVigilanceAdministeredVaccine(
             self.logger.warning(f"No suspect vaccines found in {self.source_url}.")
 
         if not eu_concom_med_df.empty:
-            eu_concom_med_df["VaccineId"] = eu_concom_med_df.apply(
-                idm.get_vaccine_id, data_source=self.data_source, axis=1
-            )
-
             eu_concom_med_df["VaccineDate"] = ""
             eu_concom_med_df["VaccineLot"] = ""
 
@@ -115,8 +114,8 @@ class EudraVigilanceAdministeredVaccine(
             )
 
             eu_concom_med_df["VaccineSite"] = ""
-            eu_concom_med_df["Duration"] = eu_concom_med_df["duration"].apply(
-                eu.convert_duration_to_days
+            eu_concom_med_df["Duration"] = normalize.apply_unique(
+                eu_concom_med_df["duration"], eu.convert_duration_to_days
             )
             eu_concom_med_df["VaccineRoute"] = eu_concom_med_df["route"]
             eu_concom_med_df["Characterization"] = np.where(
@@ -127,9 +126,15 @@ class EudraVigilanceAdministeredVaccine(
                 ),
             )
 
+            eu_concom_med_df["IndicationMeddraId"] = term_resolution.resolve_terms(
+                eu_concom_med_df["Indication"],
+                data_source=self.data_source,
+                field="VaccinatedForIndication",
+            )
+
             concom_final_df = eu_concom_med_df[self._output_columns].drop_duplicates()
             if not concom_final_df.empty:
-                concom_final_df.to_csv(
+                self.format_output(ids.format_id_columns(concom_final_df)).to_csv(
                     output_stream, header=None, index=False, sep="\t", mode="a"
                 )
 
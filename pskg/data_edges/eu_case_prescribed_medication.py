@@ -7,8 +7,8 @@ import logging
 import numpy as np
 
 from data_nodes.eu_drug import EudraVigilanceHelper
-from data_prep import eudravigilance as eu
-from data_prep import id_management as idm
+from data_prep import eudravigilance as eu, ids, term_resolution
+from data_prep import normalize
 from . import case_prescribed_medication
 
 
@@ -40,6 +40,7 @@ class EudraVigilanceCasePrescribedMedication(
         )
         self.logger.info(f"Created {self}")
         self.ev_source = ev_source
+        self.expect_drug_mentions(ev_source=self.ev_source)
 
     def write_objects(self, output_stream):
         """
@@ -68,14 +69,11 @@ class EudraVigilanceCasePrescribedMedication(
         )
 
         if not eu_concom_med_df.empty:
-            eu_concom_med_df["MedicationId"] = eu_concom_med_df.apply(
-                idm.get_medication_id, data_source=self.data_source, axis=1
-            )
             eu_concom_med_df["Evidence"] = ""
             eu_concom_med_df["StartDate"] = ""
             eu_concom_med_df["StopDate"] = ""
-            eu_concom_med_df["Duration"] = eu_concom_med_df["duration"].apply(
-                eu.convert_duration_to_days
+            eu_concom_med_df["Duration"] = normalize.apply_unique(
+                eu_concom_med_df["duration"], eu.convert_duration_to_days
             )
 
             eu_concom_med_df["Characterization"] = np.where(
@@ -91,9 +89,15 @@ class EudraVigilanceCasePrescribedMedication(
             )
             eu_concom_med_df["Route"] = eu_concom_med_df["route"]
 
+            eu_concom_med_df["IndicationMeddraId"] = term_resolution.resolve_terms(
+                eu_concom_med_df["Indication"],
+                data_source=self.data_source,
+                field="MedicatedForIndication",
+            )
+
             concom_final_df = eu_concom_med_df[self._output_columns].drop_duplicates()
             if not concom_final_df.empty:
-                concom_final_df.to_csv(
+                self.format_output(ids.format_id_columns(concom_final_df)).to_csv(
                     output_stream, header=False, index=False, sep="\t", mode="a"
                 )
 
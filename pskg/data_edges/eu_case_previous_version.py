@@ -0,0 +1,120 @@
+###
+### Link EudraVigilance case versions
+###
+
+import logging
+
+from data_prep import eudravigilance as eu, ids
+from graph_objects import schema, utils
+
+
+class EudraVigilanceCasePreviousVersion(utils.Generator):
+    """
+    Links each version of an updated EudraVigilance case to the version before it.
+    Versions are ordered across all EV files read by EudraVigilanceCase in this run.
+    """
+
+    _schema = schema.LoadSchema(
+        columns=[schema.Column("CaseId"), schema.Column("PreviousCaseId")],
+        merges=[
+            schema.Relationship(
+                "PREVIOUS_VERSION",
+                start=schema.Endpoint("Case", "CaseId"),
+                end=schema.Endpoint("Case", "CaseId", "PreviousCaseId"),
+                end_properties={"Current": "false"},
+            )
+        ],
+        comment=(
+            "Some data sources, such as EudraVigilance, include the concept of updated "
+            "cases.\nThe import process orders the versions of each case, writes the "
+            "Current flag of\neach version to Case.tsv, and links each version to the "
+            "one before it.  Versions\nmay span source files, so every version with a "
+            "later version is also marked as\nnot current here."
+        ),
+    )
+    _output_columns = _schema.column_names
+    data_source = "EUDRAVIGILANCE"
+
+    eu_raw_id_column = "Worldwide Unique Case Identification"
+    eu_gateway_date = "EV Gateway Receipt Date"
+
+    def __init__(
+        self, data_set_tag, s3_bucket=None, s3_key=None, file_path=None, ev_source=None
+    ):
+        """
+        Create a new EudraVigilance case version link object.  Either an s3_bucket and
+        s3_key are required, or a file_path.
+
+        Parameters
+        data_set_tag:   str
+            Data set
+        s3_bucket: str, optional
+        s3_key: str, optional
+            key within s3_bucket to data zip file
+        file_path: str, optional
+            Path to local eudravigilance data file
+        ev_source: str
+            EudraVigilance data source: "Public" or "EVDAS"; configured in config.yml.
+            If data source is Public "Worldwide Unique Case Identification" is replaced
+            with "EU Local Number"
+        """
+        super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=file_path)
+        self.data_set_tag = data_set_tag
+        self.ev_source = ev_source
+        if self.ev_source == "Public":
+            self.eu_raw_id_column = "EU Local Number"
+        self.logger = logging.getLogger("pskg_loader.EudraVigilanceCasePreviousVersion")
+        self.logger.info(f"Created {self}")
+
+    def write_objects(self, output_stream):
+        """
+        Construct case version links and write them to an existing open output_stream.
+        Caller is responsible for creating the output stream and eventually closing it.
+
+        Parameters
+        ----------
+        output_stream: object
+            Open stream for output, data will be appended to this stream
+
+        Returns
+        -------
+        None
+        """
+        self.manifest_data = []
+
+        source = (self.s3_bucket, self.s3_key, str(self.file_path))
+        file_versions_df = eu.registered_case_versions(source)
+        if file_versions_df is None:
+            # Cases of this file were not written in this run
+            eu_case_df = eu.raw_load(
+                input_bucket=self.s3_bucket,
+                input_key=self.s3_key,
+                file_path=self.file_path,
+                columns=[self.eu_raw_id_column, self.eu_gateway_date],
+            )
+            eu_case_df["CaseId"] = eu.derive_case_codes(
+                eu_case_df, native_id_column=self.eu_raw_id_column
+            )
+            eu_case_df["SourceCaseId"] = eu_case_df[self.eu_raw_id_column]
+            file_versions_df = eu.rank_case_versions(eu_case_df)
+            eu.register_case_versions(source, file_versions_df)
+
+        self.manifest_data.append(
+            self.get_manifest_data(rows=len(file_versions_df), tag=self.data_set_tag)
+        )
+
+        # Previous versions may come from other files
+        links_df = eu.link_case_versions(eu.registered_case_versions())
+        final_df = links_df[
+            links_df["CaseId"].isin(file_versions_df["CaseId"])
+        ].drop_duplicates()
+
+        if not final_df.empty:
+            final_df = ids.format_id_columns(final_df).assign(
+                PreviousCaseId=ids.CASE_IDS.format(final_df["PreviousCaseId"])
+            )
+            self.format_output(final_df[self._output_columns]).to_csv(
+                output_stream, index=False, header=False, sep="\t", mode="a"
+            )
+
+        self.logger.info(f"{len(final_df)} rows written.")
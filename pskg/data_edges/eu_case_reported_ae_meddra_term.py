@@ -5,7 +5,7 @@
 import pandas as pd
 import logging
 from . import case_reported_ae_meddra_term
-from data_prep import eudravigilance as eu
+from data_prep import eudravigilance as eu, ids, term_resolution
 from data_prep.meddra import generate_type_meddra_id
 
 
@@ -89,35 +89,33 @@ class EudraVigilanceCaseReportedAEMeddraTerm(
 
         self.manifest_data.append(self.get_manifest_data(df=eu_df))
 
-        # Get CaseID, and turn AEs into a list, and then split that list into usable components
-        eu_df["CaseId"] = eu_df.apply(eu.derive_case_id, native_id_column=self.case_id_column_name, axis=1)
-        eu_df["reaction_list_pt"] = eu_df[self.reaction_column_name].apply(
-            eu.ev_split_break
+        # Get CaseID, and turn AEs into a list array, and then split that into usable components
+        eu_df["CaseId"] = eu.derive_case_codes(
+            eu_df, native_id_column=self.case_id_column_name
         )
-
-        eu_df[
-            ["terms_list", "duration_list", "outcome_list", "seriousness_criteria_list"]
-        ] = eu_df[["reaction_list_pt"]].apply(
-            lambda x: eu.ev_extract_term(x["reaction_list_pt"]), axis=1
+        reaction_terms = eu.ev_extract_term_arrays(
+            eu.ev_split_break_array(eu_df[self.reaction_column_name])
         )
 
-        result = {"CaseId": [], "MeddraTerm": [], "LengthInDays": []}
-        for _, row in eu_df.iterrows():
-            for m, d in list(zip(row["terms_list"], row["duration_list"])):
-                result["CaseId"].append(row["CaseId"])
-                result["MeddraTerm"].append(m)
-                result["LengthInDays"].append(eu.convert_duration_to_days(d))
-
-        eu_all_ae_df = pd.DataFrame.from_dict(result)
-
-        # Explode to:
-        # CaseId | terms_list
-        # id     | term:duration
+        eu_all_ae_df = eu.explode_list_array(
+            reaction_terms["terms_list"], eu_df["CaseId"], value_name="MeddraTerm"
+        )
+        durations = eu.explode_list_array(
+            reaction_terms["duration_list"], eu_df["CaseId"], value_name="duration"
+        )["duration"]
+        eu_all_ae_df["LengthInDays"] = [
+            eu.convert_duration_to_days(d) for d in durations
+        ]
 
         eu_all_ae_df["OnsetDate"] = ""
+        eu_all_ae_df["MeddraId"] = term_resolution.resolve_terms(
+            eu_all_ae_df["MeddraTerm"], data_source=self.data_source, field="ReportedAE"
+        )
 
         final_df = eu_all_ae_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, sep="\t", header=False, mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, index=False, sep="\t", header=False, mode="a"
+        )
 
         self.logger.info(f"{len(eu_all_ae_df)} written.")
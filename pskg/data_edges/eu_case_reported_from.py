@@ -6,7 +6,7 @@ import logging
 from data_prep.outcomes import OutcomeMapper
 
 from . import case_reported_from
-from data_prep import eudravigilance as eu
+from data_prep import eudravigilance as eu, ids
 from data_prep.meddra import generate_type_meddra_id
 
 
@@ -74,11 +74,15 @@ class EudraVigilanceCaseReportedFrom(case_reported_from.CaseReportedFrom):
         )
 
         # Get CaseID, and turn AEs into a list, and then split that list into usable components
-        eu_df["CaseId"] = eu_df.apply(eu.derive_case_id,  native_id_column=self.case_id_column_name, axis=1)
+        eu_df["CaseId"] = eu.derive_case_codes(
+            eu_df, native_id_column=self.case_id_column_name
+        )
         eu_df["Country"] = eu_df[self.case_id_column_name].apply(eu.derive_country)
         eu_df["SubRegion"] = ""
 
         final_df = eu_df[self._output_columns].drop_duplicates()
-        final_df.to_csv(output_stream, header=False, index=False, sep="\t", mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, header=False, index=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} written.")
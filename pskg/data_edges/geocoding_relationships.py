@@ -2,14 +2,24 @@
 ### Class Defining CountryHasExposure.tsv
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 from data_prep import geocoding
 import numpy as np
 import logging
 
 
 class CountryInContinent(utils.Generator):
-    _output_columns = ["CountryCode", "ContinentCode"]
+    _schema = schema.LoadSchema(
+        columns=[schema.Column("CountryCode"), schema.Column("ContinentCode")],
+        merges=[
+            schema.Relationship(
+                "IN",
+                start=schema.Endpoint("Country", "CountryCode"),
+                end=schema.Endpoint("Continent", "ContinentCode"),
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
 
     data_tag = "static-country-incontinent-geocoding"
 
@@ -52,6 +62,8 @@ class CountryInContinent(utils.Generator):
             .dropna(axis=0, how="any")
         )
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
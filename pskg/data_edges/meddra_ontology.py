@@ -5,8 +5,11 @@
 import logging
 from pathlib import Path
 
-from data_prep import meddra as raw_meddra
-from graph_objects import utils
+import pandas as pd
+
+from data_nodes.meddra import MEDDRA_LABELS
+from data_prep import meddra as raw_meddra, meddra_dictionary, meddra_hierarchy
+from graph_objects import schema, utils
 
 
 class MeddraOntology(utils.Generator):
@@ -14,7 +17,31 @@ class MeddraOntology(utils.Generator):
     to_col = "MeddraIdTo"
     primary = "PrimarySoc"
 
-    _output_columns = [from_col, to_col, primary]
+    # Each level is linked by its own statement, rows of other levels match no nodes
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column(from_col),
+            schema.Column(to_col),
+            schema.Column(primary),
+        ],
+        merges=[
+            schema.Relationship(
+                "MEDDRA_LINK",
+                start=schema.Endpoint(
+                    MEDDRA_LABELS[from_type], "MeddraId", "MeddraIdFrom"
+                ),
+                end=schema.Endpoint(MEDDRA_LABELS[to_type], "MeddraId", "MeddraIdTo"),
+                properties=["PrimarySoc"] if from_type == "PT" else None,
+            )
+            for from_type, to_type in [
+                ("LLT", "PT"),
+                ("PT", "HLT"),
+                ("HLT", "HLGT"),
+                ("HLGT", "SOC"),
+            ]
+        ],
+    )
+    _output_columns = _schema.column_names
 
     def __init__(
         self,
@@ -24,8 +51,15 @@ class MeddraOntology(utils.Generator):
         mdhier_file="mdhier.asc",
         llt_file="llt.asc",
         release_file="meddra_release.asc",
+        meddra_version=None,
     ):
         super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=folder_path)
+        self.meddra_version = meddra_version
+        self.meddra_files = {
+            "mdhier": mdhier_file,
+            "llt": llt_file,
+            "meddra_release": release_file,
+        }
 
         if folder_path:
             if isinstance(folder_path, str):
@@ -70,112 +104,115 @@ class MeddraOntology(utils.Generator):
         None
         """
 
-        # Hierarchy file contains all PT, HLT, HLGT, and SOC terms,
-        # so read it in here.
-        mdhier_df = raw_meddra.read_raw(
-            input_bucket=self.s3_bucket,
-            input_key=self.mdhier_s3_key,
-            file_path=self.mdhier_path,
-            meddra_file_type="mdhier",
+        # Hierarchy file links PTs, HLTs, HLGTs and SOCs, llt file links LLTs to PTs
+        hierarchy = meddra_hierarchy.load_hierarchy(
+            version=self.meddra_version,
+            s3_bucket=self.s3_bucket,
+            s3_key=self.s3_key,
+            folder_path=self.file_path,
+            files=self.meddra_files,
         )
 
         self.manifest_data.append(
             self.get_manifest_data(
-                df=mdhier_df,
+                rows=hierarchy.row_counts["mdhier"],
                 s3_bucket=self.s3_bucket,
                 s3_key=self.mdhier_s3_key,
                 file_path=self.mdhier_path,
             )
         )
 
-        # Set up id columns
-        mdhier_df["PT"] = mdhier_df.apply(
-            raw_meddra.generate_meddra_id,
-            meddra_type="PT",
-            meddra_code_column="pt_code",
-            axis=1,
-        )
-        mdhier_df["HLT"] = mdhier_df.apply(
-            raw_meddra.generate_meddra_id,
-            meddra_type="HLT",
-            meddra_code_column="hlt_code",
-            axis=1,
-        )
-        mdhier_df["HLGT"] = mdhier_df.apply(
-            raw_meddra.generate_meddra_id,
-            meddra_type="HLGT",
-            meddra_code_column="hlgt_code",
-            axis=1,
-        )
-        mdhier_df["SOC"] = mdhier_df.apply(
-            raw_meddra.generate_meddra_id,
-            meddra_type="SOC",
-            meddra_code_column="soc_code",
-            axis=1,
-        )
-        mdhier_df["BLANK"] = ""
-
-        # This file links LLTs to PTs
-        llt_df = raw_meddra.read_raw(
-            input_bucket=self.s3_bucket,
-            input_key=self.llt_s3_key,
-            file_path=self.llt_path,
-            meddra_file_type="llt",
-        )
-
         self.manifest_data.append(
             self.get_manifest_data(
-                df=llt_df,
+                rows=hierarchy.row_counts["llt"],
                 s3_bucket=self.s3_bucket,
                 s3_key=self.llt_s3_key,
                 file_path=self.llt_path,
             )
         )
 
-        # Link LLTs to PTs
-        llt_df[self.from_col] = llt_df.apply(
-            raw_meddra.generate_meddra_id,
-            meddra_type="LLT",
-            meddra_code_column="llt_code",
-            axis=1,
-        )
-        llt_df[self.to_col] = llt_df.apply(
-            raw_meddra.generate_meddra_id,
-            meddra_type="PT",
-            meddra_code_column="pt_code",
-            axis=1,
+        links_df = self.get_links_df(hierarchy)
+        self.format_output(links_df[self._output_columns]).to_csv(
+            output_stream, sep="\t", index=False, header=False, mode="a"
         )
-        llt_df[self.primary] = ""
-
-        tmp_df = llt_df[self._output_columns].drop_duplicates()
-        tmp_df.to_csv(output_stream, sep="\t", index=False, header=False, mode="a")
-        self.logger.info(f"{len(tmp_df)} LLTs to PTs written.")
-
-        pt_hlt_df = mdhier_df[["PT", "HLT", "primary_soc_fg"]].drop_duplicates()
-        pt_hlt_df.to_csv(output_stream, sep="\t", index=False, header=False, mode="a")
-        self.logger.info(f"{len(pt_hlt_df)} PTs to HLTs written.")
+        for (from_type, to_type), count in (
+            links_df.groupby(["MeddraTypeFrom", "MeddraTypeTo"], sort=False)
+            .size()
+            .items()
+        ):
+            self.logger.info(f"{count} {from_type}s to {to_type}s written.")
+
+    def get_links_df(self, hierarchy):
+        """
+        Assemble links between adjacent MedDRA levels for output
 
-        hlt_hlgt_df = mdhier_df[["HLT", "HLGT", "BLANK"]].drop_duplicates()
-        hlt_hlgt_df.to_csv(output_stream, sep="\t", header=False, index=False, mode="a")
-        self.logger.info(f"{len(hlt_hlgt_df)} HLTs written.")
+        Parameters
+        ----------
+        hierarchy: meddra_hierarchy.MeddraHierarchy
+            MedDRA hierarchy index
 
-        hlgt_soc_df = mdhier_df[["HLGT", "SOC", "BLANK"]].drop_duplicates()
-        hlgt_soc_df.to_csv(output_stream, sep="\t", header=False, index=False, mode="a")
-        self.logger.info(f"{len(hlgt_soc_df)} HLTs written.")
+        Returns
+        -------
+        pd.DataFrame
+            Links in output format, with MeddraTypeFrom and MeddraTypeTo columns
+        """
+        links = []
+        levels = meddra_hierarchy.LEVELS
+        for from_type, to_type in zip(levels, levels[1:]):
+            links_df = hierarchy.link_table(from_type, to_type)
+            links_df[self.from_col] = raw_meddra.generate_meddra_ids(
+                links_df["MeddraCodeFrom"], meddra_type=from_type
+            )
+            links_df[self.to_col] = raw_meddra.generate_meddra_ids(
+                links_df["MeddraCodeTo"], meddra_type=to_type
+            )
+            links_df[self.primary] = links_df["PrimarySoc"]
+            links_df["MeddraTypeFrom"] = from_type
+            links_df["MeddraTypeTo"] = to_type
+            links.append(
+                links_df[self._output_columns + ["MeddraTypeFrom", "MeddraTypeTo"]]
+            )
+        return pd.concat(links, ignore_index=True)
 
 
 class MeddraSMQContainsTerm(utils.Generator):
-    _output_columns = [
-        "MeddraSmqCode",
-        "MeddraId",
-        "TermLevel",
-        "Scope",
-        "Category",
-        "Weight",
-        "Status",
-        "AdditionVersion",
-        "LastModifiedVersion",
-    ]
+    # SMQs contain PTs (by MeddraId), or in SMQ mode other SMQs (by code)
+    _schemas = {
+        smq: schema.LoadSchema(
+            columns=[
+                schema.Column("MeddraSmqCode", "integer"),
+                schema.Column("MeddraId", "integer" if smq else "string"),
+                schema.Column("TermLevel", "integer"),
+                schema.Column("Scope"),
+                schema.Column("Category"),
+                schema.Column("Weight", "float"),
+                schema.Column("Status"),
+                schema.Column("AdditionVersion"),
+                schema.Column("LastModifiedVersion"),
+            ],
+            merges=[
+                schema.Relationship(
+                    "MEDDRA_SMQ_CONTAINS",
+                    start=schema.Endpoint("MeddraSmq", "MeddraSmqCode"),
+                    end=(
+                        schema.Endpoint("MeddraSmq", "MeddraSmqCode", "MeddraId")
+                        if smq
+                        else schema.Endpoint("MeddraPT", "MeddraId")
+                    ),
+                    properties=[
+                        "Scope",
+                        "Status",
+                        "Category",
+                        "Weight",
+                        "AdditionVersion",
+                        "LastModifiedVersion",
+                    ],
+                )
+            ],
+        )
+        for smq in [True, False]
+    }
+    _output_columns = _schemas[False].column_names
 
     _term_map = {
         "smq_code": "MeddraSmqCode",
@@ -196,9 +233,12 @@ class MeddraSMQContainsTerm(utils.Generator):
         s3_key=None,
         folder_path=None,
         smq_content="smq_content.asc",
+        meddra_version=None,
     ):
         super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=folder_path)
         self.smq = smq
+        self.meddra_version = meddra_version
+        self.meddra_files = {"smq_content": smq_content}
         if folder_path:
             if isinstance(folder_path, str):
                 folder_path = Path(folder_path)
@@ -233,41 +273,197 @@ class MeddraSMQContainsTerm(utils.Generator):
         """
         self.logger.info(f"SMQ Mode: {self.smq}")
 
-        smq_content_df = raw_meddra.read_raw(
-            input_bucket=self.s3_bucket,
-            input_key=self.smq_content_s3_key,
-            file_path=self.smq_content_path,
-            meddra_file_type="smq_content",
+        dictionary = meddra_dictionary.load_dictionary(
+            version=self.meddra_version,
+            s3_bucket=self.s3_bucket,
+            s3_key=self.s3_key,
+            folder_path=self.file_path,
+            files=self.meddra_files,
         )
-
         self.manifest_data.append(
             self.get_manifest_data(
-                df=smq_content_df,
+                df=dictionary.smq_content,
                 s3_bucket=self.s3_bucket,
                 s3_key=self.smq_content_s3_key,
                 file_path=self.smq_content_path,
             )
         )
 
+        final_df = self.get_content_df(dictionary)
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, sep="\t", header=False, mode="a"
+        )
+
+        self.logger.info(f"{len(final_df)} written.")
+
+    def load_schema(self):
+        return self._schemas[self.smq]
+
+    def get_content_df(self, dictionary, smq=None):
+        """
+        Assemble SMQ content links (SMQs to SMQs, or to terms when not in SMQ mode)
+        for output
+
+        Parameters
+        ----------
+        dictionary: meddra_dictionary.MeddraDictionary
+            Parsed MedDRA distribution
+        smq: bool, optional
+            SMQ mode, defaults to the mode of this object
+
+        Returns
+        -------
+        pd.DataFrame
+            Links in output format
+        """
+        if smq is None:
+            smq = self.smq
+
+        smq_content_df = dictionary.smq_content.copy()
         smq_content_df.columns = [
             self._term_map.get(tc) or tc for tc in smq_content_df.columns
         ]
 
-        if self.smq:
+        if smq:
             final_df = smq_content_df[smq_content_df["TermLevel"].isin([0])][
                 self._output_columns
             ].drop_duplicates()
         else:
-            smq_content_df["MeddraId"] = smq_content_df.apply(
-                raw_meddra.generate_meddra_id,
-                meddra_type="PT",
-                meddra_code_column="MeddraId",
-                axis=1,
+            smq_content_df["MeddraId"] = raw_meddra.generate_meddra_ids(
+                smq_content_df["MeddraId"], meddra_type="PT"
             )
             final_df = smq_content_df[smq_content_df["TermLevel"].isin([4, 5])][
                 self._output_columns
             ].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, sep="\t", header=False, mode="a")
+        return final_df
+
+
+class MeddraSMQClosure(utils.Generator):
+    # Links are merged per scope and category, PT and LLT links by separate statements
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("MeddraSmqCode", "integer"),
+            schema.Column("MeddraId"),
+            schema.Column("TermLevel", "integer"),
+            schema.Column("Scope"),
+            schema.Column("Category"),
+            schema.Column("Weight", "float"),
+            schema.Column("Status"),
+            schema.Column("ViaSmqCode", "integer"),
+            schema.Column("Depth", "integer"),
+        ],
+        merges=[
+            schema.Relationship(
+                "MEDDRA_SMQ_CLOSURE",
+                start=schema.Endpoint("MeddraSmq", "MeddraSmqCode"),
+                end=schema.Endpoint(MEDDRA_LABELS[meddra_type], "MeddraId"),
+                key=["Scope", "Category"],
+                properties=["Status", "Weight", "ViaSmqCode", "Depth"],
+            )
+            for meddra_type in ["PT", "LLT"]
+        ],
+    )
+    _output_columns = _schema.column_names
 
-        self.logger.info(f"{len(final_df)} written.")
+    _term_map = {
+        "smq_code": "MeddraSmqCode",
+        "term_level": "TermLevel",
+        "term_scope": "Scope",
+        "term_category": "Category",
+        "term_weight": "Weight",
+        "term_status": "Status",
+        "via_smq_code": "ViaSmqCode",
+        "depth": "Depth",
+    }
+
+    def __init__(
+        self,
+        s3_bucket=None,
+        s3_key=None,
+        folder_path=None,
+        smq_content="smq_content.asc",
+        meddra_version=None,
+    ):
+        super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=folder_path)
+        self.meddra_version = meddra_version
+        self.meddra_files = {"smq_content": smq_content}
+        if folder_path:
+            if isinstance(folder_path, str):
+                folder_path = Path(folder_path)
+
+            self.smq_content_path = folder_path / smq_content
+            self.smq_content_source_url = f"file://{self.smq_content_path.as_posix()}"
+            self.smq_content_s3_key = None
+        else:
+            base_key = f"{self.s3_key}"
+            self.smq_content_s3_key = f"{base_key}/{smq_content}"
+            self.smq_content_path = None
+            self.smq_content_source_url = (
+                f"s3://{self.s3_bucket}/{self.smq_content_s3_key}"
+            )
+
+        self.logger = logging.getLogger(f"pskg_loader.MeddraSMQClosure")
+        self.logger.info(f"Created {self}")
+
+    def write_objects(self, output_stream):
+        """
+        Construct links from every SMQ to all PTs and LLTs it contains, directly or
+        through nested SMQs, and write them to an existing open output_stream.  Caller
+        is responsible for creating the output stream and eventually closing it.
+
+        Parameters
+        ----------
+        output_stream: object
+            Open stream for output, data will be appended to this stream
+
+        Returns
+        -------
+        None
+        """
+        dictionary = meddra_dictionary.load_dictionary(
+            version=self.meddra_version,
+            s3_bucket=self.s3_bucket,
+            s3_key=self.s3_key,
+            folder_path=self.file_path,
+            files=self.meddra_files,
+        )
+
+        self.manifest_data.append(
+            self.get_manifest_data(
+                df=dictionary.smq_content,
+                s3_bucket=self.s3_bucket,
+                s3_key=self.smq_content_s3_key,
+                file_path=self.smq_content_path,
+            )
+        )
+
+        final_df = self.get_closure_df(dictionary)
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, sep="\t", header=False, mode="a"
+        )
+
+        self.logger.info(
+            f"{len(final_df)} written, nested SMQs to depth {final_df['Depth'].max()}."
+        )
+
+    def get_closure_df(self, dictionary):
+        """
+        Assemble the SMQ closure for output
+
+        Parameters
+        ----------
+        dictionary: meddra_dictionary.MeddraDictionary
+            Parsed MedDRA distribution
+
+        Returns
+        -------
+        pd.DataFrame
+            Closure links in output format
+        """
+        closure_df = meddra_hierarchy.smq_closure(dictionary.smq_content)
+        closure_df["MeddraId"] = raw_meddra.generate_smq_edge_ids(
+            closure_df["term_code"], closure_df["term_level"]
+        )
+        closure_df.columns = [self._term_map.get(c) or c for c in closure_df.columns]
+        return closure_df[self._output_columns]
@@ -3,13 +3,22 @@
 ###
 
 import logging
-from graph_objects import utils
-from data_prep import meddracq as mcqdp
-from graph_objects import utils
+from graph_objects import schema, utils
+from data_prep import meddracq_index
 
 
 class MeddraCqLink(utils.Generator):
-    _output_columns = ["Name", "PT"]
+    _schema = schema.LoadSchema(
+        columns=[schema.Column("Name"), schema.Column("PT"), schema.Column("MeddraId")],
+        merges=[
+            schema.Relationship(
+                "MEDDRA_CQ_CONTAINS",
+                start=schema.Endpoint("MeddraCq", "Name"),
+                end=schema.Endpoint("MeddraPT", "MeddraId"),
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
 
     def __init__(self, s3_bucket=None, s3_key=None, file_path=None):
         super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=file_path)
@@ -39,13 +48,19 @@ class MeddraCqLink(utils.Generator):
         -------
         None
         """
-        results = mcqdp.read_raw_links(self.file_path)
+        index = meddracq_index.load_index(self.file_path)
 
         self.manifest_data = []
-        self.manifest_data.append(self.get_manifest_data(df=results))
+        self.manifest_data.append(self.get_manifest_data(rows=index.link_rows))
 
-        final_df = results.drop_duplicates()
+        # PTs are resolved to MeddraIds against the MedDRA dictionary, PTs not in
+        # the dictionary are logged by the index and not written
+        final_df = index.links_table()[self._output_columns]
 
-        final_df.to_csv(output_stream, sep="\t", index=False, header=False, mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, sep="\t", index=False, header=False, mode="a"
+        )
 
-        self.logger.info(f"{len(final_df)} rows written.")
+        self.logger.info(
+            f"{len(final_df)} rows written ({len(index.unresolved)} unresolved)."
+        )
@@ -2,8 +2,18 @@
 ### Vaccine Exposure
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class VaccineHasExposure(utils.Generator):
-    _output_columns = ["VaccineId", "ExposureId"]
+    _schema = schema.LoadSchema(
+        columns=[schema.Column("VaccineId"), schema.Column("ExposureId")],
+        merges=[
+            schema.Relationship(
+                "HAS",
+                start=schema.Endpoint("Vaccine", "VaccineId"),
+                end=schema.Endpoint("ExposureData", "ExposureId"),
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
@@ -6,7 +6,8 @@ import logging
 
 from . import case_administered_vaccine
 
-from data_prep import id_management as idm, vaers
+from data_prep import id_management as idm, ids, vaers
+from data_prep import normalize
 
 
 class VaersCaseAdministeredVaccine(case_administered_vaccine.CaseAdministeredVaccine):
@@ -64,12 +65,14 @@ class VaersCaseAdministeredVaccine(case_administered_vaccine.CaseAdministeredVac
 
         # TODO: Refactor name resolution in favor of standards based approach (i.e.
         # use UMLS or WHO data)
-        vaers_vax_df["Manufacturer"] = vaers_vax_df["VAX_MANU"].apply(
-            vaers.standardize_manufacturer_names
+        vaers_vax_df["Manufacturer"] = normalize.apply_unique(
+            vaers_vax_df["VAX_MANU"], vaers.standardize_manufacturer_names
         )
-        vaers_vax_df["TradeName"] = vaers_vax_df["VAX_NAME"].apply(vaers.get_trade_name)
-        vaers_vax_df["GenericName"] = vaers_vax_df["VAX_NAME"].apply(
-            vaers.get_generic_name
+        vaers_vax_df["TradeName"] = normalize.apply_unique(
+            vaers_vax_df["VAX_NAME"], vaers.get_trade_name
+        )
+        vaers_vax_df["GenericName"] = normalize.apply_unique(
+            vaers_vax_df["VAX_NAME"], vaers.get_generic_name
         )
         vaers_vax_df["VaccineRoute"] = vaers_vax_df["VAX_ROUTE"]
         vaers_vax_df["VaccineSite"] = vaers_vax_df["VAX_SITE"]
@@ -82,15 +85,14 @@ class VaersCaseAdministeredVaccine(case_administered_vaccine.CaseAdministeredVac
         vaers_vax_df["Units"] = ""
         vaers_vax_df["Duration"] = ""
 
-        vaers_vax_df["VaccineId"] = vaers_vax_df.apply(
-            idm.get_vaccine_id,
+        vaers_vax_df["VaccineId"] = idm.get_vaccine_codes(
+            vaers_vax_df,
             drug_column="VAX_NAME",
             manufacturer_column="Manufacturer",
             data_source=self.data_source,
-            axis=1,
         )
 
-        vaers_vax_df["CaseId"] = vaers_vax_df.apply(vaers.derive_case_id, axis=1)
+        vaers_vax_df["CaseId"] = vaers.derive_case_codes(vaers_vax_df)
 
         # This join is necessary for VAX_DATE
         tmp_df = vaers_vax_df.merge(
@@ -99,9 +101,12 @@ class VaersCaseAdministeredVaccine(case_administered_vaccine.CaseAdministeredVac
 
         tmp_df["VaccineDate"] = tmp_df["VAX_DATE"]
         tmp_df["Indication"] = ""  # Currently this is not available in VAERS
+        tmp_df["IndicationMeddraId"] = ""
 
         final_df = tmp_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
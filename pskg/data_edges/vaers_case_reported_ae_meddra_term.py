@@ -9,7 +9,7 @@ import pandas as pd
 
 from . import case_reported_ae_meddra_term
 
-from data_prep import vaers
+from data_prep import ids, term_resolution, vaers
 from data_prep.meddra import generate_meddra_id
 
 
@@ -104,10 +104,15 @@ class VaersCaseReportedAEMeddraTerm(
             melted_df[["VAERS_ID", "MeddraTerm"]], on=["VAERS_ID"]
         )
         result_df.columns = ["VAERS_ID", "OnsetDate", "LengthInDays", "MeddraTerm"]
-        result_df["CaseId"] = result_df.apply(vaers.derive_case_id, axis=1)
+        result_df["CaseId"] = vaers.derive_case_codes(result_df)
+        result_df["MeddraId"] = term_resolution.resolve_terms(
+            result_df["MeddraTerm"], data_source="VAERS", field="ReportedAE"
+        )
 
         final_df = result_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, header=False, index=False, sep="\t", mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, header=False, index=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} written.")
@@ -7,7 +7,7 @@
 
 import logging
 from . import case_reported_from
-from data_prep import vaers
+from data_prep import ids, vaers
 
 
 class VaersCaseReportedFrom(case_reported_from.CaseReportedFrom):
@@ -72,7 +72,7 @@ class VaersCaseReportedFrom(case_reported_from.CaseReportedFrom):
         # Reset columns to:
         # | VAERS_ID | OnsetDate | LengthInDays | MeddraId
         result_df = vaers_df[["VAERS_ID", "STATE"]].copy()
-        result_df["CaseId"] = result_df.apply(vaers.derive_case_id, axis=1)
+        result_df["CaseId"] = vaers.derive_case_codes(result_df)
 
         # FYI in NonDomesticVaers state will be "FR"
         result_df["SubRegion"] = result_df["STATE"]
@@ -80,6 +80,8 @@ class VaersCaseReportedFrom(case_reported_from.CaseReportedFrom):
 
         final_df = result_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, header=False, index=False, sep="\t", mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, header=False, index=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} written.")
@@ -55,6 +55,8 @@ class AzExposure(exposure.Exposure):
 
         final_df = df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
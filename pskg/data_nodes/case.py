@@ -2,23 +2,32 @@
 ### Class Defining Case.tsv structure
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class Case(utils.Generator):
-    _output_columns = [
-        "CaseId",
-        "SourceCaseId",
-        "DataSource",
-        "Tag",
-        "ReportedDate",
-        "ReceivedDate",
-        "PatientAgeRangeMin",
-        "PatientAgeRangeMax",
-        "PatientGender",
-        "PatientOutcome",
-        "PatientRecovered",
-        "DeathDate",
-        "HospitalizationLengthInDays",
-        "ReportType",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("CaseId"),
+            schema.Column("SourceCaseId"),
+            schema.Column("DataSource"),
+            schema.Column("Tag"),
+            schema.Column("ReportedDate", "datetime"),
+            schema.Column("ReceivedDate", "datetime"),
+            schema.Column("PatientAgeRangeMin", "float"),
+            schema.Column("PatientAgeRangeMax", "float"),
+            schema.Column("PatientGender"),
+            schema.Column("PatientOutcome", "list"),
+            schema.Column("PatientRecovered", "boolean"),
+            schema.Column("DeathDate", "datetime"),
+            schema.Column("HospitalizationLengthInDays", "integer"),
+            schema.Column("ReportType"),
+            schema.Column("Current", "boolean"),
+        ],
+        merges=[schema.Node("Case", key="CaseId")],
+        indexes=[
+            schema.Index("Case", "DataSource"),
+            schema.Index("Case", "SourceCaseId"),
+        ],
+    )
+    _output_columns = _schema.column_names
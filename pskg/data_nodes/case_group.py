@@ -1,11 +1,20 @@
 from pathlib import Path
-from graph_objects import utils
+from graph_objects import schema, utils
 import pandas as pd
 import logging
 
 
 class CaseGroup(utils.Generator):
-    _output_columns = ["CaseGroupId", "Name", "Abbreviation", "Description"]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("CaseGroupId"),
+            schema.Column("Name"),
+            schema.Column("Abbreviation"),
+            schema.Column("Description"),
+        ],
+        merges=[schema.Node("CaseGroup", key="CaseGroupId")],
+    )
+    _output_columns = _schema.column_names
 
 
 ###
@@ -43,7 +52,7 @@ class EudraVigilanceCaseGroup(CaseGroup):
         self.logger = logging.getLogger(f"pskg_loader.EV Case Groups({self.data_tag})")
 
     def write_objects(self, output_stream):
-        self.case_group_df.to_csv(
+        self.format_output(self.case_group_df).to_csv(
             output_stream, index=False, header=False, sep="\t", mode="a"
         )
 
@@ -53,7 +53,7 @@ class CDCExposure(exposure.Exposure):
 
         self.manifest_data.append(self.get_manifest_data(df=df, tag=self.data_tag))
 
-        df["ExposureId"] = df.apply(cdc.derive_exposure_id, axis=1)
+        df["ExposureId"] = cdc.derive_exposure_ids(df)
         df["StartDate"] = df["Date"] - timedelta(days=1)
         df["EndDate"] = df["Date"]
         df["Count"] = df["Total_Administered"]
@@ -68,6 +68,8 @@ class CDCExposure(exposure.Exposure):
 
         final_df = df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} written.")
@@ -2,29 +2,64 @@
 ### Class Defining Vaccine.tsv and Medication.tsv
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class Medication(utils.Generator):
-    _output_columns = [
-        "MedicationId",
-        "TradeName",
-        "GenericName",
-        "OriginalName",
-        "Manufacturer",
-        "RxNormCui",
-        "Description",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("MedicationId"),
+            schema.Column("TradeName"),
+            schema.Column("GenericName"),
+            schema.Column("OriginalName"),
+            schema.Column("Manufacturer"),
+            schema.Column("RxNormCui"),
+            schema.Column("Description"),
+        ],
+        merges=[
+            schema.Node(
+                "Medication",
+                key="MedicationId",
+                properties=["RxNormCui", "GenericName", "TradeName", "Description"],
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
 
 
 class Vaccine(utils.Generator):
-    _output_columns = [
-        "VaccineId",
-        "VaxType",
-        "TradeName",
-        "GenericName",
-        "OriginalName",
-        "Manufacturer",
-        "RxNormCui",
-        "Description",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("VaccineId"),
+            schema.Column("VaxType", trim=True),
+            schema.Column("TradeName", trim=True),
+            schema.Column("GenericName", trim=True),
+            schema.Column("OriginalName"),
+            schema.Column("Manufacturer", trim=True),
+            schema.Column("RxNormCui", trim=True),
+            schema.Column("Description", trim=True),
+        ],
+        merges=[
+            schema.Node(
+                "Vaccine",
+                key="VaccineId",
+                properties=[
+                    "VaxType",
+                    "RxNormCui",
+                    "GenericName",
+                    "TradeName",
+                    "Manufacturer",
+                    "Description",
+                ],
+                fill_missing=True,
+            )
+        ],
+        comment=(
+            "VAERS data are used to set initial names for vaccines, as it is currently "
+            "the most\ncomprehensive source of vaccine names, so properties already "
+            "set by earlier rows are kept.\nMoving forward names from sources will "
+            "be validated and aligned to a common terminology,\nwhich will eliminate "
+            "the need for this prioritization."
+        ),
+    )
+    _output_columns = _schema.column_names
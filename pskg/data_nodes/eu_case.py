@@ -3,9 +3,10 @@ import logging
 import numpy as np
 import pandas as pd
 
-from data_prep import eudravigilance as eu
+from data_prep import eudravigilance as eu, ids
 from data_prep import s3_utils
 from data_prep.outcomes import OutcomeMapper
+from data_prep import normalize
 from . import case
 
 
@@ -93,31 +94,39 @@ class EudraVigilanceCase(case.Case):
             self.get_manifest_data(df=eu_case_df, tag=self.data_set_tag)
         )
 
-        eu_case_df["reaction_list_pt"] = eu_case_df[self.reaction_list_column].apply(
-            eu.ev_split_break
-        )
-
-        eu_case_df[
-            ["terms_list", "duration_list", "outcome_list", "seriousness_criteria_list"]
-        ] = eu_case_df[["reaction_list_pt"]].apply(
-            lambda x: eu.ev_extract_term(x["reaction_list_pt"]), axis=1
+        # Reaction list components are kept as Arrow list arrays, aligned by position
+        # with eu_case_df
+        reaction_terms = eu.ev_extract_term_arrays(
+            eu.ev_split_break_array(eu_case_df[self.reaction_list_column])
         )
 
         # Build up columns for export
         
-        eu_case_df["CaseId"] = eu_case_df.apply(eu.derive_case_id, native_id_column=self.eu_raw_id_column, axis=1)
+        eu_case_df["CaseId"] = eu.derive_case_codes(
+            eu_case_df, native_id_column=self.eu_raw_id_column
+        )
         eu_case_df["SourceCaseId"] = eu_case_df[self.eu_raw_id_column]
+
+        # Updated cases appear once per version, only the latest is current.  Versions
+        # are also registered so CasePreviousVersion can link them across files.
+        versions_df = eu.rank_case_versions(eu_case_df)
+        eu.register_case_versions(
+            (self.s3_bucket, self.s3_key, str(self.file_path)), versions_df
+        )
+        eu_case_df["Current"] = eu_case_df["CaseId"].map(
+            versions_df.set_index("CaseId")["Current"]
+        )
         eu_case_df["DataSource"] = self.data_source
         eu_case_df["ReportedDate"] = pd.to_datetime(
             "", errors="coerce"
         )  # EV doesn't have this value
         eu_case_df["ReceivedDate"] = eu_case_df["EV Gateway Receipt Date"].dt.date
         eu_case_df["Tag"] = eu_case_df["EV Gateway Receipt Date"].dt.date
-        eu_case_df["PatientAgeRangeMin"] = eu_case_df["Patient Age Group"].apply(
-            eu.get_min_age
+        eu_case_df["PatientAgeRangeMin"] = normalize.apply_unique(
+            eu_case_df["Patient Age Group"], eu.get_min_age
         )
-        eu_case_df["PatientAgeRangeMax"] = eu_case_df["Patient Age Group"].apply(
-            eu.get_max_age
+        eu_case_df["PatientAgeRangeMax"] = normalize.apply_unique(
+            eu_case_df["Patient Age Group"], eu.get_max_age
         )
         eu_case_df["PatientGender"] = eu_case_df["Patient Sex"]
         eu_case_df["DeathDate"] = pd.to_datetime(
@@ -127,35 +136,34 @@ class EudraVigilanceCase(case.Case):
 
         # Standardize patient outcomes.
 
-        eu_case_df["outcome_list"] = eu_case_df["outcome_list"] + eu_case_df[
-            "seriousness_criteria_list"
-        ].apply(eu.merge_lists)
-
-        eu_outcome_tdf = eu_case_df[["CaseId", "outcome_list"]].explode(
-            column="outcome_list"
-        )
-
-        # A given data file may not contain all possible outcome values, so
-        # make sure all columns are available in the pivot
-        eu_outcome_tdf = pd.pivot_table(
-            eu_outcome_tdf,
-            index="CaseId",
-            columns="outcome_list",
-            aggfunc=lambda x: True,
-        ).reset_index()
-
-        # Add any missing outcome columns
-        for c in list(eu.ALL_EU_OUTCOMES.columns):
-            if c not in eu_outcome_tdf.columns:
-                self.logger.info(f"Adding missing column: {c}")
-                eu_outcome_tdf[c] = np.NaN
-
-        eu_outcome_tdf["PatientOutcome"] = eu_outcome_tdf.apply(
-            OutcomeMapper.derive_outcomes,
-            axis=1,
-            dataset=self.data_source,
+        # Outcomes and seriousness criteria from all reactions are combined into a
+        # single set of outcome mentions per case
+        eu_outcome_tdf = pd.concat(
+            [
+                eu.explode_list_array(
+                    reaction_terms["outcome_list"],
+                    eu_case_df["CaseId"],
+                    value_name="outcome_list",
+                ),
+                eu.explode_list_array(
+                    eu.flatten_list_array(reaction_terms["seriousness_criteria_list"]),
+                    eu_case_df["CaseId"],
+                    value_name="outcome_list",
+                ),
+            ],
+            ignore_index=True,
+        ).drop_duplicates()
+
+        # One row per case, with a boolean column for every known outcome
+        eu_outcome_tdf = eu.ev_outcome_indicators(eu_outcome_tdf)
+
+        eu_outcome_tdf["PatientOutcome"] = OutcomeMapper.derive_outcomes_frame(
+            eu_outcome_tdf, dataset=self.data_source
         )
 
+        # Recovery with sequelae counts as recovered.  Builds before the outcome
+        # indicators wrote false for cases with only that recovery outcome (NaN |
+        # True in the pivot table was False).
         eu_outcome_tdf["PatientRecovered"] = (
             eu_outcome_tdf["Recovered/Resolved"]
             | eu_outcome_tdf["Recovered/Resolved With Sequelae"]
@@ -172,6 +180,8 @@ class EudraVigilanceCase(case.Case):
 
         final_df = eu_case_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
@@ -10,7 +10,13 @@ import pandas as pd
 import numpy as np
 
 from . import drug
-from data_prep import id_management as idm, eudravigilance as eu
+from data_prep import drug_resolution, eudravigilance as eu, ids
+
+# Classified drug mentions by EV source file, see get_drug_mentions_df().  Entries
+# are dropped once every generator expecting them (_drug_mention_readers) has read
+# them, so only files still to be read by a later pool are held.
+_drug_mentions = {}
+_drug_mention_readers = {}
 
 
 class EudraVigilanceHelper(object):
@@ -32,32 +38,52 @@ class EudraVigilanceHelper(object):
 
     allowed_drug_type_filters = ["medication", "vaccine"]
 
-    def get_all_drugs_df(self, drug_filter=None, ev_source=None):
+    def _drug_mentions_key(self, ev_source):
+        return (self.s3_bucket, self.s3_key, str(self.file_path), ev_source)
+
+    def expect_drug_mentions(self, ev_source=None):
+        """
+        Declare that this generator will read the drug mentions of its source file
+        (once, with get_drug_mentions_df), so the table is kept for it once built.
+        Called when the generator is created.
+        """
+        cache_key = self._drug_mentions_key(ev_source)
+        _drug_mention_readers[cache_key] = _drug_mention_readers.get(cache_key, 0) + 1
+
+    def get_drug_mentions_df(self, ev_source=None):
         """
-        Load raw EudraVigilance case data into a dataframe, and break out
-        suspect and concomittant medications in separate dataframes, optionally
-        filtering to vaccine or medications only
+        Load raw EudraVigilance case data and break out every suspect and
+        concomittant drug mention into a single classified table.  The table is
+        built once per source file and shared by the EudraVigilance drug generators
+        created for it (see expect_drug_mentions), then released after the last of
+        them has read it.
+
+        Each mention has a DrugRole ("suspect" or "concomitant") and a DrugClass
+        ("vaccine" or "medication").  NOTE: all suspect drugs are assumed to be
+        vaccines until there is a means to precisely differentiate them.
 
         Parameters
         ----------
-        drug_type: str
-            Filter to given type, only "vaccine" or "medication" are supported
         ev_source: str
-            EudraVigilance data source: public or EVDAS, configured in config.yml, indicates EV data source is public site or from the EVDAS system. 
+            EudraVigilance data source: public or EVDAS, configured in config.yml, indicates EV data source is public site or from the EVDAS system.
             public site does not contain "Worldwide Unique Case Identification" used to identiy case country.
-            If data source is Public "Worldwide Unique Case Identification" is replaced with "EU Local Number"            
-        """
-
-        if drug_filter and drug_filter not in self.allowed_drug_type_filters:
-            raise ValueError(
-                f"Filter type '{drug_filter}', {self.allowed_drug_type_filters} are allowed"
-            )
+            If data source is Public "Worldwide Unique Case Identification" is replaced with "EU Local Number"
 
+        Returns
+        -------
+        pd.DataFrame
+            Drug details (see eu.ev_extract_drug_details) with resolved key columns,
+            shared between callers and so must not be modified
+        """
         if ev_source == "Public":
             self.eu_raw_id_column = "EU Local Number"
-            self.raw_eu_columns[0] =  self.eu_raw_id_column
+            self.raw_eu_columns[0] = self.eu_raw_id_column
+
+        cache_key = self._drug_mentions_key(ev_source)
+        if cache_key in _drug_mentions:
+            return self._release_drug_mentions(cache_key, _drug_mentions[cache_key])
 
-            # Gather only columns needed
+        # Gather only columns needed
         result_df = eu.raw_load(
             input_bucket=self.s3_bucket,
             input_key=self.s3_key,
@@ -68,84 +94,109 @@ class EudraVigilanceHelper(object):
         # suspect and concommitant lists can contain entries for drugs other than vaccines.  NOTE: this must be handled more
         # effectively using a controlled terminology
 
-        result_df["CaseId"] = result_df.apply(eu.derive_case_id, native_id_column=self.eu_raw_id_column, axis=1)
-        result_df["suspect_drug_list"] = result_df[self.suspect_list_column].apply(
-            eu.ev_split_break
-        )
-        result_df["concom_drug_list"] = result_df[self.concom_list_column].apply(
-            eu.ev_split_break
+        result_df["CaseId"] = eu.derive_case_codes(
+            result_df, native_id_column=self.eu_raw_id_column
         )
-        self.logger.info(f"concom_drug_list:  {result_df['concom_drug_list']}")
 
-        # Extract vaccines and other medications
-        # Concomittant drugs are processed every time, suspects are only considered for the vaccine filter
-        eu_suspect_df = None
+        eu_suspect_df = eu.ev_extract_drug_details(
+            result_df, drug_column=self.suspect_list_column
+        )
+        eu_suspect_df["DrugRole"] = "suspect"
         eu_concom_df = eu.ev_extract_drug_details(
-            result_df, drug_column="concom_drug_list"
+            result_df, drug_column=self.concom_list_column
         )
+        eu_concom_df["DrugRole"] = "concomitant"
+        mentions_df = pd.concat([eu_suspect_df, eu_concom_df], ignore_index=True)
 
-        if drug_filter == "vaccine":
-            eu_suspect_df = eu.ev_extract_drug_details(
-                result_df, drug_column="suspect_drug_list"
-            )
+        # Each distinct drug name is resolved once and cached between runs
+        resolved_df = drug_resolution.resolve_drug_names(
+            mentions_df["drug"], data_source=self.data_source
+        )
+        self._assign_resolved_columns(mentions_df, resolved_df)
 
-            # filter vaccines (note: assume all suspect meds are vaccines until there
-            # is a means to precisely differentiate them)
-            eu_concom_df = eu_concom_df.loc[
-                (eu_concom_df["indication"].str.contains("immunisation", case=False))
-                | eu_concom_df["drug"].str.contains("vax", case=False)
-                | (eu_concom_df["drug"].str.contains("vaccine", case=False))
-            ].copy()
-
-            # Assign key columns (suspect)
-            eu_suspect_df["OriginalName"] = eu_suspect_df["drug"]
-            eu_suspect_df["Indication"] = eu_suspect_df["indication"]
-            eu_suspect_df["Manufacturer"] = eu_suspect_df["drug"].apply(
-                eu.ev_simple_classify_manufacturer
-            )
+        is_vaccine = (
+            (mentions_df["DrugRole"] == "suspect")
+            | mentions_df["indication"].str.contains("immunisation", case=False)
+            | mentions_df["drug"].map(resolved_df["NamedVaccine"])
+        )
+        mentions_df["DrugClass"] = np.where(is_vaccine, "vaccine", "medication")
 
-            eu_suspect_df["GenericName"] = eu_suspect_df["drug"].apply(
-                eu.ev_simple_standardize_generic_drug_names
-            )
+        return self._release_drug_mentions(cache_key, mentions_df)
 
-            # NOTE: Replace thes with a webservice based lookup, e.g. NIH Daily Med
-            eu_suspect_df["TradeName"] = eu_suspect_df["drug"].apply(
-                eu.ev_simple_standardize_trade_drug_name
-            )
-            eu_suspect_df["RxNormCui"] = ""
-            eu_suspect_df["Description"] = ""
-
-        elif drug_filter == "medication":
-            # filter to just medications, again suspect are just
-            # assumed to be vaccines so do not include them at all here
-            eu_concom_df = eu_concom_df.loc[
-                ~(
-                    eu_concom_df["indication"].str.contains("immunisation", case=False)
-                    | eu_concom_df["drug"].str.contains("vax", case=False)
-                    | (eu_concom_df["drug"].str.contains("vaccine", case=False))
-                )
-            ].copy()
+    def _release_drug_mentions(self, cache_key, mentions_df):
+        """
+        Count a read of the drug mentions of cache_key, keeping them only while
+        other expected readers remain
+        """
+        readers = _drug_mention_readers.get(cache_key, 0) - 1
+        if readers > 0:
+            _drug_mention_readers[cache_key] = readers
+            _drug_mentions[cache_key] = mentions_df
+        else:
+            _drug_mention_readers.pop(cache_key, None)
+            _drug_mentions.pop(cache_key, None)
+        return mentions_df
 
-        # Assign key columns (concomitant)
-        eu_concom_df["OriginalName"] = eu_concom_df["drug"]
-        eu_concom_df["Indication"] = eu_concom_df["indication"]
-        eu_concom_df["Manufacturer"] = eu_concom_df["drug"].apply(
-            eu.ev_simple_classify_manufacturer
-        )
+    def get_all_drugs_df(self, drug_filter=None, ev_source=None):
+        """
+        Return suspect and concomittant medications in separate dataframes, optionally
+        filtering to vaccine or medications only.  Suspect medications are only
+        returned for the vaccine filter.
 
-        eu_concom_df["GenericName"] = eu_concom_df["drug"].apply(
-            eu.ev_simple_standardize_generic_drug_names
-        )
+        Parameters
+        ----------
+        drug_type: str
+            Filter to given type, only "vaccine" or "medication" are supported
+        ev_source: str
+            EudraVigilance data source: public or EVDAS, configured in config.yml, indicates EV data source is public site or from the EVDAS system.
+            public site does not contain "Worldwide Unique Case Identification" used to identiy case country.
+            If data source is Public "Worldwide Unique Case Identification" is replaced with "EU Local Number"
+        """
 
-        # NOTE: Replace this with a webservice based lookup, e.g. NIH Daily Med
-        eu_concom_df["TradeName"] = eu_concom_df["drug"].apply(
-            eu.ev_simple_standardize_trade_drug_name
-        )
-        eu_concom_df["RxNormCui"] = ""
-        eu_concom_df["Description"] = ""
+        if drug_filter and drug_filter not in self.allowed_drug_type_filters:
+            raise ValueError(
+                f"Filter type '{drug_filter}', {self.allowed_drug_type_filters} are allowed"
+            )
+
+        mentions_df = self.get_drug_mentions_df(ev_source=ev_source)
+        is_concom = mentions_df["DrugRole"] == "concomitant"
+
+        eu_suspect_df = None
+        if drug_filter == "vaccine":
+            eu_suspect_df = mentions_df.loc[~is_concom].copy()
+        if drug_filter:
+            is_concom &= mentions_df["DrugClass"] == drug_filter
+        eu_concom_df = mentions_df.loc[is_concom].copy()
 
         return eu_suspect_df, eu_concom_df
 
+    @staticmethod
+    def _assign_resolved_columns(drug_df, resolved_df):
+        """
+        Assign key columns to extracted drug details from resolved drug names
+
+        Parameters
+        ----------
+        drug_df: pd.DataFrame
+            Output of eu.ev_extract_drug_details, updated in place
+        resolved_df: pd.DataFrame
+            Output of drug_resolution.resolve_drug_names, indexed by drug name
+        """
+        drug_df["OriginalName"] = drug_df["drug"]
+        drug_df["Indication"] = drug_df["indication"]
+
+        # NOTE: Replace trade names with a webservice based lookup, e.g. NIH Daily Med
+        resolved = resolved_df.reindex(drug_df["drug"])
+        for c in ["Manufacturer", "GenericName", "TradeName", "VaxType"]:
+            drug_df[c] = resolved[c].to_numpy()
+        drug_df["RxNormCui"] = ""
+        drug_df["Description"] = ""
+
+        drug_df["VaccineId"] = ids.VACCINE_IDS.intern(resolved["VaccineId"]).to_numpy()
+        drug_df["MedicationId"] = ids.MEDICATION_IDS.intern(
+            resolved["MedicationId"]
+        ).to_numpy()
+
     def _extract_dose_unit(self, row):
         """
         Parse an EV Dose string an extract the dose and unit.
@@ -203,6 +254,7 @@ class EudraVigilanceVaccine(drug.Vaccine, EudraVigilanceHelper):
         self.data_set_tag = data_set_tag
         self.logger = logging.getLogger(f"pskg_loader.EudraVigilanceVaccine")
         self.ev_source = ev_source
+        self.expect_drug_mentions(ev_source=self.ev_source)
 
     def write_objects(self, output_stream):
         """
@@ -237,17 +289,9 @@ class EudraVigilanceVaccine(drug.Vaccine, EudraVigilanceHelper):
         )
 
         if not eu_suspect_vax_df.empty:
-            eu_suspect_vax_df["VaccineId"] = eu_suspect_vax_df.apply(
-                idm.get_vaccine_id, data_source=self.data_source, axis=1
-            )
-
-            eu_suspect_vax_df["VaxType"] = eu_suspect_vax_df["drug"].apply(
-                eu.ev_simple_vax_type
-            )
-
             suspect_final_df = eu_suspect_vax_df[self._output_columns].drop_duplicates()
             if not suspect_final_df.empty:
-                suspect_final_df.to_csv(
+                self.format_output(ids.format_id_columns(suspect_final_df)).to_csv(
                     output_stream, header=False, index=False, sep="\t"
                 )
 
@@ -256,16 +300,9 @@ class EudraVigilanceVaccine(drug.Vaccine, EudraVigilanceHelper):
             self.logger.warning(f"No suspect vaccines found in {self.source_url}.")
 
         if not eu_concom_vax_df.empty:
-            eu_concom_vax_df["VaccineId"] = eu_concom_vax_df.apply(
-                idm.get_vaccine_id, data_source=self.data_source, axis=1
-            )
-            eu_concom_vax_df["VaxType"] = eu_concom_vax_df["drug"].apply(
-                eu.ev_simple_vax_type
-            )
-
             concom_final_df = eu_concom_vax_df[self._output_columns].drop_duplicates()
             if not concom_final_df.empty:
-                concom_final_df.to_csv(
+                self.format_output(ids.format_id_columns(concom_final_df)).to_csv(
                     output_stream, header=False, index=False, sep="\t"
                 )
 
@@ -304,6 +341,7 @@ class EudraVigilanceMedication(drug.Medication, EudraVigilanceHelper):
             f"pskg_loader.eudravigilance.EudraVigilanceMedication"
         )
         self.ev_source = ev_source
+        self.expect_drug_mentions(ev_source=self.ev_source)
 
     def write_objects(self, output_stream):
         """
@@ -332,18 +370,16 @@ class EudraVigilanceMedication(drug.Medication, EudraVigilanceHelper):
         )
 
         if not eu_concom_med_df.empty:
-            eu_concom_med_df["MedicationId"] = eu_concom_med_df.apply(
-                idm.get_medication_id, data_source=self.data_source, axis=1
-            )
-
             # Special case since VAERS does not have AZ1222 currently
             eu_concom_med_df.loc[
-                eu_concom_med_df["MedicationId"] == "ALIGNED:AstraZeneca", ["VaxType"]
+                eu_concom_med_df["MedicationId"]
+                == ids.MEDICATION_IDS.lookup("ALIGNED:AstraZeneca"),
+                ["VaxType"],
             ] = "COVID19"
 
             concom_final_df = eu_concom_med_df[self._output_columns].drop_duplicates()
             if not concom_final_df.empty:
-                concom_final_df.to_csv(
+                self.format_output(ids.format_id_columns(concom_final_df)).to_csv(
                     output_stream, header=False, index=False, sep="\t"
                 )
 
@@ -2,21 +2,25 @@
 ### Class Defining Exposure.tsv
 ###
 
-from graph_objects import utils
+from graph_objects import schema, utils
 
 
 class Exposure(utils.Generator):
-    _output_columns = [
-        "ExposureId",
-        "DataSource",
-        "StartDate",
-        "EndDate",
-        "Count",
-        "GroupAgeMin",
-        "GroupAgeMax",
-        "GroupGender",
-        "GroupRace",
-        "GroupCondition",
-        "DoseIdentifier",
-        "SubRegion",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("ExposureId"),
+            schema.Column("DataSource"),
+            schema.Column("StartDate", "datetime"),
+            schema.Column("EndDate", "datetime"),
+            schema.Column("Count", "integer"),
+            schema.Column("GroupAgeMin", "float"),
+            schema.Column("GroupAgeMax", "float"),
+            schema.Column("GroupGender"),
+            schema.Column("GroupRace"),
+            schema.Column("GroupCondition"),
+            schema.Column("DoseIdentifier"),
+            schema.Column("SubRegion"),
+        ],
+        merges=[schema.Node("ExposureData", key="ExposureId")],
+    )
+    _output_columns = _schema.column_names
@@ -5,21 +5,25 @@
 import logging
 import pandas as pd
 import numpy as np
-from graph_objects import utils
+from graph_objects import schema, utils
 from data_prep import s3_utils, geocoding
 
 
 class Country(utils.Generator):
-    _output_columns = [
-        "Name",
-        "CountryCode",
-        "Population",
-        "AgeDistribution",
-        "SocioEconomicDistribution",
-        "GenderDistribution",
-        "RacialDistribution",
-        "InformationDate",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("Name"),
+            schema.Column("CountryCode"),
+            schema.Column("Population", "integer"),
+            schema.Column("AgeDistribution"),
+            schema.Column("SocioEconomicDistribution"),
+            schema.Column("GenderDistribution"),
+            schema.Column("RacialDistribution"),
+            schema.Column("InformationDate", "datetime"),
+        ],
+        merges=[schema.Node("Country", key="CountryCode")],
+    )
+    _output_columns = _schema.column_names
 
     data_tag = "static-country-geocoding"
 
@@ -64,16 +68,17 @@ class Country(utils.Generator):
         df["InformationDate"] = ""
         df["InformationDate"] = df["InformationDate"].astype("datetime64[ns]")
 
-        df[self._output_columns].to_csv(
+        self.format_output(df[self._output_columns]).to_csv(
             output_stream, index=False, header=False, sep="\t"
         )
 
 
 class Continent(utils.Generator):
-    _output_columns = [
-        "ContinentCode",
-        "Name",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[schema.Column("ContinentCode"), schema.Column("Name")],
+        merges=[schema.Node("Continent", key="ContinentCode")],
+    )
+    _output_columns = _schema.column_names
 
     data_tag = "static-continent-geocoding"
 
@@ -115,6 +120,8 @@ class Continent(utils.Generator):
             .dropna(axis=0, how="any")
         )
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
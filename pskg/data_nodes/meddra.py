@@ -5,22 +5,49 @@
 import logging
 from pathlib import Path
 
-from numpy import isin
+import numpy as np
+import pandas as pd
 
-from data_prep import meddra as raw_meddra
-from graph_objects import utils
+from data_prep import meddra as raw_meddra, meddra_dictionary
+from graph_objects import schema, utils
+
+# Node label of each MedDRA term type
+MEDDRA_LABELS = {
+    "LLT": "MeddraLLT",
+    "PT": "MeddraPT",
+    "HLT": "MeddraHLT",
+    "HLGT": "MeddraHLGT",
+    "SOC": "MeddraSOC",
+}
 
 
 class MeddraTerm(utils.Generator):
-    _output_columns = [
-        "MeddraCode",
-        "MeddraId",
-        "MeddraAbbreviation",
-        "MeddraType",
-        "MeddraVersion",
-        "MeddraLanguage",
-        "Name",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("MeddraCode", "integer"),
+            schema.Column("MeddraId"),
+            schema.Column("MeddraAbbreviation"),
+            schema.Column("MeddraType"),
+            schema.Column("MeddraVersion"),
+            schema.Column("MeddraLanguage"),
+            schema.Column("Name"),
+        ],
+        merges=[
+            schema.Node(
+                MEDDRA_LABELS,
+                label_column="MeddraType",
+                key="MeddraId",
+                properties=["MeddraCode", "MeddraType", "Name", "MeddraVersion"],
+            )
+        ],
+        indexes=[schema.Index("MeddraPT", "Name", "MeddraType")],
+        comment=(
+            "MedDRA terms are merged with the label of their MeddraType, by a FOREACH "
+            "per label from\na file of all terms, or from one file per label with "
+            "MedDRA.TERM_FILES_BY_TYPE set."
+        ),
+    )
+    _output_columns = _schema.column_names
 
     def __init__(
         self,
@@ -30,8 +57,18 @@ class MeddraTerm(utils.Generator):
         mdhier_file="mdhier.asc",
         llt_file="llt.asc",
         release_file="meddra_release.asc",
+        meddra_version=None,
+        meddra_types=None,
     ):
         super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=folder_path)
+        self.meddra_version = meddra_version
+        # Term types written by this generator, e.g. ["PT"] for a file per label
+        self.meddra_types = meddra_types or meddra_dictionary.TERM_TYPES
+        self.meddra_files = {
+            "mdhier": mdhier_file,
+            "llt": llt_file,
+            "meddra_release": release_file,
+        }
 
         if folder_path:
             if isinstance(folder_path, str):
@@ -64,93 +101,6 @@ class MeddraTerm(utils.Generator):
         self.logger = logging.getLogger(f"pskg_loader.MeddraTerm")
         self.logger.info(f"Created {self}")
 
-    def gather_term_codes(
-        self,
-        df,
-        meddra_type,
-        code_column,
-        name_column,
-        abbreviation_column=None,
-        version_column="version",
-        language_column="language",
-    ):
-        """
-        Helper function to assemble MedDRA terms for output.
-
-        Parameters
-        ----------
-        df: pd.Dataframe
-            Dataframe containing code data
-        meddra_type: str
-            Type of codes being exracted
-        code_column: str
-            Column containing codes
-        name_column: str
-            Column containting name
-        abbreviaton_column: str, optional
-            Column containing abbreviation information, defaults to None
-        version_column: str, optional
-            Column containing MedDRA version, defaults to "version"
-        language_column: str, optional
-            Column with MedDRA language version, defaults to "language"
-
-        Returns
-        -------
-        pd.DataFrame
-            Returns a dataframe in outputformat populated with terms for the given type
-
-        """
-        self.logger.info(
-            f"gather_term_codes: meddra_type:{meddra_type}, code_column:{code_column}, name_column:{name_column}, abbreviation:{abbreviation_column}"
-        )
-        result_df = (
-            df[
-                [
-                    c
-                    for c in [
-                        code_column,
-                        name_column,
-                        abbreviation_column,
-                        version_column,
-                        language_column,
-                    ]
-                    if c is not None
-                ]
-            ]
-            .drop_duplicates()
-            .assign(
-                MeddraType=meddra_type,
-                MeddraVersion=lambda x: x[version_column]
-                if version_column is not None
-                else "",
-                MeddraLanguage=lambda x: x[language_column]
-                if language_column is not None
-                else "",
-            )
-        )
-        result_df["Name"] = result_df[name_column]
-        result_df["MeddraCode"] = result_df[code_column]
-        result_df["MeddraId"] = result_df.apply(
-            raw_meddra.generate_type_meddra_id,
-            column_name=code_column,
-            meddra_type=meddra_type,
-            axis=1,
-        )
-        if abbreviation_column:
-            result_df["MeddraAbbreviation"] = result_df[abbreviation_column]
-        else:
-            result_df["MeddraAbbreviation"] = ""
-        if version_column:
-            result_df["MeddraVersion"] = result_df[version_column]
-        else:
-            result_df["MeddraVersion"] = ""
-        if language_column:
-            result_df["MeddraLanguage"] = result_df[language_column]
-        else:
-            result_df["MeddraLanguage"] = ""
-
-        return result_df[self._output_columns].drop_duplicates()
-
     def write_objects(self, output_stream):
         """
         Construct Meddra nodes and write them an existing open output_stream.  Caller is responsible for
@@ -166,136 +116,133 @@ class MeddraTerm(utils.Generator):
         None
         """
 
-        # Hierarchy file contains all PT, HLT, HLGT, and SOC terms,
-        # so read it in here.
-        mdhier_df = raw_meddra.read_raw(
-            input_bucket=self.s3_bucket,
-            input_key=self.mdhier_s3_key,
-            file_path=self.mdhier_path,
-            meddra_file_type="mdhier",
+        # Hierarchy file contains all PT, HLT, HLGT, and SOC terms, llt file has LLTs
+        dictionary = meddra_dictionary.load_dictionary(
+            version=self.meddra_version,
+            s3_bucket=self.s3_bucket,
+            s3_key=self.s3_key,
+            folder_path=self.file_path,
+            files=self.meddra_files,
         )
 
         self.manifest_data.append(
             self.get_manifest_data(
-                df=mdhier_df,
+                rows=dictionary.row_counts["mdhier"],
                 s3_bucket=self.s3_bucket,
                 s3_key=self.mdhier_s3_key,
                 file_path=self.mdhier_path,
             )
         )
 
-        llt_df = raw_meddra.read_raw(
-            input_bucket=self.s3_bucket,
-            input_key=self.llt_s3_key,
-            file_path=self.llt_path,
-            meddra_file_type="llt",
-        )
-
         self.manifest_data.append(
             self.get_manifest_data(
-                df=llt_df,
+                rows=dictionary.row_counts["llt"],
                 s3_bucket=self.s3_bucket,
                 s3_key=self.llt_s3_key,
                 file_path=self.llt_path,
             )
         )
 
-        if self.release_path or self.release_s3_key:
+        if dictionary.release is not None:
             # gather version data, if available
             self.logger.info(
                 f"Using MedDRA version data from {self.release_source_url}"
             )
-            version_df = raw_meddra.read_raw(
-                input_bucket=self.s3_bucket,
-                input_key=self.release_s3_key,
-                file_path=self.release_path,
-                meddra_file_type="meddra_release",
-            )
-
             self.manifest_data.append(
                 self.get_manifest_data(
-                    df=version_df,
+                    rows=dictionary.row_counts["meddra_release"],
                     s3_bucket=self.s3_bucket,
                     s3_key=self.release_s3_key,
                     file_path=self.release_path,
                 )
             )
-
-            mdhier_df = mdhier_df.merge(version_df, how="cross")
-            llt_df = llt_df.merge(version_df, how="cross")
         else:
             self.logger.warn(f"No MedDRA version file available.")
-            mdhier_df["version"] = None
-            mdhier_df["language"] = None
-            llt_df["version"] = None
-            llt_df["language"] = None
 
-        pt_codes_df = self.gather_term_codes(
-            df=mdhier_df, meddra_type="PT", code_column="pt_code", name_column="pt_name"
+        final_df = self.get_terms_df(dictionary)
+        self.format_output(final_df).to_csv(
+            output_stream, sep="\t", header=False, index=False, mode="a"
         )
+        type_counts = final_df["MeddraType"].value_counts(sort=False)
+        for meddra_type, count in type_counts.items():
+            self.logger.info(f"{count} {meddra_type}s written.")
 
-        pt_codes_df.to_csv(output_stream, sep="\t", header=False, index=False, mode="a")
-        self.logger.info(f"{len(pt_codes_df)} PTs written.")
+    def load_schema(self):
+        """
+        Load schema of the term types written by this generator
+        """
+        return self._schema.restrict("MeddraType", self.meddra_types)
 
-        hlt_codes_df = self.gather_term_codes(
-            df=mdhier_df,
-            meddra_type="HLT",
-            code_column="hlt_code",
-            name_column="hlt_name",
-        )
-        hlt_codes_df.to_csv(
-            output_stream, sep="\t", header=False, index=False, mode="a"
-        )
-        self.logger.info(f"{len(hlt_codes_df)} HLTs written.")
+    def get_terms_df(self, dictionary):
+        """
+        Assemble MedDRA terms of the types written by this generator (meddra_types)
+        for output
 
-        hlgt_codes_df = self.gather_term_codes(
-            df=mdhier_df,
-            meddra_type="HLGT",
-            code_column="hlgt_code",
-            name_column="hlgt_name",
-        )
-        hlgt_codes_df.to_csv(
-            output_stream, sep="\t", header=False, index=False, mode="a"
-        )
-        self.logger.info(f"{len(hlgt_codes_df)} HLGTs written.")
-
-        soc_codes_df = self.gather_term_codes(
-            df=mdhier_df,
-            meddra_type="SOC",
-            code_column="soc_code",
-            name_column="soc_name",
-            abbreviation_column="soc_abbrev",
-        )
-        soc_codes_df.to_csv(
-            output_stream, sep="\t", header=False, index=False, mode="a"
-        )
-        self.logger.info(f"{len(soc_codes_df)} SOCs written.")
+        Parameters
+        ----------
+        dictionary: meddra_dictionary.MeddraDictionary
+            Parsed MedDRA distribution
 
-        llt_codes_df = self.gather_term_codes(
-            df=llt_df,
-            meddra_type="LLT",
-            code_column="llt_code",
-            name_column="llt_name",
-        )
+        Returns
+        -------
+        pd.DataFrame
+            Terms in output format, grouped by type
+        """
+        release_df = dictionary.release
+        if release_df is None:
+            release_df = pd.DataFrame({"version": [None], "language": [None]})
+        release_df = release_df.drop_duplicates()
+
+        terms_dfs = []
+        for meddra_type in self.meddra_types:
+            # Dictionary term tables are distinct, so each term appears once per
+            # release row, terms major as in a cross merge
+            terms_df = dictionary.term_table(meddra_type)
+            term_rows = np.repeat(np.arange(len(terms_df)), len(release_df))
+            release_rows = np.tile(np.arange(len(release_df)), len(terms_df))
+            codes = terms_df["MeddraCode"].iloc[term_rows].reset_index(drop=True)
+            terms_dfs.append(
+                pd.DataFrame(
+                    {
+                        "MeddraCode": codes,
+                        "MeddraId": raw_meddra.generate_meddra_ids(
+                            codes, meddra_type=meddra_type
+                        ),
+                        "MeddraAbbreviation": terms_df["MeddraAbbreviation"]
+                        .iloc[term_rows]
+                        .to_numpy(),
+                        "MeddraType": meddra_type,
+                        "MeddraVersion": release_df["version"]
+                        .iloc[release_rows]
+                        .to_numpy(),
+                        "MeddraLanguage": release_df["language"]
+                        .iloc[release_rows]
+                        .to_numpy(),
+                        "Name": terms_df["Name"].iloc[term_rows].to_numpy(),
+                    }
+                )
+            )
+            self.logger.info(f"Gathered {len(terms_df)} {meddra_type} terms")
 
-        llt_codes_df.to_csv(
-            output_stream, sep="\t", header=False, index=False, mode="a"
-        )
-        self.logger.info(f"{len(llt_codes_df)} LLTs written.")
+        return pd.concat(terms_dfs, ignore_index=True)[self._output_columns]
 
 
 class MeddraSMQ(utils.Generator):
-    _output_columns = [
-        "MeddraSmqCode",
-        "Name",
-        "SmqLevel",
-        "SmqDescription",
-        "SmqSource",
-        "SmqNote",
-        "SmqVersion",
-        "SmqStatus",
-        "SmqAlgorithm",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("MeddraSmqCode", "integer"),
+            schema.Column("Name"),
+            schema.Column("SmqLevel"),
+            schema.Column("SmqDescription"),
+            schema.Column("SmqSource"),
+            schema.Column("SmqNote"),
+            schema.Column("SmqVersion"),
+            schema.Column("SmqStatus"),
+            schema.Column("SmqAlgorithm"),
+        ],
+        merges=[schema.Node("MeddraSmq", key="MeddraSmqCode")],
+    )
+    _output_columns = _schema.column_names
 
     def __init__(
         self,
@@ -303,8 +250,11 @@ class MeddraSMQ(utils.Generator):
         s3_key=None,
         folder_path=None,
         smq_list_file="smq_list.asc",
+        meddra_version=None,
     ):
         super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=folder_path)
+        self.meddra_version = meddra_version
+        self.meddra_files = {"smq_list": smq_list_file}
         if folder_path:
             if isinstance(folder_path, str):
                 folder_path = Path(folder_path)
@@ -332,23 +282,44 @@ class MeddraSMQ(utils.Generator):
         -------
         None
         """
-        # Hierarchy file contains all PT, HLT, HLGT, and SOC terms,
-        smq_list_df = raw_meddra.read_raw(
-            input_bucket=self.s3_bucket,
-            input_key=self.smq_list_s3_key,
-            file_path=self.smq_list_file_path,
-            meddra_file_type="smq_list",
+        dictionary = meddra_dictionary.load_dictionary(
+            version=self.meddra_version,
+            s3_bucket=self.s3_bucket,
+            s3_key=self.s3_key,
+            folder_path=self.file_path,
+            files=self.meddra_files,
         )
-
         self.manifest_data.append(
             self.get_manifest_data(
-                df=smq_list_df,
+                df=dictionary.smq_list,
                 s3_bucket=self.s3_bucket,
                 s3_key=self.smq_list_s3_key,
                 file_path=self.smq_list_file_path,
             )
         )
 
+        final_df = self.get_smq_df(dictionary)
+        self.format_output(final_df).to_csv(
+            output_stream, sep="\t", header=False, index=False, mode="a"
+        )
+
+        self.logger.info(f"{len(final_df)} MeddraSMQs written.")
+
+    def get_smq_df(self, dictionary):
+        """
+        Assemble SMQs for output
+
+        Parameters
+        ----------
+        dictionary: meddra_dictionary.MeddraDictionary
+            Parsed MedDRA distribution
+
+        Returns
+        -------
+        pd.DataFrame
+            SMQs in output format
+        """
+        smq_list_df = dictionary.smq_list.copy()
         smq_list_df["MeddraSmqCode"] = smq_list_df["smq_code"]
         smq_list_df["Name"] = smq_list_df["smq_name"]
         smq_list_df["SmqLevel"] = smq_list_df["smq_level"]
@@ -359,7 +330,4 @@ class MeddraSMQ(utils.Generator):
         smq_list_df["SmqNote"] = smq_list_df["smq_note"]
         smq_list_df["SmqAlgorithm"] = smq_list_df["smq_algorithm"]
 
-        final_df = smq_list_df[self._output_columns].drop_duplicates()
-        final_df.to_csv(output_stream, sep="\t", header=False, index=False, mode="a")
-
-        self.logger.info(f"{len(final_df)} MeddraSMQs written.")
+        return smq_list_df[self._output_columns].drop_duplicates()
@@ -0,0 +1,301 @@
+###
+### Classes defining MedDRA version delta files
+###
+### Each generator compares the output of a full MedDRA generator (e.g. MeddraTerm)
+### for two MedDRA versions and writes only added, removed and changed rows, with a
+### Change column.  The delta load schemas extend the schema of the full generator,
+### and build_pskg_graph.py writes the script applying the delta files to a graph
+### loaded with the previous version (load_scripts.meddra_delta_script).
+###
+
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from data_edges import meddra_ontology
+from data_prep import meddra_diff, meddra_dictionary, meddra_hierarchy
+from graph_objects import schema, utils
+from . import meddra
+
+# Rows merged and removed by the delta load script
+_MERGED = "r.Change <> 'removed'"
+_REMOVED = "r.Change = 'removed'"
+
+
+def delta_schema(load_schema, extra_columns=(), merges=None, removals=()):
+    """
+    Load schema of a delta file, from the load schema of the full file
+
+    Parameters
+    ----------
+    load_schema: schema.LoadSchema
+        Schema of the full generator
+    extra_columns: list, optional
+        Names of string columns written after the full file columns
+    merges: list, optional
+        Nodes and relationships merged from added and changed rows, defaults to
+        those of load_schema.  Links removed by a delta are deleted first.
+    removals: list, optional
+        schema.NodeRemoval objects applied to removed rows
+
+    Returns
+    -------
+    schema.LoadSchema
+        Schema of the full file columns, extra_columns and Change
+    """
+    merges = load_schema.merges if merges is None else merges
+    link_removals = [
+        schema.RelationshipRemoval(m.type, m.start, m.end, key=m.key)
+        for m in merges
+        if isinstance(m, schema.Relationship)
+    ]
+    return schema.LoadSchema(
+        columns=load_schema.columns
+        + [schema.Column(c) for c in extra_columns]
+        + [schema.Column("Change")],
+        merges=[schema.rows_where(m, _REMOVED) for m in link_removals]
+        + [schema.rows_where(m, _MERGED) for m in merges]
+        + [schema.rows_where(m, _REMOVED) for m in removals],
+    )
+
+
+class MeddraDelta(utils.Generator):
+    """
+    Base class for MedDRA delta generators, subclasses define the source generator
+    class, the key columns of its rows and get_frame()
+    """
+
+    _source_class = None
+    _key_columns = []
+    _ignore_columns = []
+    _changed = meddra_diff.CHANGED
+
+    def __init__(
+        self,
+        s3_bucket=None,
+        s3_key=None,
+        folder_path=None,
+        meddra_version=None,
+        previous_s3_key=None,
+        previous_folder_path=None,
+        previous_version=None,
+    ):
+        """
+        Create a MedDRA delta generator.  Either an s3_bucket and both keys, or both
+        folder paths are required.
+
+        Parameters
+        ----------
+        s3_bucket: str, optional
+        s3_key: str, optional
+            Key within s3_bucket of the current MedDRA distribution folder
+        folder_path: str or Path, optional
+            Local folder of the current MedDRA distribution
+        meddra_version: str, optional
+            Current MedDRA version, e.g. v24.0
+        previous_s3_key: str, optional
+            Key within s3_bucket of the previous MedDRA distribution folder
+        previous_folder_path: str or Path, optional
+            Local folder of the previous MedDRA distribution
+        previous_version: str, optional
+            Previous MedDRA version, e.g. v23.1
+        """
+        super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=folder_path)
+        self.meddra_version = meddra_version
+        self.previous_version = previous_version
+        if previous_folder_path:
+            self.previous_source = dict(
+                s3_bucket=None,
+                s3_key=None,
+                folder_path=Path(previous_folder_path),
+            )
+        else:
+            self.previous_source = dict(
+                s3_bucket=self.s3_bucket, s3_key=previous_s3_key, folder_path=None
+            )
+
+        # Full generator for the current version, used to assemble rows
+        self.source = self._source_class(
+            s3_bucket=s3_bucket, s3_key=s3_key, folder_path=folder_path
+        )
+        self.logger = logging.getLogger(f"pskg_loader.{type(self).__name__}")
+        self.logger.info(f"Created {self}")
+
+    def get_frame(self, dictionary):
+        """
+        Rows of the source generator for one MedDRA version
+        """
+        raise NotImplementedError
+
+    def _current_dictionary(self):
+        return meddra_dictionary.load_dictionary(
+            version=self.meddra_version,
+            s3_bucket=self.s3_bucket,
+            s3_key=self.s3_key,
+            folder_path=self.file_path,
+        )
+
+    def release_version(self):
+        """
+        Current MedDRA version as recorded in its release file, None without one
+        """
+        release_df = self._current_dictionary().release
+        if release_df is None or release_df.empty:
+            return None
+        return release_df["version"].iloc[0]
+
+    def _add_manifest_data(self, dictionary, s3_bucket, s3_key, folder_path):
+        """
+        Record manifest data for each MedDRA file read for this delta
+        """
+        for file_type, file_name in self.source.meddra_files.items():
+            if folder_path:
+                file_path = Path(folder_path) / file_name
+                if not file_path.exists():
+                    continue
+                self.manifest_data.append(
+                    self.get_manifest_data(
+                        rows=dictionary.row_counts[file_type], file_path=file_path
+                    )
+                )
+            else:
+                self.manifest_data.append(
+                    self.get_manifest_data(
+                        rows=dictionary.row_counts[file_type],
+                        s3_bucket=s3_bucket,
+                        s3_key=f"{s3_key}/{file_name}",
+                    )
+                )
+
+    def write_objects(self, output_stream):
+        """
+        Compare the previous and current MedDRA versions and write the changed rows to
+        an existing open output_stream.  Caller is responsible for creating the output
+        stream and eventually closing it.
+
+        Parameters
+        ----------
+        output_stream: object
+            Open stream for output, data will be appended to this stream
+
+        Returns
+        -------
+        None
+        """
+        current = self._current_dictionary()
+        previous = meddra_dictionary.load_dictionary(
+            version=self.previous_version, **self.previous_source
+        )
+        self._add_manifest_data(current, self.s3_bucket, self.s3_key, self.file_path)
+        self._add_manifest_data(previous, **self.previous_source)
+
+        delta_df = meddra_diff.diff_frames(
+            self.get_frame(previous),
+            self.get_frame(current),
+            key_columns=self._key_columns,
+            changed=self._changed,
+            ignore_columns=self._ignore_columns,
+        )
+        self.format_output(delta_df[self._output_columns]).to_csv(
+            output_stream, sep="\t", header=False, index=False, mode="a"
+        )
+
+        counts = delta_df["Change"].value_counts().to_dict()
+        self.logger.info(
+            f"{len(delta_df)} written {counts} "
+            f"({self.previous_version} to {self.meddra_version})."
+        )
+
+
+class MeddraTermDelta(MeddraDelta):
+    # Removed terms still referenced by case data are kept
+    _schema = delta_schema(
+        meddra.MeddraTerm._schema,
+        removals=[
+            schema.NodeRemoval(
+                meddra.MEDDRA_LABELS,
+                key="MeddraId",
+                label_column="MeddraType",
+                unlink=["MEDDRA_LINK", "MEDDRA_SMQ_CONTAINS", "MEDDRA_SMQ_CLOSURE"],
+            )
+        ],
+    )
+    _output_columns = _schema.column_names
+    _source_class = meddra.MeddraTerm
+    _key_columns = ["MeddraId"]
+    # Every term carries the version, it is updated separately on load
+    _ignore_columns = ["MeddraVersion", "MeddraLanguage"]
+    _changed = "renamed"
+
+    def get_frame(self, dictionary):
+        return self.source.get_terms_df(dictionary)
+
+
+class MeddraSMQDelta(MeddraDelta):
+    _schema = delta_schema(
+        meddra.MeddraSMQ._schema,
+        removals=[schema.NodeRemoval("MeddraSmq", key="MeddraSmqCode")],
+    )
+    _output_columns = _schema.column_names
+    _source_class = meddra.MeddraSMQ
+    _key_columns = ["MeddraSmqCode"]
+
+    def get_frame(self, dictionary):
+        return self.source.get_smq_df(dictionary)
+
+
+class MeddraOntologyDelta(MeddraDelta):
+    _schema = delta_schema(
+        meddra_ontology.MeddraOntology._schema,
+        extra_columns=["MeddraTypeFrom", "MeddraTypeTo"],
+    )
+    _output_columns = _schema.column_names
+    _source_class = meddra_ontology.MeddraOntology
+    # Re-parented terms appear as a removed and an added link
+    _key_columns = ["MeddraIdFrom", "MeddraIdTo"]
+
+    def get_frame(self, dictionary):
+        return self.source.get_links_df(meddra_hierarchy.get_hierarchy(dictionary))
+
+
+class MeddraSMQContainsDelta(MeddraDelta):
+    # SMQ and PT contents share the MeddraId column, read as a code for SMQs
+    _schema = delta_schema(
+        meddra_ontology.MeddraSMQContainsTerm._schemas[False],
+        merges=[
+            schema.Relationship(
+                "MEDDRA_SMQ_CONTAINS",
+                start=schema.Endpoint("MeddraSmq", "MeddraSmqCode"),
+                end=schema.Endpoint(
+                    "MeddraSmq", "MeddraSmqCode", "MeddraId", type="integer"
+                ),
+                properties=merge.properties,
+            )
+            for merge in meddra_ontology.MeddraSMQContainsTerm._schemas[True].merges
+        ]
+        + meddra_ontology.MeddraSMQContainsTerm._schemas[False].merges,
+    )
+    _output_columns = _schema.column_names
+    _source_class = meddra_ontology.MeddraSMQContainsTerm
+    _key_columns = ["MeddraSmqCode", "MeddraId", "TermLevel"]
+
+    def get_frame(self, dictionary):
+        return pd.concat(
+            [
+                self.source.get_content_df(dictionary, smq=True),
+                self.source.get_content_df(dictionary, smq=False),
+            ],
+            ignore_index=True,
+        )
+
+
+class MeddraSMQClosureDelta(MeddraDelta):
+    _schema = delta_schema(meddra_ontology.MeddraSMQClosure._schema)
+    _output_columns = _schema.column_names
+    _source_class = meddra_ontology.MeddraSMQClosure
+    # As merged by the load scripts
+    _key_columns = ["MeddraSmqCode", "MeddraId", "Scope", "Category"]
+
+    def get_frame(self, dictionary):
+        return self.source.get_closure_df(dictionary)
@@ -4,19 +4,23 @@
 
 import logging
 
-from data_prep import meddracq as mcqdp
-from graph_objects import utils
+from data_prep import meddracq_index
+from graph_objects import schema, utils
 
 
 class MeddraCq(utils.Generator):
-    _output_columns = [
-        "Name",
-        "Abbreviation",
-        "Description",
-        "Authors",
-        "CreatedDate",
-        "Source",
-    ]
+    _schema = schema.LoadSchema(
+        columns=[
+            schema.Column("Name"),
+            schema.Column("Abbreviation"),
+            schema.Column("Description"),
+            schema.Column("Authors"),
+            schema.Column("CreatedDate", "datetime"),
+            schema.Column("Source"),
+        ],
+        merges=[schema.Node("MeddraCq", key="Name")],
+    )
+    _output_columns = _schema.column_names
 
     def __init__(self, s3_bucket=None, s3_key=None, file_path=None):
         super().__init__(s3_bucket=s3_bucket, s3_key=s3_key, file_path=file_path)
@@ -31,7 +35,7 @@ class MeddraCq(utils.Generator):
         self.logger.info(f"Created {self}")
 
     def write_objects(self, output_stream):
-        results = mcqdp.read_raw_meta_data(self.file_path)
+        results = meddracq_index.load_index(self.file_path).meta
 
         self.manifest_data = []
 
@@ -39,6 +43,8 @@ class MeddraCq(utils.Generator):
 
         final_df = results[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, sep="\t", header=False, mode="a")
+        self.format_output(final_df).to_csv(
+            output_stream, index=False, sep="\t", header=False, mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
@@ -4,7 +4,7 @@
 
 import logging
 
-from data_prep import vaers
+from data_prep import ids, vaers
 from data_prep.outcomes import OutcomeMapper
 from . import case
 
@@ -71,11 +71,11 @@ class VaersCase(case.Case):
             self.get_manifest_data(df=vaers_df, tag=self.data_file)
         )
 
-        vaers_outcomes = vaers_df.apply(
-            OutcomeMapper.derive_outcomes, axis=1, dataset=self.data_set
+        vaers_outcomes = OutcomeMapper.derive_outcomes_frame(
+            vaers_df, dataset=self.data_set
         )
 
-        vaers_df["CaseId"] = vaers_df.apply(vaers.derive_case_id, axis=1)
+        vaers_df["CaseId"] = vaers.derive_case_codes(vaers_df)
         vaers_df["SourceCaseId"] = vaers_df["VAERS_ID"]
         vaers_df["Tag"] = self.data_set_tag
         vaers_df["DataSource"] = self.data_source
@@ -89,8 +89,12 @@ class VaersCase(case.Case):
         vaers_df["HospitalizationLengthInDays"] = vaers_df["NUMDAYS"]
         vaers_df["ReportType"] = ""
         vaers_df["PatientRecovered"] = vaers_df["RECOVD"]
+        # VAERS reports are not versioned
+        vaers_df["Current"] = True
 
         final_df = vaers_df[self._output_columns].drop_duplicates()
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
@@ -8,7 +8,8 @@ from pathlib import Path
 import pandas as pd
 
 from . import drug
-from data_prep import id_management, s3_utils, vaers
+from data_prep import id_management, ids, s3_utils, vaers
+from data_prep import normalize
 
 
 class VaersVaccine(drug.Vaccine):
@@ -128,25 +129,30 @@ class VaersVaccine(drug.Vaccine):
         # TODO: Refactor name resolution in favor of standards based approach (i.e.
         # use UMLS or WHO data)
         vaers_vax_df["OriginalName"] = vaers_vax_df["VAX_NAME"]
-        vaers_vax_df["Manufacturer"] = vaers_vax_df["VAX_MANU"].apply(
-            vaers.standardize_manufacturer_names
+        vaers_vax_df["Manufacturer"] = normalize.apply_unique(
+            vaers_vax_df["VAX_MANU"], vaers.standardize_manufacturer_names
         )
-        vaers_vax_df["TradeName"] = vaers_vax_df["VAX_NAME"].apply(vaers.get_trade_name)
-        vaers_vax_df["GenericName"] = vaers_vax_df["VAX_NAME"].apply(
-            vaers.get_generic_name
+        vaers_vax_df["TradeName"] = normalize.apply_unique(
+            vaers_vax_df["VAX_NAME"], vaers.get_trade_name
         )
-        vaers_vax_df["VaccineId"] = vaers_vax_df.apply(
-            id_management.get_vaccine_id,
+        vaers_vax_df["GenericName"] = normalize.apply_unique(
+            vaers_vax_df["VAX_NAME"], vaers.get_generic_name
+        )
+        vaers_vax_df["VaccineId"] = id_management.get_vaccine_codes(
+            vaers_vax_df,
             drug_column="VAX_NAME",
             manufacturer_column="Manufacturer",
             data_source=self.data_source,
-            axis=1,
         )
-        vaers_vax_df["RxNormCui"] = vaers_vax_df["VAX_NAME"].apply(vaers.get_rxcui)
+        vaers_vax_df["RxNormCui"] = normalize.apply_unique(
+            vaers_vax_df["VAX_NAME"], vaers.get_rxcui
+        )
         vaers_vax_df["VaxType"] = vaers_vax_df["VAX_TYPE"]
 
         final_df = vaers_vax_df[self._output_columns].drop_duplicates()
 
-        final_df.to_csv(output_stream, index=False, header=False, sep="\t", mode="a")
+        self.format_output(ids.format_id_columns(final_df)).to_csv(
+            output_stream, index=False, header=False, sep="\t", mode="a"
+        )
 
         self.logger.info(f"{len(final_df)} rows written.")
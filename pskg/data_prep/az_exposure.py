@@ -1,6 +1,6 @@
 import numpy as np
 import pandas as pd
-from . import s3_utils
+from . import ids, normalize, s3_utils
 
 _EXPOSURE_DATA_TYPES = {
     "DosesAdministered": "Int64",
@@ -62,6 +62,15 @@ def derive_exposure_id(input_row):
     )
 
 
+def derive_exposure_ids(df):
+    """
+    Vectorized form of derive_exposure_id, return exposure ids for every row of df
+    """
+    return ids.concat(
+        df["SpotfireCountry"], "|", df["MONTHADMINISTERED"], "|", df["grouping"]
+    )
+
+
 def derive_min_age(age_range):
     return _age_group_mappings.get(age_range)[0]
 
@@ -100,10 +109,10 @@ def process_exposure_subgrouping(data_frame, grouping_cols, value_cols):
 
     melted = melted.dropna(subset=["value"])
 
-    melted["GroupAgeMin"] = melted["grouping"].apply(derive_min_age)
-    melted["GroupAgeMax"] = melted["grouping"].apply(derive_max_age)
-    melted["GroupGender"] = melted["variable"].apply(derive_gender)
-    melted["DoseIdentifier"] = melted["variable"].apply(derive_dose)
+    melted["GroupAgeMin"] = normalize.apply_unique(melted["grouping"], derive_min_age)
+    melted["GroupAgeMax"] = normalize.apply_unique(melted["grouping"], derive_max_age)
+    melted["GroupGender"] = normalize.apply_unique(melted["variable"], derive_gender)
+    melted["DoseIdentifier"] = normalize.apply_unique(melted["variable"], derive_dose)
 
     final = melted[
         [
@@ -206,7 +215,7 @@ def raw_load(input_bucket=None, input_key=None, file_path=None):
             skiprows=[0, 1, 2, 3],
         )
 
-    az_exposure_df["ExposureId"] = az_exposure_df.apply(derive_exposure_id, axis=1)
+    az_exposure_df["ExposureId"] = derive_exposure_ids(az_exposure_df)
     az_exposure_df["EndDate"] = pd.to_datetime(
         az_exposure_df["MONTHADMINISTERED"], format="%Y%m"
     ).dt.date
@@ -1,6 +1,6 @@
 from datetime import timedelta
 import pandas as pd
-from . import s3_utils
+from . import csv_engine, ids, normalize, s3_utils
 
 _CDC_DATA_TYPES = {
     "Vaccine": str,
@@ -23,6 +23,13 @@ def derive_exposure_id(input_row):
     )
 
 
+def derive_exposure_ids(df):
+    """
+    Vectorized form of derive_exposure_id, return exposure ids for every row of df
+    """
+    return ids.concat(df["Vaccine"], "|", ids.format_dates(df["Datetime"], "%Y%m%d"))
+
+
 def get_dtypes():
     return _CDC_DATA_TYPES
 
@@ -92,7 +99,7 @@ def raw_load(input_bucket=None, input_key=None, file_path=None):
         )
 
     if file_path:
-        cdc_df = pd.read_csv(
+        cdc_df = csv_engine.read_csv(
             file_path,
             dtype=get_dtypes(),
             parse_dates=get_date_parser(),
@@ -106,8 +113,10 @@ def raw_load(input_bucket=None, input_key=None, file_path=None):
         )
 
     # Derive a new unique ID for the Vaccine records
-    cdc_df["Vaccine"] = cdc_df["Vaccine"].apply(standardize_vaccine_names)
-    cdc_df["ExposureId"] = cdc_df.apply(derive_exposure_id, axis=1)
+    cdc_df["Vaccine"] = normalize.apply_unique(
+        cdc_df["Vaccine"], standardize_vaccine_names
+    )
+    cdc_df["ExposureId"] = derive_exposure_ids(cdc_df)
     cdc_df["Date"] = cdc_df["Datetime"].dt.date
 
     return cdc_df
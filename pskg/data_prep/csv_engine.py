@@ -0,0 +1,219 @@
+###
+### CSV reading engines
+###
+### Source CSV files (VAERS, CDC, geocoding) are read with pandas by default.  The
+### "arrow" engine uses the pyarrow multithreaded block parser instead, which also
+### transcodes non UTF-8 input (e.g. latin-1 VAERS files) as it streams.  Arrow
+### results are converted to the same pandas frame the pandas engine produces, so
+### callers do not depend on the engine in use.
+###
+
+import csv
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+logger = logging.getLogger("pskg_loader.csv_engine")
+
+_CSV_OPTIONS = {"engine": "pandas", "block_size": None}
+
+CSV_ENGINES = ["pandas", "arrow"]
+
+# Strings read as missing values by both engines unless keep_default_na is False, the
+# same set pandas read_csv uses by default
+DEFAULT_NA_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "n/a",
+    "nan",
+    "null",
+]
+
+_arrow_types = {int: pa.int64(), float: pa.float64(), str: pa.string()}
+
+
+def _arrow_type(column, dtype):
+    """
+    Arrow type to read a column of the given pandas dtype with.  None (pyarrow
+    infers the type) for other dtypes, which are converted with astype after the
+    read; text dtypes (e.g. "category") are read as strings.
+    """
+    if dtype in _arrow_types:
+        return _arrow_types[dtype]
+    try:
+        pandas_dtype = pd.api.types.pandas_dtype(dtype)
+    except TypeError:
+        raise ValueError(
+            f"Column {column}: dtype {dtype!r} is not supported by the arrow CSV engine"
+        )
+    if isinstance(pandas_dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(
+        pandas_dtype
+    ):
+        return pa.string()
+    return None
+
+
+def set_csv_engine(engine="pandas", block_size=None):
+    """
+    Configure the engine used to read source CSV files
+
+    Parameters
+    ----------
+    engine: str, optional
+        "pandas" (the default) or "arrow"
+    block_size: int, optional
+        Size in bytes of the blocks parsed concurrently by the arrow engine,
+        defaults to the pyarrow default
+    """
+    if engine not in CSV_ENGINES:
+        raise ValueError(f"CSV engine '{engine}', {CSV_ENGINES} are allowed")
+    _CSV_OPTIONS["engine"] = engine
+    _CSV_OPTIONS["block_size"] = int(block_size) if block_size else None
+    logger.info(f"CSV options: {_CSV_OPTIONS}")
+
+
+def get_csv_options():
+    """
+    Return a copy of the configured CSV options (engine and block_size)
+    """
+    return dict(_CSV_OPTIONS)
+
+
+def read_csv(
+    source,
+    encoding="utf-8",
+    dtype=None,
+    parse_dates=None,
+    keep_default_na=True,
+    **kwargs,
+):
+    """
+    Read a CSV file with the configured engine
+
+    Parameters
+    ----------
+    source: str, Path or file-like object
+        CSV file, file objects must be seekable for the arrow engine
+    encoding: str, optional
+        Source encoding, defaults to utf-8
+    dtype: type or dict, optional
+        Type for all columns, or for named columns (int, float and str are read
+        directly by the arrow engine, other dtypes are converted after the read)
+    parse_dates: list, optional
+        Columns to parse as dates
+    keep_default_na: bool, optional
+        Read the default missing value strings (e.g. "NA") as missing, defaults
+        to True
+    kwargs: dict
+        Additional keyword arguments for pd.read_csv, the pandas engine is always
+        used when any of these are set (i.e. not None)
+
+    Returns
+    -------
+    pd.DataFrame
+        File contents
+    """
+    kwargs = {k: v for k, v in kwargs.items() if v is not None}
+    if _CSV_OPTIONS["engine"] == "arrow" and not kwargs:
+        return _arrow_read_csv(
+            source,
+            encoding=encoding,
+            dtype=dtype,
+            parse_dates=parse_dates,
+            keep_default_na=keep_default_na,
+        )
+
+    # The default missing values are passed explicitly, so both engines share them
+    na_values = list(DEFAULT_NA_VALUES) if keep_default_na else []
+    na_values += list(kwargs.pop("na_values", None) or [])
+    return pd.read_csv(
+        source,
+        encoding=encoding,
+        dtype=dtype,
+        parse_dates=parse_dates,
+        keep_default_na=False,
+        na_values=na_values,
+        **kwargs,
+    )
+
+
+def _peek_column_names(source, encoding):
+    """
+    Read the header line of a CSV file, restoring the position of file objects
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            header = f.readline()
+    else:
+        position = source.tell()
+        header = source.readline()
+        source.seek(position)
+    return next(csv.reader([header.decode(encoding).lstrip("\ufeff")]))
+
+
+def _arrow_read_csv(source, encoding, dtype, parse_dates, keep_default_na):
+    """
+    Read a CSV file with the pyarrow multithreaded parser, returning the frame
+    pd.read_csv would
+    """
+    if dtype is None:
+        dtypes = {}
+    elif isinstance(dtype, dict):
+        dtypes = dict(dtype)
+    else:
+        dtypes = {c: dtype for c in _peek_column_names(source, encoding)}
+    column_types = {c: _arrow_type(c, t) for c, t in dtypes.items()}
+    # Dtypes converted once the frame is built
+    converted = {c: t for c, t in dtypes.items() if t not in _arrow_types}
+    column_types = {c: t for c, t in column_types.items() if t is not None}
+    for c in parse_dates or []:
+        column_types[c] = pa.string()
+
+    read_options = pa_csv.ReadOptions(use_threads=True, encoding=encoding)
+    if _CSV_OPTIONS["block_size"]:
+        read_options.block_size = _CSV_OPTIONS["block_size"]
+    convert_options = pa_csv.ConvertOptions(
+        column_types=column_types,
+        null_values=DEFAULT_NA_VALUES if keep_default_na else [],
+        strings_can_be_null=keep_default_na,
+        quoted_strings_can_be_null=keep_default_na,
+        timestamp_parsers=[],
+    )
+    table = pa_csv.read_csv(
+        str(source) if isinstance(source, Path) else source,
+        read_options=read_options,
+        convert_options=convert_options,
+    )
+
+    df = table.to_pandas(use_threads=True)
+    for field in table.schema:
+        c = field.name
+        if pa.types.is_null(field.type):
+            # Untyped empty columns, pandas reads these as float
+            df[c] = np.nan
+        elif df[c].dtype == object:
+            # pandas represents missing strings as NaN
+            df[c] = df[c].where(df[c].notna(), np.nan)
+    for c, t in converted.items():
+        if c in df.columns:
+            df[c] = df[c].astype(t)
+    for c in parse_dates or []:
+        df[c] = pd.to_datetime(df[c])
+    return df
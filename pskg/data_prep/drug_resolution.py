@@ -0,0 +1,235 @@
+###
+### Persistent drug name resolution cache
+###
+### EudraVigilance suspect and concomitant drug lists repeat the same raw drug
+### strings in every extract.  Each distinct string is resolved once (manufacturer,
+### generic/trade names, vaccine type, vaccine-by-name class and aligned ids) and
+### the results are kept in a SQLite database, keyed by data source, raw string
+### and rule version, so later builds only resolve strings they have not seen.
+### The rule version is a digest of the mapping tables and of the source of the
+### modules holding the resolvers, so editing a mapping or resolver code invalidates
+### earlier entries automatically.
+###
+
+import hashlib
+import json
+import logging
+import sqlite3
+from pathlib import Path
+
+import pandas as pd
+
+from . import eudravigilance as eu, id_management as idm
+
+logger = logging.getLogger("pskg_loader.drug_resolution")
+
+# Digest of the code resolving drug names: this module (_resolve) and the
+# resolvers it calls
+_RULES_CODE = hashlib.sha1(
+    b"".join(Path(f).read_bytes() for f in [__file__, eu.__file__, idm.__file__])
+).hexdigest()
+
+# Raw drug names containing any of these strings are classed as vaccines
+_vaccine_name_terms = ["vax", "vaccine"]
+
+# Resolved attributes, in storage order
+RESOLUTION_COLUMNS = [
+    "Manufacturer",
+    "GenericName",
+    "TradeName",
+    "VaxType",
+    "NamedVaccine",
+    "VaccineId",
+    "MedicationId",
+]
+
+_CACHE_OPTIONS = {"cache_file": None}
+
+# Resolutions made during this run, by (data_source, rule_version)
+_resolved = {}
+
+_create_table_sql = """
+CREATE TABLE IF NOT EXISTS drug_resolution (
+    data_source TEXT NOT NULL,
+    raw_name TEXT NOT NULL,
+    rule_version TEXT NOT NULL,
+    manufacturer TEXT,
+    generic_name TEXT,
+    trade_name TEXT,
+    vax_type TEXT,
+    named_vaccine INTEGER,
+    vaccine_id TEXT,
+    medication_id TEXT,
+    PRIMARY KEY (data_source, raw_name, rule_version)
+)
+"""
+
+_storage_columns = [
+    "manufacturer",
+    "generic_name",
+    "trade_name",
+    "vax_type",
+    "named_vaccine",
+    "vaccine_id",
+    "medication_id",
+]
+
+
+def set_cache_file(cache_file=None):
+    """
+    Configure the SQLite file used to persist drug resolutions between runs.
+
+    Parameters
+    ----------
+    cache_file: str or Path, optional
+        Location of the cache database, created if absent.  None (the default)
+        keeps resolutions in memory for the current run only.
+    """
+    _CACHE_OPTIONS["cache_file"] = Path(cache_file) if cache_file else None
+    logger.info(f"Drug resolution cache: {_CACHE_OPTIONS['cache_file']}")
+
+
+def rule_version():
+    """
+    Digest of the mapping tables and resolver code used to resolve drug names
+
+    Returns
+    -------
+    str
+        Hex digest identifying the current resolution rules
+    """
+    rules = {
+        "code": _RULES_CODE,
+        "vaccine_name_terms": _vaccine_name_terms,
+        "manufacturers": eu._drug_manufacturer_mappings,
+        "exact_names": eu._exact_drug_name_mappings,
+        "vax_types": eu._vax_type_mappings,
+        "aligned_vaccine_names": idm._aligned_vaccine_name_ids,
+        "aligned_vaccine_manufacturers": idm._aligned_vaccine_manufacturer_ids,
+        "aligned_medication_names": idm._aligned_medication_name_ids,
+        "aligned_medication_manufacturers": idm._aligned_medication_manufacturer_ids,
+    }
+    return hashlib.sha1(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()[
+        :16
+    ]
+
+
+def resolve_drug_names(drugs, data_source):
+    """
+    Resolve raw drug names, returning one row of resolved attributes per distinct name
+
+    Parameters
+    ----------
+    drugs: array-like
+        Raw drug names (missing values are ignored)
+    data_source: str
+        Data source scoping non-aligned ids (e.g. EUDRAVIGILANCE)
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by raw drug name, with RESOLUTION_COLUMNS
+    """
+    version = rule_version()
+    known = _resolved.get((data_source, version))
+    if known is None:
+        known = _load_cached(data_source, version)
+
+    names = pd.Index(pd.unique(pd.Series(drugs, dtype=object).dropna()))
+    new_names = names.difference(known.index)
+    if len(new_names):
+        logger.info(
+            f"Resolving {len(new_names)} new drug names ({len(names)} requested)"
+        )
+        new_df = _resolve(new_names, data_source)
+        _store_cached(new_df, data_source, version)
+        known = pd.concat([known, new_df])
+
+    _resolved[(data_source, version)] = known
+    return known.loc[names]
+
+
+def _resolve(names, data_source):
+    """
+    Apply the resolution rules to previously unseen drug names
+    """
+    result = pd.DataFrame(index=pd.Index(names, name="drug"))
+    result["drug"] = result.index
+    result["Manufacturer"] = result["drug"].map(eu.ev_simple_classify_manufacturer)
+    result["GenericName"] = result["drug"].map(
+        eu.ev_simple_standardize_generic_drug_names
+    )
+    result["TradeName"] = result["drug"].map(eu.ev_simple_standardize_trade_drug_name)
+    result["VaxType"] = result["drug"].map(eu.ev_simple_vax_type)
+    result["NamedVaccine"] = result["drug"].str.contains(
+        "|".join(_vaccine_name_terms), case=False, regex=True
+    )
+    result["VaccineId"] = idm.get_vaccine_ids(result, data_source=data_source)
+    result["MedicationId"] = idm.get_medication_ids(result, data_source=data_source)
+    return result[RESOLUTION_COLUMNS]
+
+
+def _empty_resolutions():
+    empty = pd.DataFrame(
+        columns=RESOLUTION_COLUMNS, index=pd.Index([], name="drug"), dtype=object
+    )
+    return empty.astype({"NamedVaccine": bool})
+
+
+def _connect():
+    cache_file = _CACHE_OPTIONS["cache_file"]
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(cache_file)
+    conn.execute(_create_table_sql)
+    return conn
+
+
+def _load_cached(data_source, version):
+    """
+    Load all cached resolutions for data_source made with the given rule version
+    """
+    if _CACHE_OPTIONS["cache_file"] is None:
+        return _empty_resolutions()
+
+    with _connect() as conn:
+        cached = pd.read_sql_query(
+            f"SELECT raw_name, {', '.join(_storage_columns)} FROM drug_resolution "
+            "WHERE data_source = ? AND rule_version = ?",
+            conn,
+            params=(data_source, version),
+        )
+    conn.close()
+
+    logger.info(
+        f"Loaded {len(cached)} cached drug resolutions (rule version {version})"
+    )
+    if cached.empty:
+        return _empty_resolutions()
+
+    cached["named_vaccine"] = cached["named_vaccine"].astype(bool)
+    cached = cached.set_index("raw_name").rename_axis("drug")
+    cached.columns = RESOLUTION_COLUMNS
+    return cached
+
+
+def _store_cached(resolved_df, data_source, version):
+    """
+    Persist newly resolved names
+    """
+    if _CACHE_OPTIONS["cache_file"] is None:
+        return
+
+    rows = [
+        (data_source, name, version, *values[:4], int(values[4]), *values[5:])
+        for name, values in zip(
+            resolved_df.index, resolved_df[RESOLUTION_COLUMNS].itertuples(index=False)
+        )
+    ]
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO drug_resolution "
+            f"(data_source, raw_name, rule_version, {', '.join(_storage_columns)}) "
+            f"VALUES ({', '.join(['?'] * (3 + len(_storage_columns)))})",
+            rows,
+        )
+    conn.close()
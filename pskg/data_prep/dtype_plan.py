@@ -0,0 +1,116 @@
+###
+### Compact column types
+###
+### Source frames declare a dtype plan (column -> dtype, e.g. vaers._VAERS_DATA_TYPES).
+### Low cardinality text (state, sex, manufacturer...) is held as "category", numeric
+### columns are downcast (e.g. "int32", "float32") and high cardinality free text uses
+### Arrow backed strings (COMPACT_STRING).  Files are read with the plain types from
+### read_dtypes(), apply_plan() then converts the loaded frame, optionally recording
+### memory use before and after for memory_report().
+###
+
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger("pskg_loader.dtype_plan")
+
+# High cardinality text
+COMPACT_STRING = "string[pyarrow]"
+
+# Types used to read each planned dtype
+_read_types = {
+    "category": str,
+    COMPACT_STRING: str,
+    "int32": int,
+    "float32": float,
+}
+
+_REPORT_OPTIONS = {"enabled": False}
+
+# Memory use recorded by apply_plan, see memory_report()
+_memory_usage = []
+
+
+def set_memory_report(enabled=False):
+    """
+    Record memory use of every frame converted by apply_plan, enabling memory_report().
+    Measuring text columns reads every value, so this is off by default.
+
+    Parameters
+    ----------
+    enabled: bool, optional
+        Record memory use, defaults to False
+    """
+    _REPORT_OPTIONS["enabled"] = bool(enabled)
+
+
+def read_type_settings():
+    """
+    Return a copy of the read type of each planned dtype (see read_dtypes)
+    """
+    return dict(_read_types)
+
+
+def read_dtypes(plan):
+    """
+    Column types to read a file with before apply_plan() (str, int or float)
+
+    Parameters
+    ----------
+    plan: dict
+        Planned dtype by column
+
+    Returns
+    -------
+    dict
+        Read type by column
+    """
+    return {c: _read_types.get(t, t) for c, t in plan.items()}
+
+
+def apply_plan(df, plan, name=None):
+    """
+    Convert the planned columns of df in place, columns not in df are ignored
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Frame read with read_dtypes(plan)
+    plan: dict
+        Planned dtype by column
+    name: str, optional
+        Frame name used in memory_report()
+
+    Returns
+    -------
+    pd.DataFrame
+        df
+    """
+    if _REPORT_OPTIONS["enabled"]:
+        before = df.memory_usage(deep=True).sum()
+
+    for c, t in plan.items():
+        if c in df.columns and t in _read_types:
+            df[c] = df[c].astype(t)
+
+    if _REPORT_OPTIONS["enabled"]:
+        _memory_usage.append((name, len(df), before, df.memory_usage(deep=True).sum()))
+    return df
+
+
+def memory_report():
+    """
+    Memory used by frames converted by apply_plan(), while memory reporting is enabled
+
+    Returns
+    -------
+    pd.DataFrame
+        | Frame | Rows | BeforeMB | AfterMB | Saving |
+    """
+    report_df = pd.DataFrame(
+        _memory_usage, columns=["Frame", "Rows", "BeforeMB", "AfterMB"]
+    )
+    report_df[["BeforeMB", "AfterMB"]] = report_df[["BeforeMB", "AfterMB"]] / 2**20
+    report_df["Saving"] = 1 - report_df["AfterMB"] / report_df["BeforeMB"]
+    return report_df.round(3)
@@ -1,11 +1,20 @@
 import pandas as pd
 import re
+import io
+import os
 import math
+import mmap
+import tempfile
 import xml.sax
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 import logging
 
-from . import s3_utils
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from . import dtype_plan, ids, normalize, s3_utils
 from .outcomes import OutcomeMapper
 
 # Logging
@@ -23,6 +32,9 @@ _primary_source_column = "Primary Source Country for Regulatory Purposes"
 # Regex to parse term format, this is sufficient for ae terms
 _term_re = re.compile(r"(?P<term>.+) [(](?P<dur>.+) - (?P<outcome>.+) - (?P<sc>.*)[)]")
 
+# Delimiter used between entries of multi-valued line listing columns
+_ev_list_delimiter = ",<BR><BR>"
+
 # Regex to handle: Concomitant/Not Administered Drug List (Drug Char - Indication PT - Action taken - [Duration - Dose - Route])
 _simple_drug_re = re.compile(
     r"^(?P<drug>.+) \((?P<char>.+?) - (?P<ind>.+?) - (?P<action>.+?)(?P<dpres> - ){0,1}(?(dpres)\[(?P<dur>.+?) - (?P<dose>.+?) - (?P<route>.+?)\])\).*$"
@@ -82,22 +94,32 @@ _exact_drug_name_mappings = {
 # Drug type mappings
 _vax_type_mappings = {"COVID-19": "COVID19", "TOZINAMERAN": "COVID19"}
 
+# Compiled forms of the substring mappings above
+_drug_manufacturer_classifier = normalize.SubstringClassifier(
+    _drug_manufacturer_mappings
+)
+_vax_type_classifier = normalize.SubstringClassifier(
+    [(v, [k]) for k, v in _vax_type_mappings.items()]
+)
+
 
+# Compact dtype plan (see dtype_plan), case identifiers and drug/reaction lists are
+# kept as str for the id and list parsing helpers
 _EU_DATA_TYPES = {
     _eu_local_number: str,
     _world_wide_case_id: str,
-    "Report Type": str,
-    "Primary Source Qualification": str,
-    _primary_source_column: str,
-    "Literature Reference": str,
-    "Patient Age Group": str,
-    "Patient Age Group (as per reporter)": str,
-    "Patient Sex": str,
-    "Parent Child Report": str,
+    "Report Type": "category",
+    "Primary Source Qualification": "category",
+    _primary_source_column: "category",
+    "Literature Reference": dtype_plan.COMPACT_STRING,
+    "Patient Age Group": "category",
+    "Patient Age Group (as per reporter)": "category",
+    "Patient Sex": "category",
+    "Parent Child Report": "category",
     "Reaction List PT (Duration – Outcome - Seriousness Criteria)": str,
     _suspect_drug_list: str,
     _concomitant_drug_list: str,
-    "ICSR Form": str,
+    "ICSR Form": "category",
 }
 
 _PARSE_OPTIONS = {
@@ -134,6 +156,22 @@ ALL_EU_OUTCOMES = (
 )
 logger.info(f"All outcomes: {ALL_EU_OUTCOMES}")
 
+# XML line listings can be split into segments and parsed by multiple processes,
+# see set_xml_parse_workers()
+_XML_PARSE_OPTIONS = {
+    "workers": 1,
+    "min_segment_bytes": 32 * 1024 * 1024,
+}
+
+# Case versions read by EudraVigilanceCase during this run, by source file, see
+# register_case_versions()
+_case_versions = {}
+
+# Record boundaries within an XML line listing
+_xml_record_start = b"<R>"
+_xml_record_end = b"</R>"
+_xml_schema_end = b"</xsd:schema>"
+
 
 def find_line_listing_files(
     data_set_tag, input_bucket=None, prefix="EudraVigilance", folder_path=None, 
@@ -202,10 +240,35 @@ def get_dtypes():
     return _EU_DATA_TYPES
 
 
+def get_read_dtypes():
+    return dtype_plan.read_dtypes(_EU_DATA_TYPES)
+
+
 def get_date_parser():
     return _PARSE_OPTIONS["parse_dates"]
 
 
+def set_xml_parse_workers(workers=1, min_segment_bytes=None):
+    """
+    Configure the number of processes used to parse XML line listing files.
+
+    Parameters
+    ----------
+    workers: int, optional
+        Number of worker processes, 0 or None uses all available cores, defaults to 1
+        (single threaded SAX parse)
+    min_segment_bytes: int, optional
+        Smallest segment handed to a single worker, files are never split into segments
+        smaller than this
+    """
+    if not workers:
+        workers = os.cpu_count() or 1
+    _XML_PARSE_OPTIONS["workers"] = max(1, int(workers))
+    if min_segment_bytes:
+        _XML_PARSE_OPTIONS["min_segment_bytes"] = int(min_segment_bytes)
+    logger.info(f"XML parse options: {_XML_PARSE_OPTIONS}")
+
+
 def derive_case_id(
     row, native_id_column=_eu_local_number, receipt_date_column=_gateway_receipt_date    
 ):
@@ -227,11 +290,174 @@ def derive_case_id(
 
     return f"EUDRAVIGILANCE:{row[native_id_column]}-{rd}"
 
+
+def derive_case_ids(
+    df, native_id_column=_eu_local_number, receipt_date_column=_gateway_receipt_date
+):
+    """
+    Vectorized form of derive_case_id, return PSKG case ids for every row of df
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Line listing data
+    native_id_column: str, optional
+        Column to use for native row identifier (defaults to EU local number)
+    receipt_date_column: date
+        Column containing receipt date
+
+    Returns
+    -------
+    pd.Series
+        Case ids, with the index of df
+    """
+    return ids.concat(
+        "EUDRAVIGILANCE:",
+        df[native_id_column],
+        "-",
+        ids.format_dates(df[receipt_date_column], "%Y%m%d"),
+    )
+
+
+def derive_case_codes(
+    df, native_id_column=_eu_local_number, receipt_date_column=_gateway_receipt_date
+):
+    """
+    Interned form of derive_case_ids, return ids.CASE_IDS codes for every row of df
+    """
+    return ids.CASE_IDS.intern_keys(
+        df[[native_id_column, receipt_date_column]],
+        lambda keys: derive_case_ids(
+            keys,
+            native_id_column=native_id_column,
+            receipt_date_column=receipt_date_column,
+        ),
+    )
+
+
+def rank_case_versions(
+    case_df,
+    source_column="SourceCaseId",
+    case_column="CaseId",
+    receipt_date_column=_gateway_receipt_date,
+):
+    """
+    Order the versions of each case by receipt date.  Updated cases share a source
+    case id, and their case ids differ by receipt date (see derive_case_id).
+
+    Parameters
+    ----------
+    case_df: pd.DataFrame
+        Case rows, with source case ids, case ids and receipt dates
+    source_column: str, optional
+        Column with source case ids, defaults to "SourceCaseId"
+    case_column: str, optional
+        Column with case ids, defaults to "CaseId"
+    receipt_date_column: str, optional
+        Column with receipt dates, defaults to the EV gateway receipt date
+
+    Returns
+    -------
+    pd.DataFrame
+        | SourceCaseId | CaseId | receipt date | Version | Current |, one row per case
+        id ordered by source case id and version.  Version 1 is the earliest, and
+        only the latest version is Current.  Cases without a source case id have a
+        single version.
+    """
+    versions_df = case_df[
+        [source_column, case_column, receipt_date_column]
+    ].drop_duplicates(subset=[source_column, case_column])
+
+    versions_df["Version"] = (
+        versions_df.groupby(source_column)[receipt_date_column]
+        .rank(method="first")
+        .fillna(1)
+        .astype(np.int32)
+    )
+    version_counts = (
+        versions_df.groupby(source_column)[case_column]
+        .transform("size")
+        .fillna(1)
+        .astype(np.int32)
+    )
+    versions_df["Current"] = versions_df["Version"] == version_counts
+
+    return versions_df.sort_values(
+        [source_column, "Version"], kind="stable"
+    ).reset_index(drop=True)
+
+
+def link_case_versions(versions_df, source_column="SourceCaseId", case_column="CaseId"):
+    """
+    Link every case version to the version before it
+
+    Parameters
+    ----------
+    versions_df: pd.DataFrame
+        Ranked case versions, see rank_case_versions()
+    source_column: str, optional
+        Column with source case ids, defaults to "SourceCaseId"
+    case_column: str, optional
+        Column with case ids, defaults to "CaseId"
+
+    Returns
+    -------
+    pd.DataFrame
+        | CaseId | PreviousCaseId |
+    """
+    sources = versions_df[source_column]
+    has_previous = (sources.notna() & sources.eq(sources.shift())).to_numpy()
+    case_ids = versions_df[case_column].to_numpy()
+    return pd.DataFrame(
+        {
+            "CaseId": case_ids[has_previous],
+            "PreviousCaseId": case_ids[np.flatnonzero(has_previous) - 1],
+        }
+    )
+
+
+def register_case_versions(source, versions_df):
+    """
+    Record the case versions of an EV source file, so versions can be ordered
+    across all files read in this run
+
+    Parameters
+    ----------
+    source: tuple
+        Source file (e.g. (s3_bucket, s3_key, file_path))
+    versions_df: pd.DataFrame
+        Ranked case versions of the source file, see rank_case_versions()
+    """
+    _case_versions[source] = versions_df
+
+
+def registered_case_versions(source=None):
+    """
+    Ranked case versions registered in this run
+
+    Parameters
+    ----------
+    source: tuple, optional
+        Source file as given to register_case_versions(), defaults to ranking the
+        versions of every registered file together
+
+    Returns
+    -------
+    pd.DataFrame
+        See rank_case_versions(), None if no versions are registered
+    """
+    if source is not None:
+        return _case_versions.get(source)
+    if not _case_versions:
+        return None
+    return rank_case_versions(pd.concat(_case_versions.values(), ignore_index=True))
+
+
 def ev_split_break(column):
     """
     Break up text column delimited on ",<BR><BR>"
     """
-    return column.split(",<BR><BR>") if type(column) == str else None
+    return column.split(_ev_list_delimiter) if type(column) == str else None
 
 
 def ev_extract_term(reaction_list):
@@ -293,7 +519,7 @@ def ev_extract_drug_details(
 ):
     """
     Helper function useful for extracting information from a drug column
-    that has been previously split into a list.
+    containing ",<BR><BR>" delimited drug entries.
     Attempts to isolate drug name (which is often messy), along with
     additional information including the characterization (concomitant, suspect,
     interacting, not administered), indication preferred term, duration
@@ -301,7 +527,7 @@ def ev_extract_drug_details(
     Parameters
     ----------
     drug_column: str
-        A column containing a list of drug information
+        A column containing delimited drug information
     case_id_column: str, optional
         Name of unique identifier for this case, defaults to "CaseId"
     primary_source_column: str, optional
@@ -314,80 +540,45 @@ def ev_extract_drug_details(
     pd.Dataframe
         A dataframe organized by case id and gateway date
     """
-    case_id = []
-    primary_source = []
-    gateway_date = []
-    characterization = []
-    drug = []
-    indication = []
-    action = []
-    dose = []
-    duration = []
-    route = []
-    errors = []
-
-    for _, row in df[
-        [case_id_column, gateway_date_column, drug_column, primary_source_column]
-    ].iterrows():
-        for d in row[drug_column]:
-            clean_d = d.strip()
-            if clean_d:
-                if clean_d == "Not reported" or clean_d == "[Not reported]":
-                    continue
-                case_id.append(row[case_id_column])
-                gateway_date.append(row[gateway_date_column])
-                primary_source.append(row[primary_source_column])
-                details = _simple_drug_re.match(d)
-                if details is None:
-                    drug.append(None)
-                    characterization.append(None),
-                    indication.append(None)
-                    action.append(None)
-                    dose.append(None)
-                    duration.append(None)
-                    route.append(None)
-                    errors.append(f"could not parse: '{clean_d}'")
-                else:
-                    drug.append(details.group("drug"))
-                    characterization.append(details.group("char")),
-                    indication.append(details.group("ind"))
-                    action.append(details.group("action"))
-                    dose.append(details.group("dose"))
-                    duration.append(details.group("dur"))
-                    route.append(details.group("route"))
-                    errors.append("")
+    drug_lists = ev_split_break_array(df[drug_column])
 
-    return pd.DataFrame(
-        list(
-            zip(
-                case_id,
-                primary_source,
-                gateway_date,
-                drug,
-                characterization,
-                indication,
-                action,
-                dose,
-                duration,
-                route,
-                errors,
-            )
-        ),
-        columns=[
-            case_id_column,
-            primary_source_column,
-            gateway_date_column,
-            "drug",
-            "characterization",
-            "indication",
-            "action",
-            "dose",
-            "duration",
-            "route",
-            "errors",
-        ],
+    entries = pd.Series(
+        pc.list_flatten(drug_lists).to_numpy(zero_copy_only=False), dtype=object
+    )
+    parents = pc.list_parent_indices(drug_lists).to_numpy()
+
+    clean_entries = entries.str.strip()
+    keep = (
+        (clean_entries != "")
+        & (clean_entries != "Not reported")
+        & (clean_entries != "[Not reported]")
+    ).to_numpy()
+    entries = entries[keep].reset_index(drop=True)
+    clean_entries = clean_entries[keep].reset_index(drop=True)
+    parents = parents[keep]
+
+    details = entries.str.extract(_simple_drug_re)
+    details = details.astype(object).where(details.notna(), None)
+    parsed = details["drug"].notna()
+
+    result_df = pd.DataFrame(
+        {
+            case_id_column: df[case_id_column].to_numpy()[parents],
+            primary_source_column: df[primary_source_column].to_numpy()[parents],
+            gateway_date_column: df[gateway_date_column].to_numpy()[parents],
+            "drug": details["drug"],
+            "characterization": details["char"],
+            "indication": details["ind"],
+            "action": details["action"],
+            "dose": details["dose"],
+            "duration": details["dur"],
+            "route": details["route"],
+            "errors": ("could not parse: '" + clean_entries + "'").where(~parsed, ""),
+        }
     )
 
+    return result_df
+
 
 def ev_simple_classify_manufacturer(
     drug, drug_name_mappings=_drug_manufacturer_mappings, verbose=False
@@ -418,11 +609,11 @@ def ev_simple_classify_manufacturer(
         logger.warn(f"drug is None.")
         return drug
 
-    for k, v in drug_name_mappings.items():
-        for t in v:
-            if t in drug:
-                return k
-    return drug
+    if drug_name_mappings is _drug_manufacturer_mappings:
+        classifier = _drug_manufacturer_classifier
+    else:
+        classifier = normalize.SubstringClassifier(drug_name_mappings)
+    return classifier.classify(drug, default=drug)
 
 
 def ev_simple_standardize_generic_drug_names(
@@ -477,11 +668,13 @@ def ev_simple_vax_type(drug, vax_type_mapping=_vax_type_mappings):
     contain the string "COVID-19".  This function returns the given type if found in
     the map
     """
-    for k, v in vax_type_mapping.items():
-        if k in drug:
-            return v
+    if vax_type_mapping is _vax_type_mappings:
+        classifier = _vax_type_classifier
     else:
-        return ""
+        classifier = normalize.SubstringClassifier(
+            [(v, [k]) for k, v in vax_type_mapping.items()]
+        )
+    return classifier.classify(drug, default="")
 
 
 def derive_country(case_id):
@@ -714,6 +907,240 @@ def convert_duration_to_days(duration):
         return 0
 
 
+###
+### Arrow list-array support
+###
+### Multi-valued line listing columns (reaction, suspect and concomitant drug lists) are
+### held as Arrow list<string> arrays: a single buffer of values plus an offsets buffer
+### marking where each case's entries begin.  Splitting, flattening and pairwise joins
+### then run as Arrow compute kernels rather than Python loops over per-row lists.
+###
+
+
+def list_array_from_parents(parents, values, length):
+    """
+    Build a list array from a flat array of values and the (sorted) position of the
+    row each value belongs to.  Rows without any values become empty lists.
+
+    Parameters
+    ----------
+    parents: array-like of int
+        Row position for each entry in values, in ascending order
+    values: pa.Array
+        Flat array of values
+    length: int
+        Number of rows in the resulting list array
+
+    Returns
+    -------
+    pa.ListArray
+        List array with one (possibly empty) list per row
+    """
+    counts = np.bincount(np.asarray(parents, dtype=np.int64), minlength=length)
+    offsets = np.zeros(length + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    return pa.ListArray.from_arrays(pa.array(offsets), values)
+
+
+def ev_split_break_array(column):
+    """
+    Vectorized form of ev_split_break, break up a text column delimited on ",<BR><BR>"
+    into an Arrow list array.  Non-string entries become null lists.
+
+    Parameters
+    ----------
+    column: pd.Series
+        Series of delimited strings
+
+    Returns
+    -------
+    pa.ListArray
+        list<string> array aligned by position with column
+    """
+    values = column.where(column.map(type) == str, None)
+    return pc.split_pattern(
+        pa.array(values, type=pa.string(), from_pandas=True),
+        pattern=_ev_list_delimiter,
+    )
+
+
+def ev_extract_term_arrays(reaction_lists):
+    """
+    Vectorized form of ev_extract_term, operating over all cases at once.  Each
+    reaction list entry is split into PT, duration, outcome and seriousness criteria
+    (a nested list), "Not reported" entries are dropped.  Null reaction lists produce
+    empty lists.
+
+    Parameters
+    ----------
+    reaction_lists: pa.ListArray
+        list<string> array of reaction entries, e.g. from ev_split_break_array
+
+    Returns
+    -------
+    dict
+        List arrays keyed by "terms_list", "duration_list", "outcome_list" and
+        "seriousness_criteria_list", all aligned by position with reaction_lists
+    """
+    entries = pc.list_flatten(reaction_lists)
+    parents = pc.list_parent_indices(reaction_lists)
+
+    reported = pc.invert(pc.equal(pc.utf8_lower(entries), "not reported"))
+    entries = entries.filter(reported)
+    parents = parents.filter(reported)
+
+    parts = pc.extract_regex(entries, pattern="^" + _term_re.pattern)
+    if parts.null_count:
+        first = pc.index(pc.is_null(parts), True).as_py()
+        row = parents[first].as_py()
+        raise ValueError(
+            f"Warning: could not match {entries[first].as_py()}, reaction_list={reaction_lists[row].as_py()}."
+        )
+
+    sc_split = pc.split_pattern(parts.field("sc"), pattern=",")
+    seriousness_criteria = pa.ListArray.from_arrays(
+        sc_split.offsets, pc.utf8_trim_whitespace(sc_split.flatten())
+    )
+
+    length = len(reaction_lists)
+    return {
+        "terms_list": list_array_from_parents(parents, parts.field("term"), length),
+        "duration_list": list_array_from_parents(parents, parts.field("dur"), length),
+        "outcome_list": list_array_from_parents(
+            parents, parts.field("outcome"), length
+        ),
+        "seriousness_criteria_list": list_array_from_parents(
+            parents, seriousness_criteria, length
+        ),
+    }
+
+
+def flatten_list_array(list_array):
+    """
+    Vectorized form of merge_lists/simplify_list (without de-duplication), collapse
+    one level of nesting in a list<list<...>> array, keeping one list per row.
+
+    Parameters
+    ----------
+    list_array: pa.ListArray
+        Nested list array
+
+    Returns
+    -------
+    pa.ListArray
+        List array with the inner lists of each row concatenated
+    """
+    inner = list_array.values
+    offsets = pc.take(inner.offsets, list_array.offsets)
+    return pa.ListArray.from_arrays(offsets, inner.values)
+
+
+def join_list_arrays(list1, list2, separator=":"):
+    """
+    Vectorized form of join_and_merge_lists, concatenate the pairwise elements of
+    two list arrays with identical list lengths.  Example:
+        [['1', '5'], ['2']]
+        [['a', 'g'], ['b']]
+    ==> [['1:a', '5:g'], ['2:b']]
+
+    Parameters
+    ----------
+    list1: pa.ListArray
+    list2: pa.ListArray
+    separator: str, optional
+        String placed between paired elements, defaults to ":"
+
+    Returns
+    -------
+    pa.ListArray
+        List array of joined elements, with the offsets of list1
+    """
+    lengths_match = pc.all(
+        pc.equal(pc.list_value_length(list1), pc.list_value_length(list2))
+    )
+    if not lengths_match.as_py():
+        raise ValueError("List arrays must have identical list lengths to be joined.")
+    joined = pc.binary_join_element_wise(
+        pc.list_flatten(list1), pc.list_flatten(list2), separator
+    )
+    return list_array_from_parents(pc.list_parent_indices(list1), joined, len(list1))
+
+
+def explode_list_array(list_array, index, value_name):
+    """
+    Vectorized form of DataFrame.explode, pair each list entry with the index value
+    of its row.  Empty and null lists produce no rows.
+
+    Parameters
+    ----------
+    list_array: pa.ListArray
+        List array aligned by position with index
+    index: pd.Series
+        Values to repeat for each list entry (e.g. CaseId), the series name is
+        used as the column name
+    value_name: str
+        Column name for the list entries
+
+    Returns
+    -------
+    pd.DataFrame
+        Two column data frame of index values and list entries
+    """
+    parents = pc.list_parent_indices(list_array).to_numpy()
+    return pd.DataFrame(
+        {
+            index.name: index.to_numpy()[parents],
+            value_name: pc.list_flatten(list_array).to_numpy(zero_copy_only=False),
+        }
+    )
+
+
+def ev_outcome_indicators(
+    outcome_df,
+    case_id_column="CaseId",
+    outcome_column="outcome_list",
+    outcomes=None,
+):
+    """
+    Build a case by outcome indicator table from exploded outcome mentions.  Case ids
+    and outcomes are converted to categorical codes, and each mention sets a single
+    cell of a preallocated boolean array, so the cost is linear in the number of
+    mentions.  Every known outcome is present as a column; mentions outside the known
+    outcomes still produce a (all False) row for their case.
+
+    Parameters
+    ----------
+    outcome_df: pd.DataFrame
+        One row per outcome mention, e.g. from explode_list_array
+    case_id_column: str, optional
+        Name of case id column, defaults to "CaseId"
+    outcome_column: str, optional
+        Name of outcome column, defaults to "outcome_list"
+    outcomes: list, optional
+        Known outcome vocabulary, defaults to the columns of ALL_EU_OUTCOMES
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per case with a mention, a case id column and a boolean column per
+        known outcome
+    """
+    if outcomes is None:
+        outcomes = list(ALL_EU_OUTCOMES.columns)
+
+    mentions = outcome_df[outcome_df[outcome_column].notna()]
+    case_codes, case_ids = pd.factorize(mentions[case_id_column], sort=True)
+    outcome_codes = pd.Categorical(mentions[outcome_column], categories=outcomes).codes
+
+    known = outcome_codes >= 0
+    indicators = np.zeros((len(case_ids), len(outcomes)), dtype=bool)
+    indicators[case_codes[known], outcome_codes[known]] = True
+
+    result_df = pd.DataFrame(indicators, columns=outcomes)
+    result_df.insert(0, case_id_column, case_ids)
+    return result_df
+
+
 ###
 ### Line Listing Excel Support
 ###
@@ -748,15 +1175,12 @@ def raw_load(input_bucket=None, input_key=None, file_path=None, columns=None):
     if file_path:
         if not isinstance(file_path, Path):
             file_path = Path(file_path)
-        is_xml = file_path.suffix.lower() == "xml"
+        is_xml = file_path.suffix.lower() == ".xml"
         if is_xml:
             # Load EV XML Line Listing format data
-            parser = xml.sax.make_parser()
-            parser.setContentHandler(EudravigilanceStreamHandler())
             logger.info(f"Loading: file://{file_path.as_posix()} (xml)...")
             try:
-                parser.parse(file_path)
-                eu_df = parser.getContentHandler().getDataframe().loc[:, columns]
+                eu_df = xml_file_to_data_frame(file_path).loc[:, columns]
             except Exception as x:
                 logger.error(f"Failed to load: {file_path}")
                 raise
@@ -767,7 +1191,7 @@ def raw_load(input_bucket=None, input_key=None, file_path=None, columns=None):
             try:
                 eu_df = pd.read_excel(
                     file_path,
-                    dtype=get_dtypes(),
+                    dtype=get_read_dtypes(),
                     parse_dates=get_date_parser(),
                     usecols=columns,
                 )
@@ -782,7 +1206,7 @@ def raw_load(input_bucket=None, input_key=None, file_path=None, columns=None):
                 eu_df = s3_utils.excel_file_to_data_frame(
                     bucket=input_bucket,
                     key=input_key,
-                    dtype=get_dtypes(),
+                    dtype=get_read_dtypes(),
                     parse_dates=get_date_parser(),
                     usecols=columns,
                 )
@@ -791,19 +1215,28 @@ def raw_load(input_bucket=None, input_key=None, file_path=None, columns=None):
                 raise
         else:
             # Load EV XML Line Listing format data
-            parser = xml.sax.make_parser()
-            parser.setContentHandler(EudravigilanceStreamHandler())
             logger.info(f"Loading: {input_bucket}/{input_key} (xml)...")
             try:
-                parser.parse(s3_utils.get_file_contents(input_bucket, input_key))
-                eu_df = parser.getContentHandler().getDataframe().loc[:, columns]
+                if _XML_PARSE_OPTIONS["workers"] > 1:
+                    # Segments are read by worker processes, so stage the export locally
+                    with tempfile.TemporaryDirectory() as tmp_folder:
+                        tmp_path = Path(tmp_folder) / Path(input_key).name
+                        with open(tmp_path, "wb") as f:
+                            s3_utils.download_to_file(input_bucket, input_key, f)
+                        eu_df = xml_file_to_data_frame(tmp_path).loc[:, columns]
+                else:
+                    eu_df = xml_file_to_data_frame(
+                        s3_utils.get_file_contents(input_bucket, input_key)
+                    ).loc[:, columns]
             except Exception as x:
                 logger.info(f"Failed to load: {input_bucket}/{input_key}")
                 raise
 
     # Gather all source dfs into a single list
 
-    return eu_df
+    return dtype_plan.apply_plan(
+        eu_df, get_dtypes(), name=Path(file_path or input_key).name
+    )
 
 
 ###
@@ -811,6 +1244,123 @@ def raw_load(input_bucket=None, input_key=None, file_path=None, columns=None):
 ###
 
 
+def find_xml_segments(file_path, segments):
+    """
+    Split an XML line listing file into byte ranges that each hold complete records.
+    Records are <R> elements following the xsd:schema header, so every range starts on
+    a "<R>" tag (a literal "<" cannot occur in XML text content).
+
+    Parameters
+    ----------
+    file_path: Path
+        Path to local XML line listing file
+    segments: int
+        Requested number of segments, fewer are returned for small files
+
+    Returns
+    -------
+    tuple (prefix_end, suffix_start, ranges)
+        prefix_end is the offset of the first record, suffix_start the offset following
+        the last record, and ranges a list of (start, stop) offsets covering all records
+    """
+    with open(file_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        schema_end = mm.find(_xml_schema_end)
+        if schema_end < 0:
+            raise ValueError(f"No xsd:schema found in {file_path}")
+        prefix_end = mm.find(_xml_record_start, schema_end)
+        if prefix_end < 0:
+            # No records, the whole document is header
+            return len(mm), len(mm), []
+        suffix_start = mm.rfind(_xml_record_end) + len(_xml_record_end)
+
+        segments = min(
+            segments,
+            max(
+                1,
+                (suffix_start - prefix_end) // _XML_PARSE_OPTIONS["min_segment_bytes"],
+            ),
+        )
+        step = (suffix_start - prefix_end) // segments
+
+        boundaries = [prefix_end]
+        for i in range(1, segments):
+            b = mm.find(_xml_record_start, prefix_end + i * step, suffix_start)
+            if b > boundaries[-1]:
+                boundaries.append(b)
+        boundaries.append(suffix_start)
+
+    return prefix_end, suffix_start, list(zip(boundaries[:-1], boundaries[1:]))
+
+
+def _parse_xml_segment(file_path, prefix_end, suffix_start, start, stop):
+    """
+    Parse records between start and stop of an XML line listing file.  The segment is
+    wrapped in the document header (schema) and trailer so that each worker sees a well
+    formed document with the shared column map.
+    """
+    with open(file_path, "rb") as f:
+        header = f.read(prefix_end)
+        f.seek(start)
+        body = f.read(stop - start)
+        f.seek(suffix_start)
+        trailer = f.read()
+
+    handler = EudravigilanceStreamHandler()
+    parser = xml.sax.make_parser()
+    parser.setContentHandler(handler)
+    parser.parse(io.BytesIO(header + body + trailer))
+    return handler.getDataframe()
+
+
+def xml_file_to_data_frame(source, workers=None):
+    """
+    Parse an XML line listing into a dataframe.  Local files are split into segments on
+    record boundaries and parsed in parallel when more than one worker is configured,
+    segments are reassembled in file order.
+
+    Parameters
+    ----------
+    source: Path or file-like object
+        XML line listing, file-like objects are always parsed in a single process
+    workers: int, optional
+        Number of worker processes, defaults to the value set by set_xml_parse_workers()
+
+    Returns
+    -------
+    pd.Dataframe
+        Dataframe with one row per record
+    """
+    workers = workers or _XML_PARSE_OPTIONS["workers"]
+
+    if isinstance(source, (str, Path)) and workers > 1:
+        prefix_end, suffix_start, ranges = find_xml_segments(source, workers)
+    else:
+        ranges = []
+
+    if len(ranges) > 1:
+        logger.info(f"Parsing {source} in {len(ranges)} segments ({workers} workers)")
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            dfs = list(
+                pool.map(
+                    _parse_xml_segment,
+                    [source] * len(ranges),
+                    [prefix_end] * len(ranges),
+                    [suffix_start] * len(ranges),
+                    [r[0] for r in ranges],
+                    [r[1] for r in ranges],
+                )
+            )
+        return pd.concat(dfs, ignore_index=True)
+
+    handler = EudravigilanceStreamHandler()
+    parser = xml.sax.make_parser()
+    parser.setContentHandler(handler)
+    parser.parse(source)
+    return handler.getDataframe()
+
+
 class EudravigilanceStreamHandler(xml.sax.handler.ContentHandler):
     """
     Subclass of xml.sax.handler.ContentHandler for extracting data from a source
@@ -3,7 +3,7 @@
 ###
 
 import pandas as pd
-from . import s3_utils
+from . import csv_engine, s3_utils
 
 
 def raw_load(input_bucket=None, input_key=None, file_path=None):
@@ -29,7 +29,7 @@ def raw_load(input_bucket=None, input_key=None, file_path=None):
         )
 
     if file_path:
-        df = pd.read_csv(
+        df = csv_engine.read_csv(
             file_path,
             encoding="utf-8",
             parse_dates=None,
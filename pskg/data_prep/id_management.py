@@ -2,6 +2,8 @@
 ### Utility Functions for alignment of identifiers between data sources
 ###
 
+from . import ids
+
 # Standardized vaccine names.  Currently COVID-19 vaccines
 # in VAERS and Eudravigilance can be aligned (i.e. are the same vaccine)
 # using standardized manufacter names.  Any other values are assigned
@@ -91,3 +93,86 @@ def get_medication_id(
         return f"{_aligned_ds}:{_aligned_medication_manufacturer_ids[row[manufacturer_column]]}"
     else:
         return f"{data_source}:{row[drug_column]}"
+
+
+def _get_aligned_ids(
+    df, data_source, name_ids, manufacturer_ids, drug_column, manufacturer_column
+):
+    """
+    Shared implementation of get_vaccine_ids and get_medication_ids, prefer an
+    aligned id from the drug name, then the manufacturer, otherwise scope the
+    drug name to data_source.
+    """
+    aligned = df[drug_column].map(name_ids)
+    aligned = aligned.where(
+        aligned.notna(), df[manufacturer_column].map(manufacturer_ids)
+    )
+    return ids.concat(f"{_aligned_ds}:", aligned).where(
+        aligned.notna(), ids.concat(f"{data_source}:", df[drug_column])
+    )
+
+
+def get_vaccine_ids(
+    df, data_source, drug_column="drug", manufacturer_column="Manufacturer"
+):
+    """
+    Vectorized form of get_vaccine_id, return vaccine identifiers for every row of df.
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data containing drug and manufacturer columns
+    data_source: str
+        A string identifying the data source (e.g. VAERS)
+    drug_column: str, optional
+        Name of column containing drug name, defaults to "drug"
+    manufacturer_column: str
+        Name of column with manufacturer information, defaults to "Manufacturer"
+
+    Returns
+    -------
+    pd.Series
+        Vaccine ids, with the index of df
+    """
+    return _get_aligned_ids(
+        df,
+        data_source,
+        _aligned_vaccine_name_ids,
+        _aligned_vaccine_manufacturer_ids,
+        drug_column,
+        manufacturer_column,
+    )
+
+
+def get_vaccine_codes(
+    df, data_source, drug_column="drug", manufacturer_column="Manufacturer"
+):
+    """
+    Interned form of get_vaccine_ids, return ids.VACCINE_IDS codes for every row of df
+    """
+    return ids.VACCINE_IDS.intern_keys(
+        df[[drug_column, manufacturer_column]],
+        lambda keys: get_vaccine_ids(
+            keys,
+            data_source,
+            drug_column=drug_column,
+            manufacturer_column=manufacturer_column,
+        ),
+    )
+
+
+def get_medication_ids(
+    df, data_source, drug_column="drug", manufacturer_column="Manufacturer"
+):
+    """
+    Vectorized form of get_medication_id, return medication identifiers for every row
+    of df.
+    """
+    return _get_aligned_ids(
+        df,
+        data_source,
+        _aligned_medication_name_ids,
+        _aligned_medication_manufacturer_ids,
+        drug_column,
+        manufacturer_column,
+    )
@@ -0,0 +1,226 @@
+###
+### Vectorized identifier construction
+###
+### Row level id helpers (e.g. vaers.derive_case_id) are written for use with
+### DataFrame.apply(axis=1), which calls back into Python for every row.  The
+### helpers here build the same identifier strings for whole columns at once,
+### and are used by the frame level id functions in each data_prep module.
+###
+### Identifiers in the large case and drug frames are interned: each IdSpace maps
+### identifier strings to integer codes for the whole build, so frames carry int64
+### codes through merges and drop_duplicates, and format_id_columns() restores the
+### strings when a generator writes its output.
+###
+
+import functools
+import operator
+
+import numpy as np
+import pandas as pd
+
+
+def as_id_strings(values):
+    """
+    Convert a column to strings exactly as str.format/f-strings would render each
+    value (e.g. 10019211 -> "10019211", None -> "None")
+
+    Parameters
+    ----------
+    values: pd.Series
+        Column of values
+
+    Returns
+    -------
+    pd.Series
+        Column of str
+    """
+    return values.astype(str)
+
+
+def concat(*parts):
+    """
+    Concatenate literal strings and columns element-wise, the vectorized
+    equivalent of "{0}:{1}".format(...) applied to every row.
+
+    Parameters
+    ----------
+    parts: str or pd.Series
+        Pieces of the identifier, in order.  At least one part must be a series,
+        and all series must share an index.
+
+    Returns
+    -------
+    pd.Series
+        Concatenated identifiers
+    """
+    pieces = [as_id_strings(p) if isinstance(p, pd.Series) else p for p in parts]
+    return functools.reduce(operator.add, pieces).astype(object)
+
+
+def format_dates(values, date_format):
+    """
+    Vectorized Timestamp.strftime, missing dates raise a ValueError just as
+    calling strftime on NaT would.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Column of datetime values
+    date_format: str
+        strftime format string, e.g. "%Y%m%d"
+
+    Returns
+    -------
+    pd.Series
+        Column of formatted dates
+    """
+    dates = pd.to_datetime(values)
+    if dates.isna().any():
+        raise ValueError(f"Cannot format missing dates in column {values.name}")
+    return dates.dt.strftime(date_format)
+
+
+class IdSpace(object):
+    """
+    Build-wide interning of one kind of identifier (e.g. CaseId), codes are assigned
+    in order of first use and never change during a build.  Missing identifiers
+    have code -1.
+    """
+
+    def __init__(self, name):
+        """
+        Parameters
+        ----------
+        name: str
+            Output column holding identifiers of this kind, e.g. "CaseId"
+        """
+        self.name = name
+        self._codes = {}
+        self._strings = []
+
+    def __repr__(self) -> str:
+        return f"IdSpace(name={self.name}, size={len(self._strings)})"
+
+    def __len__(self):
+        return len(self._strings)
+
+    def _intern_unique(self, unique_ids):
+        """
+        Codes for distinct identifier strings, adding new strings to the space
+        """
+        codes = np.empty(len(unique_ids), dtype=np.int64)
+        for i, s in enumerate(unique_ids):
+            if s is None or s != s:
+                codes[i] = -1
+                continue
+            code = self._codes.get(s)
+            if code is None:
+                code = len(self._strings)
+                self._codes[s] = code
+                self._strings.append(s)
+            codes[i] = code
+        return codes
+
+    def intern(self, values):
+        """
+        Intern a column of identifier strings
+
+        Parameters
+        ----------
+        values: pd.Series
+            Identifier strings, missing values are allowed
+
+        Returns
+        -------
+        pd.Series
+            int64 codes, with the index of values
+        """
+        codes, uniques = pd.factorize(values)
+        unique_codes = np.append(self._intern_unique(uniques), -1)
+        return pd.Series(unique_codes[codes], index=values.index, name=values.name)
+
+    def intern_keys(self, keys, formatter):
+        """
+        Intern identifiers built from key columns, formatting each distinct key once.
+        Equivalent to intern(formatter(keys)).
+
+        Parameters
+        ----------
+        keys: pd.DataFrame
+            Key columns identifying each row, missing values are distinct keys
+        formatter: callable
+            Maps a frame of distinct keys (with the columns of keys) to a series of
+            identifier strings
+
+        Returns
+        -------
+        pd.Series
+            int64 codes, with the index of keys
+        """
+        row_keys = np.zeros(len(keys), dtype=np.int64)
+        for c in keys.columns:
+            codes, uniques = pd.factorize(keys[c])
+            # Missing values (code -1) get a code of their own
+            codes = np.where(codes < 0, len(uniques), codes)
+            # Renumber combined keys so codes stay below len(keys)
+            row_keys = pd.factorize(row_keys * (len(uniques) + 1) + codes)[0]
+        _, first, inverse = np.unique(row_keys, return_index=True, return_inverse=True)
+
+        unique_ids = formatter(keys.iloc[first].reset_index(drop=True))
+        return pd.Series(self._intern_unique(unique_ids)[inverse], index=keys.index)
+
+    def lookup(self, id_string):
+        """
+        Code of an identifier string, or None if it has not been interned
+        """
+        return self._codes.get(id_string)
+
+    def format(self, codes):
+        """
+        Identifier strings for a column of codes
+
+        Parameters
+        ----------
+        codes: pd.Series
+            int64 codes from this space
+
+        Returns
+        -------
+        pd.Series
+            Identifier strings (NaN for missing identifiers), with the index of codes
+        """
+        strings = np.array(self._strings + [np.nan], dtype=object)
+        return pd.Series(strings[codes.to_numpy()], index=codes.index, name=codes.name)
+
+
+CASE_IDS = IdSpace("CaseId")
+VACCINE_IDS = IdSpace("VaccineId")
+MEDICATION_IDS = IdSpace("MedicationId")
+
+# Interned identifier spaces by output column name
+ID_SPACES = {space.name: space for space in [CASE_IDS, VACCINE_IDS, MEDICATION_IDS]}
+
+
+def format_id_columns(df):
+    """
+    Restore identifier strings in columns of interned codes, for output
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Frame for output, columns named after an IdSpace with integer dtype are
+        converted
+
+    Returns
+    -------
+    pd.DataFrame
+        df, or a copy with identifier strings in place of codes
+    """
+    id_columns = [
+        c
+        for c in df.columns
+        if c in ID_SPACES and pd.api.types.is_integer_dtype(df[c].dtype)
+    ]
+    if not id_columns:
+        return df
+    return df.assign(**{c: ID_SPACES[c].format(df[c]) for c in id_columns})
@@ -1,9 +1,10 @@
 from boto3 import exceptions
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import logging
 
-from . import s3_utils
+from . import ids, s3_utils
 
 logger = logging.getLogger("pskg_loader.meddra")
 
@@ -88,6 +89,14 @@ def generate_meddra_id(data_row, meddra_type, meddra_code_column):
     return "{0}:{1}".format(meddra_type, data_row[meddra_code_column])
 
 
+def generate_meddra_ids(codes, meddra_type):
+    """
+    Vectorized form of generate_meddra_id, return MedDRA ids (e.g. "PT:10019211")
+    for a column of MedDRA codes
+    """
+    return ids.concat(f"{meddra_type}:", codes)
+
+
 def read_raw(
     meddra_file_type,
     input_bucket=None,
@@ -154,6 +163,25 @@ def generate_smq_edge_id(data_row):
         return "{0}:{1}".format("LLT", data_row["MeddraCode"])
 
 
+def generate_smq_edge_ids(codes, term_levels):
+    """
+    Vectorized form of generate_smq_edge_id, return SMQ edge ids for columns of
+    term codes and term levels: SMQ codes (level 0) are not prefixed, PTs (level 4)
+    and LLTs (level 5) are prefixed with their type, other levels are ""
+    """
+    code_strings = ids.as_id_strings(codes).to_numpy(dtype=object)
+    levels = term_levels.to_numpy()
+    return pd.Series(
+        np.select(
+            [levels == 0, levels == 4, levels == 5],
+            [code_strings, "PT:" + code_strings, "LLT:" + code_strings],
+            default="",
+        ),
+        index=term_levels.index,
+        dtype=object,
+    )
+
+
 def generate_type_meddra_id(data_row, column_name, meddra_type):
     return "{0}:{1}".format(meddra_type, data_row[column_name])
 
@@ -164,7 +192,7 @@ def generate_meddra_term_df(data_frame, columns, meddra_type, meddra_version):
     df.insert(loc=1, column="MeddraType", value=meddra_type)
 
     df.columns = ["MeddraCode", "MeddraType", "Name"]
-    meddra_ids = df.apply(generate_meddra_id, axis=1)
+    meddra_ids = generate_meddra_ids(df["MeddraCode"], meddra_type)
 
     df.insert(loc=0, column="MeddraId", value=meddra_ids)
 
@@ -177,12 +205,8 @@ def generate_meddra_term_df(data_frame, columns, meddra_type, meddra_version):
 def generate_meddra_link_df(data_frame, columns, from_type, to_type):
     df = data_frame[columns].copy()
     df.columns = ["MeddraCodeFrom", "MeddraCodeTo"]
-    df["MeddraIdFrom"] = df.apply(
-        generate_type_meddra_id, args=("MeddraCodeFrom", from_type), axis=1
-    )
-    df["MeddraIdTo"] = df.apply(
-        generate_type_meddra_id, args=("MeddraCodeTo", to_type), axis=1
-    )
+    df["MeddraIdFrom"] = generate_meddra_ids(df["MeddraCodeFrom"], from_type)
+    df["MeddraIdTo"] = generate_meddra_ids(df["MeddraCodeTo"], to_type)
 
     df = df.drop(columns=["MeddraCodeFrom", "MeddraCodeTo"])
 
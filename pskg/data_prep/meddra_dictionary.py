@@ -0,0 +1,336 @@
+###
+### MedDRA dictionary
+###
+### A MedDRA distribution (mdhier.asc, llt.asc, smq_list.asc, smq_content.asc and
+### meddra_release.asc) is parsed once per version and shared by all MedDRA
+### generators.  Codes are held as int32 arrays and term names as int32 indexes into
+### a single string table.  Term and link tables are precomputed when the dictionary
+### is built, and the dictionary is pickled to the cache folder (see
+### set_cache_folder) so later builds of the same MedDRA version skip parsing.
+###
+
+import logging
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from .meddra import read_raw
+
+logger = logging.getLogger("pskg_loader.meddra_dictionary")
+
+# Bump when the pickled layout changes, older cache files are then rebuilt
+_DICTIONARY_REVISION = 1
+
+_CACHE_OPTIONS = {"cache_folder": None}
+
+# Dictionaries loaded during this run, by version and location
+_dictionaries = {}
+
+MEDDRA_FILES = {
+    "mdhier": "mdhier.asc",
+    "llt": "llt.asc",
+    "meddra_release": "meddra_release.asc",
+    "smq_list": "smq_list.asc",
+    "smq_content": "smq_content.asc",
+}
+
+TERM_TYPES = ["PT", "HLT", "HLGT", "SOC", "LLT"]
+
+# Source table and (code, name, abbreviation) columns of each term type
+_term_sources = {
+    "PT": ("mdhier", "pt_code", "pt_name", None),
+    "HLT": ("mdhier", "hlt_code", "hlt_name", None),
+    "HLGT": ("mdhier", "hlgt_code", "hlgt_name", None),
+    "SOC": ("mdhier", "soc_code", "soc_name", "soc_abbrev"),
+    "LLT": ("llt", "llt_code", "llt_name", None),
+}
+
+# Source table and (from code, to code, flag) columns of each hierarchy link
+_link_sources = {
+    ("LLT", "PT"): ("llt", "llt_code", "pt_code", None),
+    ("PT", "HLT"): ("mdhier", "pt_code", "hlt_code", "primary_soc_fg"),
+    ("HLT", "HLGT"): ("mdhier", "hlt_code", "hlgt_code", None),
+    ("HLGT", "SOC"): ("mdhier", "hlgt_code", "soc_code", None),
+}
+
+_code_columns = {
+    "mdhier": ["pt_code", "hlt_code", "hlgt_code", "soc_code"],
+    "llt": ["llt_code", "pt_code"],
+    "smq_content": ["smq_code", "term_code", "term_level"],
+}
+
+_string_columns = {
+    "mdhier": [
+        "pt_name",
+        "hlt_name",
+        "hlgt_name",
+        "soc_name",
+        "soc_abbrev",
+        "primary_soc_fg",
+    ],
+    "llt": ["llt_name"],
+}
+
+
+def set_cache_folder(cache_folder=None):
+    """
+    Configure the folder used to keep parsed MedDRA dictionaries between runs.
+
+    Parameters
+    ----------
+    cache_folder: str or Path, optional
+        Cache folder, created if absent.  None (the default) keeps dictionaries in
+        memory for the current run only.
+    """
+    _CACHE_OPTIONS["cache_folder"] = Path(cache_folder) if cache_folder else None
+    logger.info(f"MedDRA dictionary cache: {_CACHE_OPTIONS['cache_folder']}")
+
+
+def _compact_codes(values):
+    """
+    Store a code column as int32, columns that were not read as integers (e.g. from
+    malformed files) are kept as read
+    """
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return values.astype(np.int32)
+    return values
+
+
+def _unique_rows(table, columns):
+    """
+    Distinct rows of table[columns] in order of first occurrence, as
+    drop_duplicates().  Integer columns are combined into a single row key for
+    np.unique, other columns (e.g. from malformed files) use drop_duplicates.
+    """
+    df = table[columns]
+    if not all(pd.api.types.is_integer_dtype(df[c].dtype) for c in columns):
+        return df.drop_duplicates()
+
+    key = np.zeros(len(df), dtype=np.int64)
+    for c in columns:
+        values, inverse = np.unique(df[c].to_numpy(), return_inverse=True)
+        # Renumber after each column so the key stays below len(df)
+        _, key = np.unique(key * len(values) + inverse, return_inverse=True)
+    _, first = np.unique(key, return_index=True)
+    return df.iloc[np.sort(first)]
+
+
+class MeddraDictionary(object):
+    """
+    Parsed MedDRA distribution.  Generators should use load_dictionary() rather than
+    creating instances directly.
+    """
+
+    def __init__(self, raw_frames, version=None):
+        """
+        Build a dictionary from raw MedDRA tables
+
+        Parameters
+        ----------
+        raw_frames: dict
+            Data frames from meddra.read_raw by MedDRA file type, meddra_release
+            may be None
+        version: str, optional
+            MedDRA version label, e.g. v24.0
+        """
+        self.version = version
+        self.row_counts = {
+            t: (len(df) if df is not None else 0) for t, df in raw_frames.items()
+        }
+
+        # Single string table shared by every name column
+        string_columns = [
+            raw_frames[t][c] for t, columns in _string_columns.items() for c in columns
+        ]
+        codes, strings = pd.factorize(pd.concat(string_columns, ignore_index=True))
+        self.strings = np.append(np.asarray(strings, dtype=object), np.nan)
+        codes = codes.astype(np.int32)
+
+        self.tables = {}
+        offset = 0
+        for t in ["mdhier", "llt"]:
+            df = raw_frames[t]
+            table = pd.DataFrame(
+                {c: _compact_codes(df[c]) for c in _code_columns[t]}, index=df.index
+            )
+            for c in _string_columns[t]:
+                table[c] = codes[offset : offset + len(df)]
+                offset += len(df)
+            self.tables[t] = table
+
+        smq_content_df = raw_frames["smq_content"].copy()
+        for c in _code_columns["smq_content"]:
+            smq_content_df[c] = _compact_codes(smq_content_df[c])
+        self.smq_content = smq_content_df
+        self.smq_list = raw_frames["smq_list"]
+
+        release_df = raw_frames.get("meddra_release")
+        self.release = (
+            release_df[["version", "language"]] if release_df is not None else None
+        )
+
+        # Precomputed term and link tables, unique rows in order of first use
+        self.terms = {}
+        for meddra_type, (t, code, name, abbreviation) in _term_sources.items():
+            columns = [c for c in [code, name, abbreviation] if c is not None]
+            self.terms[meddra_type] = _unique_rows(self.tables[t], columns)
+
+        self.links = {}
+        for link, (t, from_code, to_code, flag) in _link_sources.items():
+            columns = [c for c in [from_code, to_code, flag] if c is not None]
+            self.links[link] = _unique_rows(self.tables[t], columns)
+
+    def __repr__(self) -> str:
+        counts = ", ".join(f"{t}={len(self.terms[t])}" for t in TERM_TYPES)
+        return f"MeddraDictionary(version={self.version}, {counts})"
+
+    def names(self, indexes):
+        """
+        Strings for an array of string table indexes (-1 is missing)
+        """
+        return self.strings[np.asarray(indexes)]
+
+    def term_table(self, meddra_type):
+        """
+        Distinct terms of a MedDRA type
+
+        Parameters
+        ----------
+        meddra_type: str
+            One of TERM_TYPES
+
+        Returns
+        -------
+        pd.DataFrame
+            | MeddraCode | Name | MeddraAbbreviation |, abbreviations are only
+            available for SOCs (otherwise "")
+        """
+        t, code, name, abbreviation = _term_sources[meddra_type]
+        terms = self.terms[meddra_type]
+        return pd.DataFrame(
+            {
+                "MeddraCode": terms[code].to_numpy(),
+                "Name": self.names(terms[name]),
+                "MeddraAbbreviation": (
+                    self.names(terms[abbreviation]) if abbreviation else ""
+                ),
+            }
+        )
+
+    def link_table(self, from_type, to_type):
+        """
+        Distinct hierarchy links between two MedDRA types
+
+        Parameters
+        ----------
+        from_type: str
+            Child type, e.g. "LLT"
+        to_type: str
+            Parent type, e.g. "PT"
+
+        Returns
+        -------
+        pd.DataFrame
+            | MeddraCodeFrom | MeddraCodeTo | PrimarySoc |, the primary SOC flag is
+            only available for PT to HLT links (otherwise "")
+        """
+        t, from_code, to_code, flag = _link_sources[(from_type, to_type)]
+        links = self.links[(from_type, to_type)]
+        return pd.DataFrame(
+            {
+                "MeddraCodeFrom": links[from_code].to_numpy(),
+                "MeddraCodeTo": links[to_code].to_numpy(),
+                "PrimarySoc": self.names(links[flag]) if flag else "",
+            }
+        )
+
+
+def load_dictionary(
+    version=None, s3_bucket=None, s3_key=None, folder_path=None, files=None
+):
+    """
+    Return the MedDRA dictionary for a distribution, parsing it only if it is not
+    already loaded or cached for this version
+
+    Parameters
+    ----------
+    version: str, optional
+        MedDRA version (e.g. cfg['MedDRA']['VERSION']), required for the disk cache
+    s3_bucket: str, optional
+    s3_key: str, optional
+        Key within s3_bucket of the MedDRA distribution folder
+    folder_path: str or Path, optional
+        Local MedDRA folder (exclusive with s3_bucket/s3_key)
+    files: dict, optional
+        File names by MedDRA file type, defaults to MEDDRA_FILES
+
+    Returns
+    -------
+    MeddraDictionary
+        Shared dictionary, which must not be modified
+    """
+    files = {**MEDDRA_FILES, **(files or {})}
+    memo_key = (version, s3_bucket, s3_key, str(folder_path), tuple(files.items()))
+    if memo_key in _dictionaries:
+        return _dictionaries[memo_key]
+
+    cache_path = None
+    if version and _CACHE_OPTIONS["cache_folder"] is not None:
+        cache_path = _CACHE_OPTIONS["cache_folder"] / f"meddra_{version}.pkl"
+    dictionary = _read_cached(cache_path, files)
+
+    if dictionary is None:
+        raw_frames = {}
+        for file_type, file_name in files.items():
+            if folder_path:
+                file_path = Path(folder_path) / file_name
+                if file_type == "meddra_release" and not file_path.exists():
+                    logger.warning(f"No MedDRA version file available.")
+                    raw_frames[file_type] = None
+                    continue
+                raw_frames[file_type] = read_raw(file_type, file_path=file_path)
+            else:
+                raw_frames[file_type] = read_raw(
+                    file_type, input_bucket=s3_bucket, input_key=f"{s3_key}/{file_name}"
+                )
+        dictionary = MeddraDictionary(raw_frames, version=version)
+        _write_cached(cache_path, files, dictionary)
+
+    logger.info(f"Loaded {dictionary}")
+    _dictionaries[memo_key] = dictionary
+    return dictionary
+
+
+def _read_cached(cache_path, files):
+    """
+    Unpickle a cached dictionary, None if absent or stale
+    """
+    if cache_path is None or not cache_path.exists():
+        return None
+    with open(cache_path, "rb") as f:
+        cached = pickle.load(f)
+    if cached["revision"] != _DICTIONARY_REVISION or cached["files"] != files:
+        logger.info(f"Ignoring stale MedDRA dictionary cache {cache_path}")
+        return None
+    logger.info(f"Using cached MedDRA dictionary {cache_path}")
+    return cached["dictionary"]
+
+
+def _write_cached(cache_path, files, dictionary):
+    if cache_path is None:
+        return
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(
+            {
+                "revision": _DICTIONARY_REVISION,
+                "files": files,
+                "dictionary": dictionary,
+            },
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    tmp_path.replace(cache_path)
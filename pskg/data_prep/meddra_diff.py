@@ -0,0 +1,80 @@
+###
+### MedDRA version differences
+###
+### A MedDRA upgrade changes a small part of the dictionary.  diff_frames() compares
+### the output frames of two MedDRA versions (terms, hierarchy links, SMQs and SMQ
+### content) by key, so only added, removed and changed rows need to be reloaded.
+###
+
+import pandas as pd
+
+ADDED = "added"
+REMOVED = "removed"
+CHANGED = "changed"
+
+
+def _comparable(df):
+    """
+    Values as strings, with missing values equal to each other
+    """
+    return df.astype(object).where(df.notna(), "").astype(str)
+
+
+def diff_frames(
+    previous_df, current_df, key_columns, changed=CHANGED, ignore_columns=None
+):
+    """
+    Rows added, removed or changed between two versions of a frame
+
+    Parameters
+    ----------
+    previous_df: pd.DataFrame
+        Frame from the previous version
+    current_df: pd.DataFrame
+        Frame from the current version, with the columns of previous_df
+    key_columns: list
+        Columns identifying a row, other columns are compared for changes
+    changed: str, optional
+        Label for changed rows, defaults to CHANGED
+    ignore_columns: list, optional
+        Columns not compared, e.g. the MedDRA version of every term
+
+    Returns
+    -------
+    pd.DataFrame
+        Added and changed rows with current values and removed rows with previous
+        values, labelled in a Change column
+    """
+    value_columns = [
+        c
+        for c in current_df.columns
+        if c not in key_columns and c not in (ignore_columns or [])
+    ]
+    previous_df = previous_df.drop_duplicates(subset=key_columns)
+    current_df = current_df.drop_duplicates(subset=key_columns)
+
+    previous_keys = pd.MultiIndex.from_frame(_comparable(previous_df[key_columns]))
+    current_keys = pd.MultiIndex.from_frame(_comparable(current_df[key_columns]))
+    in_previous = current_keys.isin(previous_keys)
+    in_current = previous_keys.isin(current_keys)
+
+    # Compare values of rows present in both versions, aligned on their keys
+    previous_values = _comparable(previous_df.loc[in_current, value_columns])
+    previous_values.index = previous_keys[in_current]
+    current_values = _comparable(current_df.loc[in_previous, value_columns])
+    current_values.index = current_keys[in_previous]
+    is_changed = (current_values != previous_values.reindex(current_values.index)).any(
+        axis=1
+    )
+
+    is_changed_row = pd.Series(False, index=current_df.index)
+    is_changed_row[in_previous] = is_changed.to_numpy()
+
+    return pd.concat(
+        [
+            current_df.loc[~in_previous].assign(Change=ADDED),
+            current_df.loc[is_changed_row.to_numpy()].assign(Change=changed),
+            previous_df.loc[~in_current].assign(Change=REMOVED),
+        ],
+        ignore_index=True,
+    )
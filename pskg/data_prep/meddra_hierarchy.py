@@ -0,0 +1,428 @@
+###
+### MedDRA hierarchy index
+###
+### Terms of each level (LLT, PT, HLT, HLGT, SOC) are numbered 0..n-1 and the links
+### between adjacent levels are held as CSR adjacency (indptr/indices arrays) in both
+### directions, so roll-ups and expansions are array operations rather than graph
+### traversals.  PT to HLT links carry the primary SOC flag, which restricts roll-ups
+### to the primary path when requested.
+###
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from . import meddra_dictionary
+
+logger = logging.getLogger("pskg_loader.meddra_hierarchy")
+
+# Levels from most to least specific
+LEVELS = ["LLT", "PT", "HLT", "HLGT", "SOC"]
+
+_PRIMARY_FLAG = "Y"
+
+# Hierarchies built during this run, by dictionary
+_hierarchies = {}
+
+
+def _csr(from_index, to_index, from_count):
+    """
+    CSR adjacency of from_index -> to_index
+
+    Returns
+    -------
+    (np.ndarray, np.ndarray, np.ndarray)
+        indptr (from_count + 1), indices and the position of each entry in the
+        original link order
+    """
+    order = np.argsort(from_index, kind="stable")
+    indptr = np.zeros(from_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(from_index, minlength=from_count), out=indptr[1:])
+    return indptr, to_index[order].astype(np.int32), order
+
+
+def _expand(pairs_from, pairs_to, indptr, indices):
+    """
+    Follow one CSR step from every (from, to) pair, returning (from, next) pairs
+    """
+    degree = indptr[pairs_to + 1] - indptr[pairs_to]
+    starts = np.repeat(indptr[pairs_to], degree)
+    offsets = np.arange(len(starts)) - np.repeat(np.cumsum(degree) - degree, degree)
+    return np.repeat(pairs_from, degree), indices[starts + offsets]
+
+
+def _unique_pairs(pairs_from, pairs_to, to_count):
+    keys = np.unique(pairs_from.astype(np.int64) * to_count + pairs_to)
+    return (keys // to_count).astype(np.int32), (keys % to_count).astype(np.int32)
+
+
+class MeddraHierarchy(object):
+    """
+    Index over the MedDRA hierarchy of a MeddraDictionary.  Generators and analyses
+    should use load_hierarchy() rather than creating instances directly.
+    """
+
+    def __init__(self, dictionary):
+        """
+        Build the index from a MedDRA dictionary
+
+        Parameters
+        ----------
+        dictionary: meddra_dictionary.MeddraDictionary
+            Parsed MedDRA distribution
+        """
+        self.version = dictionary.version
+        self.row_counts = dictionary.row_counts
+
+        # Link tables in dictionary order, used to emit edges unchanged
+        self._links = {
+            (f, t): dictionary.link_table(f, t) for f, t in zip(LEVELS, LEVELS[1:])
+        }
+
+        # Codes of each level, including codes only seen in links
+        self.codes = {}
+        for level in LEVELS:
+            level_codes = [dictionary.term_table(level)["MeddraCode"]]
+            for (f, t), links_df in self._links.items():
+                if f == level:
+                    level_codes.append(links_df["MeddraCodeFrom"])
+                if t == level:
+                    level_codes.append(links_df["MeddraCodeTo"])
+            self.codes[level] = pd.Index(
+                pd.unique(pd.concat(level_codes, ignore_index=True).dropna())
+            )
+
+        # CSR adjacency, up (child -> parents) and down (parent -> children)
+        self.up = {}
+        self.down = {}
+        self.primary = {}
+        for (f, t), links_df in self._links.items():
+            links_df = links_df.dropna(subset=["MeddraCodeFrom", "MeddraCodeTo"])
+            from_index = self.codes[f].get_indexer(links_df["MeddraCodeFrom"])
+            to_index = self.codes[t].get_indexer(links_df["MeddraCodeTo"])
+            indptr, indices, order = _csr(from_index, to_index, len(self.codes[f]))
+            self.up[(f, t)] = (indptr, indices)
+            # Primary SOC flag of each up entry, all links are primary above PT
+            self.primary[(f, t)] = (
+                (links_df["PrimarySoc"].to_numpy() == _PRIMARY_FLAG)[order]
+                if (f, t) == ("PT", "HLT")
+                else np.ones(len(indices), dtype=bool)
+            )
+            self.down[(t, f)] = _csr(to_index, from_index, len(self.codes[t]))[:2]
+
+        self._pairs = {}
+        logger.info(f"Built {self}")
+
+    def __repr__(self) -> str:
+        counts = ", ".join(f"{level}={len(self.codes[level])}" for level in LEVELS)
+        return f"MeddraHierarchy(version={self.version}, {counts})"
+
+    def link_table(self, from_type, to_type):
+        """
+        Hierarchy links between adjacent levels in dictionary order, see
+        MeddraDictionary.link_table
+        """
+        return self._links[(from_type, to_type)].copy()
+
+    def _level_steps(self, from_level, to_level):
+        start, end = LEVELS.index(from_level), LEVELS.index(to_level)
+        if start <= end:
+            return [(LEVELS[i], LEVELS[i + 1]) for i in range(start, end)]
+        return [(LEVELS[i], LEVELS[i - 1]) for i in range(start, end, -1)]
+
+    def pairs(self, from_level, to_level, primary_only=False):
+        """
+        Every (from, to) pair of term indexes connected through the hierarchy,
+        each pair appears once however many paths connect it
+
+        Parameters
+        ----------
+        from_level: str
+            One of LEVELS
+        to_level: str
+            One of LEVELS
+        primary_only: bool, optional
+            Only follow primary SOC PT to HLT links, defaults to False
+
+        Returns
+        -------
+        (np.ndarray, np.ndarray)
+            Indexes into codes[from_level] and codes[to_level]
+        """
+        key = (from_level, to_level, primary_only)
+        if key in self._pairs:
+            return self._pairs[key]
+
+        pairs_from = np.arange(len(self.codes[from_level]), dtype=np.int32)
+        pairs_to = pairs_from
+        for step in self._level_steps(from_level, to_level):
+            if step in self.up:
+                indptr, indices = self.up[step]
+                if primary_only and step == ("PT", "HLT"):
+                    indptr, indices = self._primary_csr(step)
+            else:
+                indptr, indices = self.down[step]
+                if primary_only and step == ("HLT", "PT"):
+                    indptr, indices = self._primary_csr(step)
+            pairs_from, pairs_to = _expand(pairs_from, pairs_to, indptr, indices)
+            pairs_from, pairs_to = _unique_pairs(
+                pairs_from, pairs_to, len(self.codes[step[1]])
+            )
+
+        self._pairs[key] = (pairs_from, pairs_to)
+        return self._pairs[key]
+
+    def _primary_csr(self, step):
+        """
+        CSR adjacency of the primary PT/HLT links only, in either direction
+        """
+        indptr, indices = self.up[("PT", "HLT")]
+        primary = self.primary[("PT", "HLT")]
+        pt_index = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))[primary]
+        hlt_index = indices[primary]
+        if step == ("PT", "HLT"):
+            return _csr(pt_index, hlt_index, len(self.codes["PT"]))[:2]
+        return _csr(hlt_index, pt_index, len(self.codes["HLT"]))[:2]
+
+    def rollup(self, counts, from_level, to_level, primary_only=False):
+        """
+        Aggregate counts of from_level terms to a higher level, a term contributes
+        once to each ancestor (MedDRA is multi-axial, so totals over SOCs can exceed
+        the input unless primary_only is set)
+
+        Parameters
+        ----------
+        counts: pd.Series
+            Counts indexed by from_level MedDRA code, codes not in the hierarchy are
+            ignored
+        from_level: str
+            Level of the counts, one of LEVELS
+        to_level: str
+            Level to roll up to, at or above from_level
+        primary_only: bool, optional
+            Only follow primary SOC paths, defaults to False
+
+        Returns
+        -------
+        pd.Series
+            Totals indexed by to_level MedDRA code, including zero totals
+        """
+        if LEVELS.index(to_level) < LEVELS.index(from_level):
+            raise ValueError(f"Cannot roll up from {from_level} to {to_level}")
+
+        counts = counts.groupby(level=0).sum()
+        positions = self.codes[from_level].get_indexer(counts.index)
+        known = positions >= 0
+        if not known.all():
+            logger.warning(
+                f"rollup: {(~known).sum()} {from_level} codes not in MedDRA {self.version}"
+            )
+        values = np.zeros(len(self.codes[from_level]), dtype=np.float64)
+        values[positions[known]] = counts.to_numpy(dtype=np.float64)[known]
+
+        pairs_from, pairs_to = self.pairs(from_level, to_level, primary_only)
+        totals = np.bincount(
+            pairs_to, weights=values[pairs_from], minlength=len(self.codes[to_level])
+        )
+        if pd.api.types.is_integer_dtype(counts.dtype):
+            totals = totals.astype(np.int64)
+        return pd.Series(totals, index=self.codes[to_level], name=counts.name)
+
+    def _related(self, code, level, levels, primary_only):
+        position = self.codes[level].get_indexer([code])[0]
+        if position < 0:
+            raise KeyError(f"{level} {code} not in MedDRA {self.version}")
+
+        related = []
+        for other in levels:
+            pairs_from, pairs_to = self.pairs(level, other, primary_only)
+            start, end = np.searchsorted(pairs_from, [position, position + 1])
+            related.append(
+                pd.DataFrame(
+                    {
+                        "MeddraType": other,
+                        "MeddraCode": self.codes[other][pairs_to[start:end]],
+                    }
+                )
+            )
+        return pd.concat(related, ignore_index=True)
+
+    def descendants(self, code, level, to_level=None, primary_only=False):
+        """
+        Terms below a MedDRA term
+
+        Parameters
+        ----------
+        code: int
+            MedDRA code
+        level: str
+            Level of code, one of LEVELS (PT and LLT codes can coincide)
+        to_level: str, optional
+            Only return terms of this level, defaults to all lower levels
+        primary_only: bool, optional
+            Only follow primary SOC paths, defaults to False
+
+        Returns
+        -------
+        pd.DataFrame
+            | MeddraType | MeddraCode |
+        """
+        levels = [to_level] if to_level else LEVELS[: LEVELS.index(level)][::-1]
+        return self._related(code, level, levels, primary_only)
+
+    def ancestors(self, code, level, to_level=None, primary_only=False):
+        """
+        Terms above a MedDRA term, see descendants()
+        """
+        levels = [to_level] if to_level else LEVELS[LEVELS.index(level) + 1 :]
+        return self._related(code, level, levels, primary_only)
+
+    def primary_soc(self, pt_codes):
+        """
+        Primary SOC of PTs
+
+        Parameters
+        ----------
+        pt_codes: pd.Series
+            PT codes
+
+        Returns
+        -------
+        pd.Series
+            SOC code for each PT (NaN if unknown), with the index of pt_codes
+        """
+        pairs_from, pairs_to = self.pairs("PT", "SOC", primary_only=True)
+        soc_codes = pd.Series(
+            self.codes["SOC"][pairs_to], index=self.codes["PT"][pairs_from]
+        )
+        soc_codes = soc_codes[~soc_codes.index.duplicated()]
+        return pd.Series(
+            pt_codes.map(soc_codes).to_numpy(), index=pt_codes.index, name="soc_code"
+        )
+
+
+# smq_content.asc term levels
+SMQ_TERM_LEVEL = 0
+SMQ_TERM_TYPES = {4: "PT", 5: "LLT"}
+
+_ACTIVE_STATUS = "A"
+
+
+def smq_closure(smq_content_df):
+    """
+    Transitive closure of SMQ content, every PT and LLT reachable from each SMQ
+    directly or through nested SMQs.  Terms keep the scope, category and weight of
+    the SMQ that lists them, and are only active if every SMQ link on the way is
+    active.  A term reached along several paths is listed once per distinct scope
+    and category (the key of MEDDRA_SMQ_CLOSURE relationships), by the path of
+    shortest depth.
+
+    Parameters
+    ----------
+    smq_content_df: pd.DataFrame
+        Raw smq_content table (see meddra.read_raw)
+
+    Returns
+    -------
+    pd.DataFrame
+        | smq_code | term_code | term_level | term_scope | term_category |
+        term_weight | term_status | via_smq_code | depth |, via_smq_code is the SMQ
+        listing the term and depth is 1 for terms listed by smq_code itself
+    """
+    term_columns = [
+        "smq_code",
+        "term_code",
+        "term_level",
+        "term_scope",
+        "term_category",
+        "term_weight",
+        "term_status",
+    ]
+    is_smq = smq_content_df["term_level"].isin([SMQ_TERM_LEVEL])
+    smq_links = smq_content_df.loc[is_smq, ["smq_code", "term_code", "term_status"]]
+    smq_links = smq_links.rename(
+        columns={"smq_code": "parent_smq_code", "term_status": "link_status"}
+    ).drop_duplicates()
+
+    frontier = (
+        smq_content_df.loc[
+            smq_content_df["term_level"].isin(list(SMQ_TERM_TYPES)), term_columns
+        ]
+        .drop_duplicates()
+        .assign(via_smq_code=lambda x: x["smq_code"], depth=1)
+    )
+    closure = [frontier]
+
+    # Nesting is shallow (a few levels), the bound only guards against cycles
+    max_depth = smq_links["parent_smq_code"].nunique() + 1
+    depth = 1
+    while True:
+        depth += 1
+        frontier = smq_links.merge(
+            frontier, left_on="term_code", right_on="smq_code", suffixes=("_link", "")
+        )
+        if frontier.empty:
+            break
+        if depth > max_depth:
+            logger.warning(f"smq_closure: SMQ nesting cycle, stopped at depth {depth}")
+            break
+        frontier["smq_code"] = frontier["parent_smq_code"]
+        frontier["term_status"] = frontier["term_status"].where(
+            frontier["link_status"] == _ACTIVE_STATUS, frontier["link_status"]
+        )
+        frontier = frontier[term_columns + ["via_smq_code"]].assign(depth=depth)
+        closure.append(frontier)
+
+    # Terms of each level have their own MeddraId, so term_level is part of the key
+    return (
+        pd.concat(closure, ignore_index=True)
+        .sort_values("depth", kind="stable")
+        .drop_duplicates(
+            subset=[
+                "smq_code",
+                "term_code",
+                "term_level",
+                "term_scope",
+                "term_category",
+            ]
+        )
+        .reset_index(drop=True)
+    )
+
+
+def load_hierarchy(**kwargs):
+    """
+    Return the hierarchy index of a MedDRA distribution, built once per run
+
+    Parameters
+    ----------
+    **kwargs
+        Arguments of meddra_dictionary.load_dictionary
+
+    Returns
+    -------
+    MeddraHierarchy
+        Shared index, which must not be modified
+    """
+    return get_hierarchy(meddra_dictionary.load_dictionary(**kwargs))
+
+
+def get_hierarchy(dictionary):
+    """
+    Return the hierarchy index of a loaded MedDRA dictionary, built once per run
+
+    Parameters
+    ----------
+    dictionary: meddra_dictionary.MeddraDictionary
+        Parsed MedDRA distribution
+
+    Returns
+    -------
+    MeddraHierarchy
+        Shared index, which must not be modified
+    """
+    key = id(dictionary)
+    if key not in _hierarchies:
+        _hierarchies[key] = MeddraHierarchy(dictionary)
+    return _hierarchies[key]
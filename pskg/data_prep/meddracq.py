@@ -7,6 +7,8 @@
 #   files suitable for loading into the graph
 #
 
+import hashlib
+import io
 import logging
 import pandas as pd
 from pathlib import Path
@@ -32,39 +34,80 @@ DATA_COLUMNS = ["Name", "PT"]
 
 logger = logging.getLogger("pskg_loader.meddracq")
 
+# Projects scanned during this run, by resolved folder
+_projects = {}
 
-def read_raw_meta_data(input_folder):
+
+def scan_project(input_folder):
     """
-    Build a unified meta dataframe and from
-    given local file sources, and return as a data frame
+    Read every custom query file in a single scan of the project folder.  Each
+    project is scanned once per run, later calls return the same frames.
 
     Parameters
     ----------
-    input_folder: str
+    input_folder: str or Path
         Path to data files, files with a ".tsv" suffix will be loaded
 
     Returns
     -------
-    pd.Dataframe
-        Returns a dataframe of custom query definitions
+    dict
+        meta: meta data from "_meta.tsv" files (with SOURCE_FILE_COLUMN),
+        links: custom query to PT links from the other files,
+        digest: SHA-256 hex digest of the file names and contents
     """
-
     if isinstance(input_folder, str):
         input_folder = Path(input_folder)
+    memo_key = str(input_folder.resolve())
+    if memo_key in _projects:
+        return _projects[memo_key]
 
     logger.info(f"Scanning {input_folder.resolve()}")
 
     meta_dfs = []
-
-    for f in input_folder.rglob("*.tsv"):
+    data_dfs = []
+    digest = hashlib.sha256()
+    for f in sorted(input_folder.rglob("*.tsv")):
+        content = f.read_bytes()
+        digest.update(f.relative_to(input_folder).as_posix().encode("utf-8") + b"\0")
+        digest.update(content + b"\0")
         if f.name.endswith("_meta.tsv"):
             logger.info(f"Reading meta file {f.name}")
             meta_dfs.append(
-                pd.read_csv(f, sep="\t").assign(**{SOURCE_FILE_COLUMN: f.resolve()})
+                pd.read_csv(io.BytesIO(content), sep="\t").assign(
+                    **{SOURCE_FILE_COLUMN: f.resolve()}
+                )
             )
+        else:
+            logger.info(f"Reading data file {f.name}")
+            data_dfs.append(pd.read_csv(io.BytesIO(content), sep="\t"))
+
+    _projects[memo_key] = {
+        "meta": pd.concat(meta_dfs),
+        "links": pd.concat(data_dfs),
+        "digest": digest.hexdigest(),
+    }
+    return _projects[memo_key]
+
+
+def read_raw_meta_data(input_folder):
+    """
+    Build a unified meta dataframe and from
+    given local file sources, and return as a data frame
+
+    Parameters
+    ----------
+    input_folder: str
+        Path to data files, files with a ".tsv" suffix will be loaded
+
+    Returns
+    -------
+    pd.Dataframe
+        Returns a dataframe of custom query definitions
+    """
+
+    meta_df = scan_project(input_folder)["meta"]
 
     # Save meta data file
-    meta_df = pd.concat(meta_dfs)
     if len(meta_df[meta_df.duplicated(subset=["Name"])]):
         raise ValueError(
             "Duplicate meta data detected:"
@@ -95,19 +138,5 @@ def read_raw_links(input_folder):
         Returns dataframe linking custom query names to PTs
     """
 
-    if isinstance(input_folder, str):
-        input_folder = Path(input_folder)
-
-    logger.info(f"Scanning {input_folder}")
-
-    data_dfs = []
-
-    for f in input_folder.rglob("*.tsv"):
-        if f.name.endswith("_meta.tsv"):
-            pass
-        else:
-            logger.info(f"Reading data file {f.name}")
-            data_dfs.append(pd.read_csv(f, sep="\t"))
-
     # Return concise data frames
-    return pd.concat(data_dfs)[DATA_COLUMNS]
+    return scan_project(input_folder)["links"][DATA_COLUMNS]
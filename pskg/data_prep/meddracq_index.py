@@ -0,0 +1,260 @@
+###
+### Compiled MedDRA custom query index
+###
+### Custom query definitions (see meddracq) list PTs by name.  The index resolves
+### every PT name against the MedDRA dictionary once and holds each custom query as a
+### sorted int32 array of PT codes, so links are written with MeddraIds and case
+### matching is a binary search.  Compiled indexes are pickled to the cache folder
+### (see set_cache_folder) keyed on a hash of the project files and MedDRA version.
+###
+
+import logging
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import meddra, meddracq, term_resolution
+
+logger = logging.getLogger("pskg_loader.meddracq_index")
+
+# Bump when the pickled layout changes, older cache files are then rebuilt
+_INDEX_REVISION = 1
+
+_CACHE_OPTIONS = {"cache_folder": None}
+
+# Indexes loaded during this run, by project digest and MedDRA dictionary
+_indexes = {}
+
+
+def set_cache_folder(cache_folder=None):
+    """
+    Configure the folder used to keep compiled custom query indexes between runs.
+
+    Parameters
+    ----------
+    cache_folder: str or Path, optional
+        Cache folder, created if absent.  None (the default) keeps indexes in memory
+        for the current run only.
+    """
+    _CACHE_OPTIONS["cache_folder"] = Path(cache_folder) if cache_folder else None
+    logger.info(f"MedDRA custom query index cache: {_CACHE_OPTIONS['cache_folder']}")
+
+
+class MeddraCqIndex(object):
+    """
+    Custom queries compiled to PT codes.  Generators and analyses should use
+    load_index() rather than creating instances directly.
+    """
+
+    def __init__(self, meta_df, links_df, dictionary):
+        """
+        Compile custom queries against a MedDRA dictionary
+
+        Parameters
+        ----------
+        meta_df: pd.DataFrame
+            Custom query meta data, meddracq.META_COLUMNS
+        links_df: pd.DataFrame
+            Custom query to PT name links, meddracq.DATA_COLUMNS
+        dictionary: meddra_dictionary.MeddraDictionary
+            Parsed MedDRA distribution
+        """
+        self.version = dictionary.version
+        self.meta = meta_df[meddracq.META_COLUMNS].reset_index(drop=True)
+
+        pt_df = dictionary.term_table("PT").drop_duplicates(subset=["Name"])
+        # Trailing NaN is the code of names not found (position -1)
+        pt_codes = np.append(
+            pd.to_numeric(pt_df["MeddraCode"], errors="coerce").to_numpy(float), np.nan
+        )
+        codes = pt_codes[pd.Index(pt_df["Name"]).get_indexer(links_df["PT"])]
+
+        links_df = links_df[meddracq.DATA_COLUMNS].reset_index(drop=True)
+        self.link_rows = len(links_df)
+        resolved = ~np.isnan(codes)
+        self.unresolved = links_df[~resolved].drop_duplicates().reset_index(drop=True)
+        self.links = links_df[resolved].assign(
+            MeddraCode=codes[resolved].astype(np.int32)
+        )
+        self.links = self.links.drop_duplicates().reset_index(drop=True)
+
+        self.pt_codes = {
+            name: np.array([], dtype=np.int32) for name in self.meta["Name"]
+        }
+        for name, cq_codes in self.links.groupby("Name", sort=False)["MeddraCode"]:
+            self.pt_codes[name] = np.unique(cq_codes.to_numpy()).astype(np.int32)
+
+        for name, pts in self.unresolved.groupby("Name", sort=False)["PT"]:
+            logger.warning(
+                f"Custom query {name}: {len(pts)} PTs not in MedDRA {self.version}: "
+                f"{', '.join(pts.astype(str))}"
+            )
+        logger.info(f"Built {self}")
+
+    def __repr__(self) -> str:
+        return (
+            f"MeddraCqIndex(version={self.version}, queries={len(self.pt_codes)}, "
+            f"links={len(self.links)}, unresolved={len(self.unresolved)})"
+        )
+
+    def pts(self, cq):
+        """
+        Sorted PT codes of a custom query
+
+        Parameters
+        ----------
+        cq: str
+            Custom query name
+
+        Returns
+        -------
+        np.ndarray
+            int32 PT codes
+        """
+        if cq not in self.pt_codes:
+            raise KeyError(f"Unknown custom query: {cq}")
+        return self.pt_codes[cq]
+
+    def links_table(self):
+        """
+        Custom query to PT links for output
+
+        Returns
+        -------
+        pd.DataFrame
+            | Name | PT | MeddraId |, PTs not in the dictionary are excluded
+        """
+        return pd.DataFrame(
+            {
+                "Name": self.links["Name"],
+                "PT": self.links["PT"],
+                "MeddraId": meddra.generate_meddra_ids(
+                    self.links["MeddraCode"], meddra_type="PT"
+                ),
+            }
+        )
+
+    def cases_matching(
+        self, cq, case_terms_df, case_column="CaseId", meddra_id_column="MeddraId"
+    ):
+        """
+        Cases with at least one term in a custom query
+
+        Parameters
+        ----------
+        cq: str
+            Custom query name
+        case_terms_df: pd.DataFrame
+            Case to term rows, e.g. CaseReportedAEMeddraTerm.tsv
+        case_column: str, optional
+            Column containing case ids, defaults to "CaseId"
+        meddra_id_column: str, optional
+            Column containing MeddraIds (e.g. "PT:10019211"), defaults to "MeddraId".
+            Terms other than PTs never match.
+
+        Returns
+        -------
+        pd.Series
+            Distinct matching case ids, in order of first appearance
+        """
+        cq_codes = self.pts(cq)
+        meddra_ids = case_terms_df[meddra_id_column].astype(str)
+        codes = pd.to_numeric(
+            meddra_ids.str.slice(start=3).where(meddra_ids.str.startswith("PT:")),
+            errors="coerce",
+        ).to_numpy()
+
+        matched = np.zeros(len(codes), dtype=bool)
+        if len(cq_codes):
+            known = ~np.isnan(codes)
+            positions = np.searchsorted(cq_codes, codes[known])
+            positions = np.minimum(positions, len(cq_codes) - 1)
+            matched[known] = cq_codes[positions] == codes[known]
+
+        return (
+            case_terms_df.loc[matched, case_column]
+            .drop_duplicates()
+            .reset_index(drop=True)
+        )
+
+
+def load_index(input_folder, dictionary=None):
+    """
+    Return the compiled index of a custom query project, compiling it only if it is
+    not already loaded or cached for these project files and MedDRA version
+
+    Parameters
+    ----------
+    input_folder: str or Path
+        Custom query project folder
+    dictionary: meddra_dictionary.MeddraDictionary, optional
+        MedDRA dictionary to validate PTs against, defaults to the distribution
+        configured with term_resolution.set_meddra_source
+
+    Returns
+    -------
+    MeddraCqIndex
+        Shared index, which must not be modified
+    """
+    if dictionary is None:
+        dictionary = term_resolution.get_dictionary()
+    if dictionary is None:
+        raise ValueError(
+            "No MedDRA dictionary supplied or configured (see set_meddra_source)"
+        )
+
+    digest = meddracq.scan_project(input_folder)["digest"]
+    memo_key = (digest, id(dictionary))
+    if memo_key in _indexes:
+        return _indexes[memo_key]
+
+    cache_path = None
+    if dictionary.version and _CACHE_OPTIONS["cache_folder"] is not None:
+        cache_path = (
+            _CACHE_OPTIONS["cache_folder"]
+            / f"meddracq_{dictionary.version}_{digest[:16]}.pkl"
+        )
+    index = _read_cached(cache_path, digest)
+
+    if index is None:
+        index = MeddraCqIndex(
+            meddracq.read_raw_meta_data(input_folder),
+            meddracq.read_raw_links(input_folder),
+            dictionary,
+        )
+        _write_cached(cache_path, digest, index)
+
+    _indexes[memo_key] = index
+    return index
+
+
+def _read_cached(cache_path, digest):
+    """
+    Unpickle a cached index, None if absent or stale
+    """
+    if cache_path is None or not cache_path.exists():
+        return None
+    with open(cache_path, "rb") as f:
+        cached = pickle.load(f)
+    if cached["revision"] != _INDEX_REVISION or cached["digest"] != digest:
+        logger.info(f"Ignoring stale custom query index cache {cache_path}")
+        return None
+    logger.info(f"Using cached custom query index {cache_path}")
+    return cached["index"]
+
+
+def _write_cached(cache_path, digest, index):
+    if cache_path is None:
+        return
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        pickle.dump(
+            {"revision": _INDEX_REVISION, "digest": digest, "index": index},
+            f,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+    tmp_path.replace(cache_path)
+    logger.info(f"Cached {index} to {cache_path}")
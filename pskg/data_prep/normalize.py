@@ -0,0 +1,108 @@
+###
+### Unique value normalization
+###
+### Most string normalizers (manufacturer names, trade/generic names, age groups...)
+### are applied to columns with only a few hundred or thousand distinct values.
+### apply_unique() is a drop in replacement for Series.apply(fn) which evaluates fn
+### once per distinct value and broadcasts the results back through the factorized
+### codes.  SubstringClassifier compiles ordered "contains" rules into one regex
+### per label, for use by substring based classifiers.
+###
+
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def apply_unique(values, fn, *args, **kwargs):
+    """
+    Equivalent of values.apply(fn, args=args, **kwargs), evaluating fn only once for
+    each distinct value.  fn must be deterministic (i.e. depend only on its input).
+
+    Parameters
+    ----------
+    values: pd.Series
+        Input column
+    fn: callable
+        Mapper applied to single values
+    args: tuple
+        Additional positional arguments for fn
+    kwargs: dict
+        Additional keyword arguments for fn
+
+    Returns
+    -------
+    pd.Series
+        Mapped values, with the index and name of values and the dtype Series.apply
+        would infer
+    """
+    codes, uniques = pd.factorize(values)
+
+    # The final slot holds the result for missing values (code -1)
+    results = np.empty(len(uniques) + 1, dtype=object)
+    for i, u in enumerate(uniques):
+        results[i] = fn(u, *args, **kwargs)
+    mapped = results[codes]
+
+    missing = np.flatnonzero(codes == -1)
+    if len(missing):
+        # None and NaN are both missing but may be mapped differently, so evaluate
+        # once per type of missing value
+        missing_results = {}
+        raw = values.to_numpy(dtype=object)
+        for i in missing:
+            key = type(raw[i])
+            if key not in missing_results:
+                missing_results[key] = fn(raw[i], *args, **kwargs)
+            mapped[i] = missing_results[key]
+
+    return pd.Series(mapped, index=values.index, name=values.name).infer_objects()
+
+
+class SubstringClassifier(object):
+    """
+    Ordered substring classifier.  Rules are (label, terms) pairs, a value is assigned
+    the label of the first rule with a term contained in the value.  The terms of
+    each rule are compiled into a single regex alternation.
+    """
+
+    def __init__(self, rules):
+        """
+        Parameters
+        ----------
+        rules: dict or list
+            Mapping of label to list of terms, or list of (label, terms) pairs,
+            in priority order
+        """
+        if isinstance(rules, dict):
+            rules = rules.items()
+        self.rules = [
+            (label, re.compile("|".join(re.escape(t) for t in terms)))
+            for label, terms in rules
+            if terms
+        ]
+
+    def __repr__(self) -> str:
+        return f"SubstringClassifier(rules={[(l, p.pattern) for l, p in self.rules]})"
+
+    def classify(self, value, default=None):
+        """
+        Return the label of the first rule matching value, or default if none match.
+
+        Parameters
+        ----------
+        value: str
+            Value to classify
+        default: obj, optional
+            Returned when no rule matches, defaults to None
+
+        Returns
+        -------
+        obj
+            Matching label or default
+        """
+        for label, pattern in self.rules:
+            if pattern.search(value):
+                return label
+        return default
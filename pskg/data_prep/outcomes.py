@@ -1,6 +1,9 @@
 from boto3 import client
 import logging
 
+import numpy as np
+import pandas as pd
+
 
 class OutcomeMapper(object):
     __standard_outcomes = [
@@ -53,6 +56,90 @@ class OutcomeMapper(object):
             list(set(mapping[input_row.fillna(include_na).values]["standard_outcomes"]))
         )
 
+    @classmethod
+    def standard_outcome_bits(cls, dataset):
+        """
+        Return the bit assigned to each standard outcome used by a dataset mapping, as
+        used in bitmasks produced by derive_outcomes_frame.  Bits follow the order of
+        the standard outcome list.
+
+        Parameters
+        ----------
+        dataset : string
+            Name key for a registered dataset.
+
+        Returns
+        -------
+        dict
+            Standard outcome to bit value (e.g. {"death": 2, ...})
+        """
+        mapped = set(cls.__outcome_mapping[dataset]["standard_outcomes"])
+        ordered = [o for o in cls.__standard_outcomes if o in mapped]
+        ordered += sorted(mapped.difference(ordered))
+        return {o: 1 << i for i, o in enumerate(ordered)}
+
+    @classmethod
+    def derive_outcomes_frame(cls, df, dataset, include_na=False, output="string"):
+        """
+        Vectorized form of derive_outcomes, apply mapping to standard outcomes for
+        every row of a dataframe at once.  Each dataset outcome column sets the bit of
+        its standard outcome, giving a bitmask of standard outcomes per row; strings
+        and lists are then built once per distinct bitmask.  Standard outcomes are
+        listed in a fixed order.  NOTE: df must contain columns for defined outcomes
+        otherwise a key error will occur.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Data containing a (boolean) column for each dataset outcome.
+        dataset : string
+            Name key for a registered dataset.
+        include_na : bool, optional
+            Value used for missing outcome values, defaults to False
+        output : string, optional
+            One of "string" (comma separated standard outcomes, the default),
+            "list" (list of standard outcomes, rows with the same outcomes share
+            one list object) or "bitmask" (integer, see standard_outcome_bits)
+
+        Returns
+        -------
+        pd.Series
+            Standard outcomes for each row, with the index of df
+        """
+        if output not in ("string", "list", "bitmask"):
+            raise ValueError(
+                f"Unsupported output '{output}', use 'string', 'list' or 'bitmask'"
+            )
+
+        mapping = cls.__outcome_mapping[dataset]
+        bits = cls.standard_outcome_bits(dataset)
+
+        # Set the bit of the matching standard outcome wherever a dataset outcome was
+        # reported.  Several dataset outcomes may share a standard outcome, hence OR.
+        bitmask = np.zeros(len(df), dtype=np.int64)
+        for dataset_outcome, standard_outcome in mapping[
+            ["dataset_outcomes", "standard_outcomes"]
+        ].itertuples(index=False):
+            values = df[dataset_outcome].to_numpy()
+            if values.dtype == bool:
+                reported = values
+            else:
+                reported = values == True
+                if include_na:
+                    reported |= pd.isna(values)
+            bitmask[reported] |= bits[standard_outcome]
+
+        if output == "bitmask":
+            return pd.Series(bitmask, index=df.index)
+
+        # Build labels once for each bitmask present, then index by bitmask
+        present = np.flatnonzero(np.bincount(bitmask, minlength=1))
+        labels = np.empty(present.max(initial=0) + 1, dtype=object)
+        for m in present:
+            outcomes = [o for o, b in bits.items() if m & b]
+            labels[m] = outcomes if output == "list" else ",".join(outcomes)
+        return pd.Series(labels[bitmask], index=df.index)
+
     @classmethod
     def register_outcome_mapping(cls, dataset, mapping):
         """
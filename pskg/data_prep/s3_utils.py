@@ -7,9 +7,20 @@ import numpy as np
 
 # This is used by boto for processing so is required to be loaded
 import io
+import logging
 import zipfile as zp
+from collections import OrderedDict
 from datetime import datetime
 
+from . import csv_engine
+
+logger = logging.getLogger("pskg_loader.s3_utils")
+
+# Default block size and number of cached blocks for S3RangeFile, sequential reads
+# fetch up to half of the cached blocks ahead in a single request
+_RANGE_BLOCK_SIZE = 1024 * 1024
+_RANGE_CACHE_BLOCKS = 32
+
 
 def get_bucket(bucket_name):
     """
@@ -19,6 +30,14 @@ def get_bucket(bucket_name):
     return s3.Bucket(bucket_name)
 
 
+def get_client():
+    """
+    Return a new S3 client from the default session.  Clients may be shared between
+    threads, but must not be created concurrently from the default session.
+    """
+    return boto3.client("s3")
+
+
 def get_object(bucket_name, key):
     s3client = boto3.client("s3")
     response = s3client.get_object(Bucket=bucket_name, Key=key)
@@ -32,25 +51,216 @@ def datetime_to_date(input_date):
     return output_date.date()
 
 
+class S3RangeFile(io.RawIOBase):
+    """
+    Read only, seekable file object for an S3 object.  Data are fetched on demand
+    with HTTP Range requests, in fixed size blocks kept in a small LRU cache, so
+    e.g. ZipFile can read the central directory and a single member of a large
+    archive without downloading the rest of it.  Sequential reads fetch a growing
+    number of blocks ahead, but never past readahead_limit (if set).
+    """
+
+    def __init__(
+        self,
+        bucket_name,
+        key,
+        block_size=None,
+        cache_blocks=None,
+        client=None,
+    ):
+        """
+        Parameters
+        ----------
+        bucket_name: str
+            Name of S3 bucket
+        key: str
+            Key of object within bucket
+        block_size: int, optional
+            Bytes fetched per block, defaults to _RANGE_BLOCK_SIZE
+        cache_blocks: int, optional
+            Maximum number of blocks held in memory, defaults to _RANGE_CACHE_BLOCKS
+        client: botocore.client.S3, optional
+            S3 client used for all requests, defaults to a new client.  Callers
+            opening files from several threads should create the client up front,
+            as clients cannot be created concurrently from the default session.
+        """
+        super().__init__()
+        self.bucket_name = bucket_name
+        self.key = key
+        self.block_size = block_size or _RANGE_BLOCK_SIZE
+        self.cache_blocks = max(2, cache_blocks or _RANGE_CACHE_BLOCKS)
+        self._client = client or boto3.client("s3")
+        self.size = get_file_content_length(bucket_name, key, client=self._client)
+        self.readahead_limit = None
+        self.bytes_fetched = 0
+        self.requests = 0
+        self._blocks = OrderedDict()
+        self._position = 0
+        self._last_block = None
+        self._readahead = 0
+
+    def __repr__(self) -> str:
+        return f"S3RangeFile(s3://{self.bucket_name}/{self.key})"
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence ({whence})")
+        if position < 0:
+            raise ValueError(f"Negative seek position {position}")
+        self._position = position
+        return position
+
+    def readinto(self, buffer):
+        view = memoryview(buffer).cast("B")
+        end = min(self._position + len(view), self.size)
+        if end <= self._position:
+            return 0
+
+        first_block = self._position // self.block_size
+        last_block = (end - 1) // self.block_size
+
+        # Grow the readahead while reads continue where the last one ended
+        if self._last_block is not None and first_block in (
+            self._last_block,
+            self._last_block + 1,
+        ):
+            self._readahead = min(max(1, 2 * self._readahead), self.cache_blocks // 2)
+        else:
+            self._readahead = 0
+        self._last_block = last_block
+
+        limit = self.size if self.readahead_limit is None else self.readahead_limit
+        fetch_last_block = max(
+            last_block,
+            min(last_block + self._readahead, (max(limit, 1) - 1) // self.block_size),
+        )
+        self._fetch_blocks(first_block, fetch_last_block)
+
+        written = 0
+        for block in range(first_block, last_block + 1):
+            data = self._blocks[block]
+            self._blocks.move_to_end(block)
+            block_start = block * self.block_size
+            start = max(self._position, block_start) - block_start
+            stop = min(end - block_start, len(data))
+            view[written : written + stop - start] = data[start:stop]
+            written += stop - start
+
+        self._position += written
+        return written
+
+    def _fetch_blocks(self, first_block, last_block):
+        """
+        Fetch missing blocks in the given range, consecutive missing blocks are
+        fetched with a single request
+        """
+        block = first_block
+        while block <= last_block:
+            if block in self._blocks:
+                block += 1
+                continue
+            run_end = block
+            while run_end < last_block and run_end + 1 not in self._blocks:
+                run_end += 1
+
+            start = block * self.block_size
+            stop = min((run_end + 1) * self.block_size, self.size) - 1
+            response = self._client.get_object(
+                Bucket=self.bucket_name, Key=self.key, Range=f"bytes={start}-{stop}"
+            )
+            data = response["Body"].read()
+            self.requests += 1
+            self.bytes_fetched += len(data)
+
+            for b in range(block, run_end + 1):
+                offset = (b - block) * self.block_size
+                self._blocks[b] = data[offset : offset + self.block_size]
+            block = run_end + 1
+
+        # Evict least recently used blocks, keeping at least the requested range
+        for b in range(first_block, last_block + 1):
+            self._blocks.move_to_end(b)
+        keep = max(self.cache_blocks, last_block - first_block + 1)
+        while len(self._blocks) > keep:
+            self._blocks.popitem(last=False)
+
+    def close(self):
+        if not self.closed:
+            logger.debug(
+                f"{self}: {self.requests} requests, "
+                f"{self.bytes_fetched} of {self.size} bytes read"
+            )
+            self._blocks.clear()
+        super().close()
+
+
+class S3ZipFile(zp.ZipFile):
+    """
+    Read only ZipFile for an archive in S3, only the central directory and the
+    members read are transferred (see S3RangeFile)
+    """
+
+    def __init__(self, bucket_name, zip_file_key, **kwargs):
+        """
+        Parameters
+        ----------
+        bucket_name: str
+            Name of S3 bucket
+        zip_file_key: str
+            Key of zip archive within bucket
+        kwargs: dict
+            Additional keyword arguments for S3RangeFile
+        """
+        self.range_file = S3RangeFile(bucket_name, zip_file_key, **kwargs)
+        try:
+            super().__init__(self.range_file, mode="r")
+        except Exception:
+            self.range_file.close()
+            raise
+
+        # Each member ends before the next local header (or the central directory),
+        # which bounds readahead while a member is read
+        offsets = sorted(zi.header_offset for zi in self.infolist())
+        self._member_ends = dict(zip(offsets, offsets[1:] + [self.start_dir]))
+
+    def open(self, name, mode="r", pwd=None, **kwargs):
+        zinfo = name if isinstance(name, zp.ZipInfo) else self.getinfo(name)
+        self.range_file.readahead_limit = self._member_ends.get(zinfo.header_offset)
+        return super().open(zinfo, mode=mode, pwd=pwd, **kwargs)
+
+    def close(self):
+        # ZipFile does not close file objects it is given
+        super().close()
+        self.range_file.close()
+
+
 def zip_file_to_data_frame(
     bucket_name, zip_file_key, internal_file_name, dtypes, date_parser, convert_funcs
 ):
-    zip_object = get_object(bucket_name, zip_file_key)
-
-    with io.BytesIO(zip_object["Body"].read()) as tf:
-        # rewind the file
-        tf.seek(0)
-        # Read the file as a zipfile and process the members
-        with zp.ZipFile(tf, mode="r") as zipf:
-            for subfile in zipf.infolist():
-                if subfile.filename == internal_file_name:
-                    df = pd.read_csv(
-                        zipf.open(subfile.filename),
-                        encoding="latin",
-                        dtype=dtypes,
-                        parse_dates=date_parser,
-                        converters=convert_funcs,
-                    )
+    # Only the central directory and the requested member are transferred
+    with S3ZipFile(bucket_name, zip_file_key) as zipf:
+        df = csv_engine.read_csv(
+            zipf.open(internal_file_name),
+            encoding="latin",
+            dtype=dtypes,
+            parse_dates=date_parser,
+            converters=convert_funcs,
+        )
 
     return df
 
@@ -65,11 +275,20 @@ def get_file_contents(bucket, key):
     return io.BytesIO(response["Body"].read())
 
 
-def get_file_content_length(bucket, key):
+def download_to_file(bucket, key, file_obj):
     """
-    Return the content length for give s3 bucket and key.
+    Stream the contents of a single file to an open binary file object, without
+    holding the whole object in memory
     """
     client = boto3.client("s3")
+    client.download_fileobj(Bucket=bucket, Key=key, Fileobj=file_obj)
+
+
+def get_file_content_length(bucket, key, client=None):
+    """
+    Return the content length for give s3 bucket and key.
+    """
+    client = client or boto3.client("s3")
     response = client.head_object(Bucket=bucket, Key=key)
     return response["ContentLength"]
 
@@ -89,7 +308,7 @@ def csv_file_to_data_frame(
     TODO: Change this to suit your needs
     """
     content = get_file_contents(bucket, key)
-    return pd.read_csv(
+    return csv_engine.read_csv(
         content,
         encoding=encoding,
         dtype=dtypes,
@@ -0,0 +1,244 @@
+###
+### MedDRA term resolution
+###
+### Reported AEs and indications arrive as term names (VAERS symptoms, EudraVigilance
+### reaction and indication PTs).  Names are resolved to PT MeddraIds with a hash index
+### over normalised (case folded, whitespace collapsed) PT and LLT names, LLT names
+### resolving to their PT.  PT names take precedence over LLT names.  Names that do not
+### resolve are counted for unresolved_report().
+###
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import meddra, meddra_dictionary
+
+logger = logging.getLogger("pskg_loader.term_resolution")
+
+# Arguments of meddra_dictionary.load_dictionary for the MedDRA version in use
+_MEDDRA_SOURCE = {"kwargs": None}
+
+# Resolvers built during this run, by dictionary
+_resolvers = {}
+
+# Unresolved rows by (data source, field, term)
+_unresolved = {}
+
+
+def set_meddra_source(version=None, s3_bucket=None, s3_key=None, folder_path=None):
+    """
+    Configure the MedDRA distribution used to resolve term names
+
+    Parameters
+    ----------
+    version: str, optional
+        MedDRA version (e.g. cfg['MedDRA']['VERSION'])
+    s3_bucket: str, optional
+    s3_key: str, optional
+        Key within s3_bucket of the MedDRA distribution folder
+    folder_path: str or Path, optional
+        Local MedDRA folder (exclusive with s3_bucket/s3_key)
+    """
+    if folder_path:
+        # As for generators, a local folder takes precedence over S3
+        s3_bucket, s3_key, folder_path = None, None, Path(folder_path)
+    _MEDDRA_SOURCE["kwargs"] = dict(
+        version=version, s3_bucket=s3_bucket, s3_key=s3_key, folder_path=folder_path
+    )
+
+
+def normalize_terms(terms):
+    """
+    Normalised form of term names used for matching (case folded, whitespace
+    stripped and collapsed)
+
+    Parameters
+    ----------
+    terms: pd.Series
+        Term names
+
+    Returns
+    -------
+    pd.Series
+        Normalised names, with the index of terms
+    """
+    return (
+        terms.astype(str)
+        .str.casefold()
+        .str.strip()
+        .str.replace(r"\s+", " ", regex=True)
+    )
+
+
+class MeddraTermResolver(object):
+    """
+    Hash index from normalised PT and LLT names to PT MeddraIds
+    """
+
+    def __init__(self, dictionary):
+        """
+        Build the index from a MedDRA dictionary
+
+        Parameters
+        ----------
+        dictionary: meddra_dictionary.MeddraDictionary
+            Parsed MedDRA distribution
+        """
+        self.version = dictionary.version
+        pt_df = dictionary.term_table("PT")
+        llt_df = dictionary.term_table("LLT").merge(
+            dictionary.link_table("LLT", "PT"),
+            left_on="MeddraCode",
+            right_on="MeddraCodeFrom",
+        )
+
+        names_df = pd.concat(
+            [
+                pd.DataFrame({"Name": pt_df["Name"], "PtCode": pt_df["MeddraCode"]}),
+                pd.DataFrame(
+                    {"Name": llt_df["Name"], "PtCode": llt_df["MeddraCodeTo"]}
+                ),
+            ],
+            ignore_index=True,
+        ).dropna()
+        names_df["Name"] = normalize_terms(names_df["Name"])
+        names_df = names_df.drop_duplicates(subset=["Name"])
+
+        self.index = pd.Series(
+            meddra.generate_meddra_ids(names_df["PtCode"], meddra_type="PT").to_numpy(),
+            index=names_df["Name"].to_numpy(),
+        )
+        logger.info(f"Built {self}")
+
+    def __repr__(self) -> str:
+        return f"MeddraTermResolver(version={self.version}, names={len(self.index)})"
+
+    def resolve(self, terms):
+        """
+        Resolve term names to PT MeddraIds
+
+        Parameters
+        ----------
+        terms: pd.Series
+            Term names
+
+        Returns
+        -------
+        pd.Series
+            PT MeddraIds (NaN if unresolved), with the index of terms
+        """
+        codes, uniques = pd.factorize(terms)
+        resolved = self.index.reindex(normalize_terms(pd.Series(uniques))).to_numpy()
+        # Trailing NaN is the MeddraId of missing names (code -1)
+        resolved = np.append(resolved.astype(object), np.nan)
+        return pd.Series(resolved[codes], index=terms.index, dtype=object)
+
+
+def get_dictionary():
+    """
+    Return the dictionary of the configured MedDRA distribution (see
+    set_meddra_source), None if no distribution is configured
+    """
+    if _MEDDRA_SOURCE["kwargs"] is None:
+        return None
+    return meddra_dictionary.load_dictionary(**_MEDDRA_SOURCE["kwargs"])
+
+
+def get_resolver():
+    """
+    Return the term resolver for the configured MedDRA distribution (see
+    set_meddra_source), None if no distribution is configured
+    """
+    dictionary = get_dictionary()
+    if dictionary is None:
+        return None
+    key = id(dictionary)
+    if key not in _resolvers:
+        _resolvers[key] = MeddraTermResolver(dictionary)
+    return _resolvers[key]
+
+
+def resolve_terms(terms, data_source, field):
+    """
+    Resolve term names to PT MeddraIds, counting unresolved names for
+    unresolved_report().  Missing and empty names are not resolved or counted.
+
+    Parameters
+    ----------
+    terms: pd.Series
+        Term names
+    data_source: str
+        Data source of terms (e.g. VAERS)
+    field: str
+        Field of terms (e.g. ReportedAE)
+
+    Returns
+    -------
+    pd.Series
+        PT MeddraIds ("" if unresolved), with the index of terms
+    """
+    resolver = get_resolver()
+    if resolver is None:
+        logger.warning(f"No MedDRA source configured, {field} terms not resolved")
+        return pd.Series("", index=terms.index)
+
+    meddra_ids = resolver.resolve(terms)
+    unresolved = terms[meddra_ids.isna() & terms.notna() & (terms.astype(str) != "")]
+    for term, rows in unresolved.value_counts().items():
+        key = (data_source, field, term)
+        _unresolved[key] = _unresolved.get(key, 0) + rows
+    if len(unresolved):
+        logger.info(
+            f"{data_source} {field}: {len(unresolved)} of {len(terms)} rows unresolved"
+        )
+    return meddra_ids.fillna("")
+
+
+def unresolved_counts():
+    """
+    Unresolved rows counted so far during this run
+
+    Returns
+    -------
+    dict
+        Copy of the row counts by (data source, field, term)
+    """
+    return dict(_unresolved)
+
+
+def add_unresolved(counts):
+    """
+    Add unresolved row counts to those of this run, e.g. the counts of a
+    generator whose output is reused instead of resolved again
+
+    Parameters
+    ----------
+    counts: list
+        (data source, field, term, rows) entries
+    """
+    for data_source, field, term, rows in counts:
+        key = (data_source, field, term)
+        _unresolved[key] = _unresolved.get(key, 0) + rows
+
+
+def unresolved_report():
+    """
+    Term names that did not resolve during this run
+
+    Returns
+    -------
+    pd.DataFrame
+        | DataSource | Field | Term | Rows |, most frequent first
+    """
+    report_df = pd.DataFrame(
+        [(*k, rows) for k, rows in _unresolved.items()],
+        columns=["DataSource", "Field", "Term", "Rows"],
+    )
+    return report_df.sort_values(
+        ["Rows", "DataSource", "Field", "Term"],
+        ascending=[False, True, True, True],
+        kind="stable",
+    ).reset_index(drop=True)
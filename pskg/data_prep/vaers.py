@@ -2,16 +2,17 @@
 ###
 ###
 
+import hashlib
 import re
+from concurrent.futures import ThreadPoolExecutor
 from zipfile import ZipFile
 from datetime import datetime as dt
 import logging
-import io
 from pathlib import Path
 
 import pandas as pd
 
-from . import s3_utils
+from . import csv_engine, dtype_plan, ids, normalize, s3_utils
 from .outcomes import OutcomeMapper
 
 logger = logging.getLogger("pskg_loader.vaers")
@@ -46,68 +47,73 @@ _VAERS_RXCUI = {
     "COVID19 (COVID19 (JANSSEN))": 2479835,
 }
 
+# Compact dtype plan for each file type (see dtype_plan), files are read with the
+# plain types from dtype_plan.read_dtypes()
 _VAERS_DATA_TYPES = {
     "VAERSDATA": {
-        "VAERS_ID": int,  # 0
-        "STATE": str,  # 2
+        "VAERS_ID": "int32",  # 0
+        "STATE": "category",  # 2
         "AGE_YRS": float,  # 3
         "CAGE_YR": float,  # 4
         "CAGE_MO": float,  # 5
-        "SEX": str,  # 6
-        "SYMPTOM_TEXT": str,  # 7
+        "SEX": "category",  # 6
+        "SYMPTOM_TEXT": dtype_plan.COMPACT_STRING,  # 7
         "SPLTTYPE": str,  # 8
-        "HOSPDAYS": float,  # 13
-        "NUMDAYS": float,  # 19
-        "LAB_DATA": str,  # 20
-        "V_ADMINBY": str,  # 21
-        "V_FUNDBY": str,  # 22
-        "OTHER_MEDS": str,  # 23
-        "CUR_ILL": str,  # 24
-        "HISTORY": str,  # 25
-        "PRIOR_VAX": str,  # 26
+        "HOSPDAYS": "float32",  # 13
+        "NUMDAYS": "float32",  # 19
+        "LAB_DATA": dtype_plan.COMPACT_STRING,  # 20
+        "V_ADMINBY": "category",  # 21
+        "V_FUNDBY": "category",  # 22
+        "OTHER_MEDS": dtype_plan.COMPACT_STRING,  # 23
+        "CUR_ILL": dtype_plan.COMPACT_STRING,  # 24
+        "HISTORY": dtype_plan.COMPACT_STRING,  # 25
+        "PRIOR_VAX": dtype_plan.COMPACT_STRING,  # 26
         "SPLTTYPE": str,  # 27
         "FORM_VERS": float,  # 28
-        "ALLERGIES": str,  # 32
+        "ALLERGIES": dtype_plan.COMPACT_STRING,  # 32
     },
     "VAERSVAX": {
-        "VAERS_ID": int,
-        "VAX_TYPE": str,
-        "VAX_MANU": str,
-        "VAX_LOT": str,
-        "VAX_DOSE_SERIES": str,
-        "VAX_ROUTE": str,
-        "VAX_SITE": str,
-        "VAX_NAME": str,
+        "VAERS_ID": "int32",
+        "VAX_TYPE": "category",
+        "VAX_MANU": "category",
+        "VAX_LOT": dtype_plan.COMPACT_STRING,
+        "VAX_DOSE_SERIES": "category",
+        "VAX_ROUTE": "category",
+        "VAX_SITE": "category",
+        "VAX_NAME": "category",
     },
     "VAERSSYMPTOMS": {
-        "VAERS_ID": int,
-        "SYMPTOM1": str,
+        "VAERS_ID": "int32",
+        "SYMPTOM1": "category",
         "SYMPTOMVERSION1": float,
-        "SYMPTOM2": str,
+        "SYMPTOM2": "category",
         "SYMPTOMVERSION2": float,
-        "SYMPTOM3": str,
+        "SYMPTOM3": "category",
         "SYMPTOMVERSION3": float,
-        "SYMPTOM4": str,
+        "SYMPTOM4": "category",
         "SYMPTOMVERSION4": float,
-        "SYMPTOM5": str,
+        "SYMPTOM5": "category",
         "SYMPTOMVERSION5": float,
     },
 }
 
+# Yes/no flag and date columns are read as raw strings and converted once per
+# distinct value after loading (see convert_columns), which keeps read_csv on
+# its fast C path
 _PARSE_OPTIONS = {
     "VAERSDATA": {
-        "converters": {
-            "DIED": _vaers_yesno_as_bool,
-            "DISABLE": _vaers_yesno_as_bool,
-            "L_THREAT": _vaers_yesno_as_bool,
-            "ER_VISIT": _vaers_yesno_as_bool,
-            "HOSPITAL": _vaers_yesno_as_bool,
-            "X_STAY": _vaers_yesno_as_bool,
-            "RECOVD": _vaers_yesno_as_bool,
-            "BIRTH_DEFECT": _vaers_yesno_as_bool,
-            "OFC_VISIT": _vaers_yesno_as_bool,
-            "ER_ED_VISIT": _vaers_yesno_as_bool,
-        },
+        "yesno_columns": [
+            "DIED",
+            "DISABLE",
+            "L_THREAT",
+            "ER_VISIT",
+            "HOSPITAL",
+            "X_STAY",
+            "RECOVD",
+            "BIRTH_DEFECT",
+            "OFC_VISIT",
+            "ER_ED_VISIT",
+        ],
         "parse_dates": [
             "RECVDATE",
             "RPT_DATE",
@@ -117,10 +123,12 @@ _PARSE_OPTIONS = {
             "TODAYS_DATE",
         ],
     },
-    "VAERSVAX": {"converters": None, "parse_dates": None},
-    "VAERSSYMPTOMS": {"converters": None, "parse_dates": None},
+    "VAERSVAX": {"yesno_columns": [], "parse_dates": []},
+    "VAERSSYMPTOMS": {"yesno_columns": [], "parse_dates": []},
 }
 
+_vaers_date_format = "%m/%d/%Y"
+
 _OUTCOME_MAPPING = pd.DataFrame.from_records(
     (
         ("OFC_VISIT", "doctor visit"),
@@ -153,11 +161,43 @@ _vaers_multiple_internal_file = re.compile(
     r"(?P<vfile>(?P<tag>\d{4,4}|NonDomestic)(?P<file_type>[A-Z]+)\.csv)"
 )
 
+# Columns of the components frame returned by get_components_from_*
+_component_columns = [
+    "key",
+    "file_path",
+    "internal_file_name",
+    "tag",
+    "modified",
+    "crc32",
+    "file_size",
+]
+
+# Range request size used when listing archives in S3, the end of central directory
+# record and central directory of a VAERS archive fit in one or two requests
+_DISCOVERY_BLOCK_SIZE = 64 * 1024
+
+# Archives listed concurrently by get_components_from_individual
+_DISCOVERY_WORKERS = 8
+
 
 def derive_case_id(input_row):
     return "{0}:{1}".format("VAERS", input_row["VAERS_ID"])
 
 
+def derive_case_ids(df):
+    """
+    Vectorized form of derive_case_id, return case ids for every row of df
+    """
+    return ids.concat("VAERS:", df["VAERS_ID"])
+
+
+def derive_case_codes(df):
+    """
+    Interned form of derive_case_ids, return ids.CASE_IDS codes for every row of df
+    """
+    return ids.CASE_IDS.intern_keys(df[["VAERS_ID"]], derive_case_ids)
+
+
 def derive_vax_id(input_row):
     return "{0}|{1}|{2}".format(
         input_row["VAX_MANU"], input_row["VAX_TYPE"], input_row["VAX_NAME"]
@@ -172,8 +212,74 @@ def get_date_parser(file_name):
     return _PARSE_OPTIONS[file_name]["parse_dates"]
 
 
-def get_converters(file_name):
-    return _PARSE_OPTIONS[file_name]["converters"]
+def get_yesno_columns(file_name):
+    return _PARSE_OPTIONS[file_name]["yesno_columns"]
+
+
+def get_read_dtypes(file_name):
+    """
+    Column types used when reading a VAERS file, flag and date columns are read as
+    raw strings for convert_columns()
+    """
+    raw_columns = get_yesno_columns(file_name) + get_date_parser(file_name)
+    return {
+        **dtype_plan.read_dtypes(get_dtypes(file_name)),
+        **{c: str for c in raw_columns},
+    }
+
+
+def parse_dates(values):
+    """
+    Parse a column of VAERS dates (e.g. 01/31/2021).  Each distinct string is parsed
+    once, values not in the standard VAERS format fall back to format inference.
+
+    Parameters
+    ----------
+    values: pd.Series
+        Column of raw date strings
+
+    Returns
+    -------
+    pd.Series
+        Parsed dates, or values unchanged if some cannot be parsed as dates
+    """
+    dates = pd.to_datetime(
+        values, format=_vaers_date_format, errors="coerce", cache=True
+    )
+    unparsed = dates.isna() & values.notna()
+    if unparsed.any():
+        try:
+            dates[unparsed] = pd.to_datetime(values[unparsed])
+        except (ValueError, TypeError, OverflowError):
+            logger.warning(f"Could not parse all dates in {values.name}")
+            return values
+    return dates
+
+
+def convert_columns(df, file_type):
+    """
+    Convert yes/no flag and date columns of a raw VAERS file, in place
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data read using get_read_dtypes(file_type)
+    file_type: str
+        VAERS File Type, e.g. "VAERSDATA"
+
+    Returns
+    -------
+    pd.DataFrame
+        df
+    """
+    for c in get_yesno_columns(file_type):
+        if c in df.columns:
+            # empty cells are treated as "no"
+            df[c] = normalize.apply_unique(df[c].fillna(""), _vaers_yesno_as_bool)
+    for c in get_date_parser(file_type):
+        if c in df.columns:
+            df[c] = parse_dates(df[c])
+    return df
 
 
 def standardize_manufacturer_names(input_name):
@@ -260,14 +366,80 @@ def get_rxcui(input_name):
     return _VAERS_RXCUI.get(input_name)
 
 
+def _zip_components(zf, member_re, key, file_path, unrecognized_message):
+    """
+    List the VAERS components in an open zip archive, from its central directory
+
+    Parameters
+    ----------
+    zf: ZipFile
+        Open archive
+    member_re: re.Pattern
+        Pattern matching component file names, with a tag group
+    key: str
+        S3 key of the archive, or None
+    file_path: str or Path
+        Local path of the archive, or None
+    unrecognized_message: str
+        Warning logged for files not matching member_re
+
+    Returns
+    -------
+    list
+        One dict per component, with _component_columns
+    """
+    components = []
+    for zi in zf.infolist():
+        m = member_re.match(zi.filename)
+        if m is not None:
+            components.append(
+                {
+                    "key": key,
+                    "file_path": file_path,
+                    "internal_file_name": zi.filename,
+                    "tag": m.group("tag"),
+                    "modified": dt(*zi.date_time),
+                    "crc32": zi.CRC,
+                    "file_size": zi.file_size,
+                }
+            )
+        else:
+            logger.warn(f"{unrecognized_message}: {zi.filename} ignored.")
+    return components
+
+
+def _list_archive_components(
+    member_re,
+    unrecognized_message,
+    input_bucket=None,
+    input_key=None,
+    file_path=None,
+    client=None,
+):
+    """
+    Open a local or S3 zip archive and list its VAERS components, only the end of
+    central directory record and central directory are read.  client is the S3
+    client used for S3 archives (see S3RangeFile).
+    """
+    if file_path:
+        with ZipFile(file_path, mode="r") as zf:
+            return _zip_components(zf, member_re, None, file_path, unrecognized_message)
+
+    with s3_utils.S3ZipFile(
+        input_bucket, input_key, block_size=_DISCOVERY_BLOCK_SIZE, client=client
+    ) as zf:
+        return _zip_components(zf, member_re, input_key, None, unrecognized_message)
+
+
 def get_components_from_combined(input_bucket=None, input_key=None, file_path=None):
     """
     VAERS data are published as multiple zip files (individual case), or in a single combined
-    zip file containing all years.  This function opens the combined zip file, and identifies
-    all available files inside of it and returns them as a dataframe:
+    zip file containing all years.  This function reads the central directory of the combined
+    zip file, and identifies all available files inside of it and returns them as a dataframe:
 
-        | key | file_path | internal_file_name | tag | modified |
+        | key | file_path | internal_file_name | tag | modified | crc32 | file_size |
 
+    crc32 and file_size (uncompressed) can be used to detect changed components.
 
     Parameters
     ----------
@@ -283,70 +455,47 @@ def get_components_from_combined(input_bucket=None, input_key=None, file_path=No
     pd.Dataframe
         Returns a dataframe with information for all data contained with the zip
     """
-    result = {
-        "key": [],
-        "file_path": [],
-        "internal_file_name": [],
-        "tag": [],
-        "modified": [],
-    }
+    unrecognized_message = "WARNING: Unrecognized file in VAERS archive"
     if file_path:
         if isinstance(file_path, str):
             file_path = Path(file_path)
-        with ZipFile(file_path) as zf:
-            for zi in zf.infolist():
-                m = _vaers_combined_zip_file.match(zi.filename)
-                if m is not None:
-                    result["key"].append(None)
-                    result["file_path"].append(file_path.name)
-                    result["internal_file_name"].append(zi.filename)
-                    result["tag"].append(m.group("tag"))
-                    result["modified"].append(dt(*zi.date_time))
-                else:
-                    logger.warn(
-                        f"WARNING: Unrecognized file in VAERS archive: {zi.filename} ignored."
-                    )
+        components = _list_archive_components(
+            _vaers_combined_zip_file, unrecognized_message, file_path=file_path
+        )
+        for c in components:
+            c["file_path"] = file_path.name
     elif input_bucket and input_key:
         # S3 case
-        zip_object = None
         try:
-            zip_object = s3_utils.get_object(input_bucket, input_key)
+            components = _list_archive_components(
+                _vaers_combined_zip_file,
+                unrecognized_message,
+                input_bucket=input_bucket,
+                input_key=input_key,
+            )
         except Exception:
             logger.error(
                 f"Failure to read zip data from bucket: {input_bucket} and key: {input_key}"
             )
-        with io.BytesIO(zip_object["Body"].read()) as zipf:
-            # rewind the file
-            zipf.seek(0)
-            # Read the file as a zipfile and process the members
-            with ZipFile(zipf, mode="r") as zf:
-                for zi in zf.infolist():
-                    m = _vaers_combined_zip_file.match(zi.filename)
-                    if m is not None:
-                        result["key"].append(input_key)
-                        result["file_path"].append(None)
-                        result["internal_file_name"].append(zi.filename)
-                        result["tag"].append(m.group("tag"))
-                        result["modified"].append(dt(*zi.date_time))
-                    else:
-                        logger.warn(
-                            f"WARNING: Unrecognized file in VAERS archive: {zi.filename} ignored."
-                        )
+            raise
     else:
         raise ValueError(
             "Either file_path or (input_bucket and input_key) are required."
         )
 
-    return pd.DataFrame.from_dict(result)
+    return pd.DataFrame(components, columns=_component_columns)
 
 
 def get_components_from_individual(input_bucket=None, input_key=None, folder_path=None):
     """
     VAERS data are published as multiple zip files (individual case), or in a single combined
-    zip file containing all years.  This function opens the folder or key containing multiple
-    individual zip files, and identifies all available data tags inside of it.
+    zip file containing all years.  This function finds the individual zip files in the folder
+    or key, and reads their central directories concurrently to identify all available data
+    tags inside of them.
+
+        | key | file_path | internal_file_name | tag | modified | crc32 | file_size |
 
-        | key | file_path | internal_file_name | tag | modified |
+    crc32 and file_size (uncompressed) can be used to detect changed components.
 
     input_bucket: str
         Bucket containing zip file
@@ -360,32 +509,14 @@ def get_components_from_individual(input_bucket=None, input_key=None, folder_pat
     pd.Dataframe
         Returns a dataframe with information for all data contained with the zip
     """
-    result = {
-        "key": [],
-        "file_path": [],
-        "internal_file_name": [],
-        "tag": [],
-        "modified": [],
-    }
+    archives = []
     if folder_path:
         if isinstance(folder_path, str):
             folder_path = Path(folder_path)
         for file_path in folder_path.glob("*.zip"):
             m = _vaers_multiple_zip_file.match(file_path.name)
             if m is not None:
-                with ZipFile(file_path, mode="r") as zf:
-                    for zi in zf.infolist():
-                        m = _vaers_multiple_internal_file.match(zi.filename)
-                        if m is not None:
-                            result["key"].append(None)
-                            result["file_path"].append(file_path)
-                            result["internal_file_name"].append(zi.filename)
-                            result["tag"].append(m.group("tag"))
-                            result["modified"].append(dt(*zi.date_time))
-                        else:
-                            logger.warn(
-                                f"Unknown file type in VAERS archive: {zi.filename} ignored."
-                            )
+                archives.append({"file_path": file_path})
             else:
                 logger.warn(
                     f"Unknown file type in VAERS folder: {file_path.name} ignored."
@@ -399,28 +530,53 @@ def get_components_from_individual(input_bucket=None, input_key=None, folder_pat
                 continue
             m = _vaers_multiple_zip_file.match(file_only)
             if m is not None:
-                zip_object = s3_utils.get_object(input_bucket, obj.key)
-                with io.BytesIO(zip_object["Body"].read()) as zipf:
-                    # rewind the file
-                    zipf.seek(0)
-                    with ZipFile(zipf, mode="r") as zf:
-                        for zi in zf.infolist():
-                            m = _vaers_multiple_internal_file.match(zi.filename)
-                            if m is not None:
-                                result["key"].append(obj.key)
-                                result["file_path"].append(None)
-                                result["internal_file_name"].append(zi.filename)
-                                result["tag"].append(m.group("tag"))
-                                result["modified"].append(dt(*zi.date_time))
-                            else:
-                                logger.warn(
-                                    f"Unknown file type in VAERS archive: {zi.filename} ignored."
-                                )
+                archives.append({"input_bucket": input_bucket, "input_key": obj.key})
             else:
                 logger.warn(f"Unknown file type in {input_key} key: {file_only} ignored.")
                 exit(0)
 
-    return pd.DataFrame.from_dict(result)
+    # boto3 clients are thread safe, but creating them from the default session is
+    # not, so every worker shares one client
+    client = s3_utils.get_client() if archives and not folder_path else None
+
+    def list_components(archive):
+        return _list_archive_components(
+            _vaers_multiple_internal_file,
+            "Unknown file type in VAERS archive",
+            client=client,
+            **archive,
+        )
+
+    with ThreadPoolExecutor(max_workers=_DISCOVERY_WORKERS) as executor:
+        components = [c for cs in executor.map(list_components, archives) for c in cs]
+
+    return pd.DataFrame(components, columns=_component_columns)
+
+
+def get_tag_fingerprints(components):
+    """
+    Summarize the archive members behind each data tag, unchanged members (same
+    name, crc32 and size) give the same fingerprint in later builds.
+
+    Parameters
+    ----------
+    components: pd.DataFrame
+        Components from get_components_from_combined or get_components_from_individual
+
+    Returns
+    -------
+    dict
+        Fingerprint (str) by data tag
+    """
+    fingerprints = {}
+    for tag, tag_df in components.groupby("tag"):
+        members = sorted(
+            tag_df[["internal_file_name", "crc32", "file_size"]].itertuples(
+                index=False, name=None
+            )
+        )
+        fingerprints[tag] = hashlib.sha1(repr(members).encode("utf-8")).hexdigest()
+    return fingerprints
 
 
 def raw_load(
@@ -448,30 +604,30 @@ def raw_load(
 
     Returns
     pd.DataFrame
-        Dataframe containing raw VAERS data, with dates parsed and basic conversions applied
+        Dataframe containing raw VAERS data, with dates parsed, basic conversions and
+        the compact dtype plan applied
     """
 
     if file_path:
         with ZipFile(file_path) as zf:
-            df = pd.read_csv(
+            df = csv_engine.read_csv(
                 zf.open(internal_file_name),
                 encoding="ISO-8859-1",
-                on_bad_lines="error",
-                dtype=get_dtypes(file_type),
-                parse_dates=get_date_parser(file_type),
-                converters=get_converters(file_type),
+                dtype=get_read_dtypes(file_type),
             )
     else:
         df = s3_utils.zip_file_to_data_frame(
             bucket_name=input_bucket,
             zip_file_key=input_key,
             internal_file_name=internal_file_name,
-            dtypes=get_dtypes(file_type),
-            date_parser=get_date_parser(file_type),
-            convert_funcs=get_converters(file_type),
+            dtypes=get_read_dtypes(file_type),
+            date_parser=None,
+            convert_funcs=None,
         )
 
-    return df
+    return dtype_plan.apply_plan(
+        convert_columns(df, file_type), get_dtypes(file_type), name=internal_file_name
+    )
 
 
 def raw_load_types(input_bucket, input_key, file_path):
@@ -0,0 +1,414 @@
+###
+### Generated Neo4J load scripts
+###
+### Load statements are generated from the load schemas of the generators writing
+### each file (see graph_objects.schema), so the scripts always match the columns and
+### types of the load files.  build_pskg_graph.py writes the load script for the
+### registered pools alongside the load files (see ImportPoolManager.write_text);
+### neo4j/load_data/load.cypher is the script of the default configuration.  Builds
+### with a previous MedDRA version also write the script applying the MedDRA delta
+### files (meddra_delta_script).
+###
+
+from graph_objects import schema
+
+# Rows per transaction of every LOAD CSV statement
+PERIODIC_COMMIT = 1000
+
+_HEADER = """\
+// Generated by build_pskg_graph.py from the load schemas of the generators, do not
+// edit.  Tested with Neo4J 4.4.4
+"""
+
+_LOAD = """\
+RETURN "Loading {file_name}{detail}..." AS `Action:`;
+USING PERIODIC COMMIT {periodic_commit}
+LOAD CSV WITH HEADERS FROM "file:///{file_name}" AS r
+FIELDTERMINATOR '\\t'
+{body};
+"""
+
+_NOT_LOADED = "// {file_name} has no load schema and is not loaded by this script\n"
+
+_POST_IMPORT = """\
+RETURN "Load Complete..." AS `Action:`;
+
+RETURN "Post Import Processing..." AS `Action:`;
+
+RETURN "Setting VAERS Quality Attributes..." AS `Action:`;
+
+// Set quality metrics on VAERS COVID19 vaccine data
+// Specifically identify VAERS cases for COVID19 that:
+//    Has a vaccination date, and it is not before 01-Dec-2021
+//    Has a received date not prior to 01-Dec-2021
+//    Has a TTO of less 100 days (this is an arbitrary parameter which
+//        will be moved to a configuration file)
+// These quality checks help eliminate COVID19 vaccines with incorrect
+// vaccination dates (e.g. predating the availabilitiy of COVID19 vaccines)
+// and questionable onset times.
+MATCH (c:Case {DataSource:'VAERS'}) -[r:REPORTED_AE]->(md:MeddraPT)
+MATCH (c) -[:ADMINISTERED]->(v:Vaccine {VaxType:'COVID19'})
+WHERE   r.OnsetDate >= datetime('2020-12-01')
+        AND r.LengthInDays < 100
+        AND c.ReceivedDate >= datetime('2020-12-01')
+        AND EXISTS(c.PatientAgeRangeMin) SET c.VaersQC = 1;
+
+RETURN "Post Import Processing Complete." AS `Action:`;
+
+RETURN "PSKG Graph Loaded." AS `Action:`;
+"""
+
+_MEDDRA_DELTA_HEADER = """\
+// Applies MedDRA delta files to a graph loaded with the previous MedDRA version.
+// Each row carries a Change column: added, removed, or changed (renamed for terms).
+// Removed links are deleted before links are merged, and removed nodes after every
+// file, so re-parented terms are linked once and no node is deleted with its links
+// still pending.
+"""
+
+_MEDDRA_VERSION = """\
+// Every MedDRA term now belongs to the current version
+RETURN "Updating MeddraVersion..." AS `Action:`;
+CALL {{
+{matches}
+}}
+SET m.MeddraVersion = '{version}';
+"""
+
+_NO_MEDDRA_VERSION = (
+    "// The current MedDRA version has no release file, MeddraVersion is not updated\n"
+)
+
+_MEDDRA_TERM_HEADER = """\
+// Loads MedDRA terms written one file per label, as the MedDRA term statements of
+// the load script do.  Labels are disjoint, so the per label scripts may instead be
+// run in concurrent sessions:
+{per_label}
+
+"""
+
+
+def _lower_first(name):
+    return name[:1].lower() + name[1:]
+
+
+def _properties(load_schema, properties, var, literals=None, fill_missing=False):
+    """
+    Aligned "var.Property = expression" lines, expressions only apply to unset
+    properties with fill_missing
+    """
+    expressions = {p: load_schema.column(c).cypher() for p, c in properties.items()}
+    expressions.update(literals or {})
+    if fill_missing:
+        expressions = {p: f"coalesce({var}.{p}, {e})" for p, e in expressions.items()}
+    width = max(len(p) for p in expressions)
+    return [f"{var}.{p.ljust(width)} = {e}" for p, e in expressions.items()]
+
+
+def _map(load_schema, properties):
+    return ", ".join(
+        f"{p}: {load_schema.column(c).cypher()}" for p, c in properties.items()
+    )
+
+
+def _set(lines, indent=""):
+    return f"{indent}SET\n" + ",\n".join(f"{indent}    {line}" for line in lines)
+
+
+def _node_merge(load_schema, node, label, indent=""):
+    lines = [f"{indent}MERGE (n:{label} {{{_map(load_schema, node.key)}}})"]
+    if node.properties:
+        assignments = _properties(
+            load_schema, node.properties, "n", fill_missing=node.fill_missing
+        )
+        lines.append(_set(assignments, indent))
+    return "\n".join(lines)
+
+
+def _node_body(load_schema, node):
+    if not isinstance(node.label, dict):
+        return _node_merge(load_schema, node, node.label)
+    # Labels cannot be set from data, each row is merged by the FOREACH of its label
+    blocks = []
+    for value, label in node.label.items():
+        blocks.append(
+            f"FOREACH (ignoreMe IN CASE WHEN r.{node.label_column} = '{value}' "
+            f"THEN [1] ELSE [] END |\n"
+            f"{_node_merge(load_schema, node, label, indent='    ')}\n)"
+        )
+    return "\n".join(blocks)
+
+
+def _endpoint(load_schema, endpoint, var):
+    column = load_schema.column(endpoint.column)
+    if endpoint.type is not None:
+        column = schema.Column(column.name, endpoint.type)
+    return f"({var}:{endpoint.label} {{{endpoint.key}: {column.cypher()}}})"
+
+
+def _relationship_body(load_schema, rel):
+    key = f" {{{_map(load_schema, rel.key)}}}" if rel.key else ""
+    lines = [
+        f"MATCH {_endpoint(load_schema, rel.start, 's')}",
+        f"MATCH {_endpoint(load_schema, rel.end, 't')}",
+        f"MERGE (s)-[e:{rel.type}{key}]->(t)",
+    ]
+    assignments = []
+    if rel.properties:
+        assignments += _properties(load_schema, rel.properties, "e")
+    if rel.end_properties:
+        assignments += _properties(load_schema, {}, "t", literals=rel.end_properties)
+    if assignments:
+        lines.append(_set(assignments))
+    return "\n".join(lines)
+
+
+def _relationship_removal_body(load_schema, removal):
+    key = f" {{{_map(load_schema, removal.key)}}}" if removal.key else ""
+    return (
+        f"MATCH {_endpoint(load_schema, removal.start, 's')}"
+        f"-[e:{removal.type}{key}]->{_endpoint(load_schema, removal.end, 't')}\n"
+        f"DELETE e"
+    )
+
+
+def _node_removal_body(load_schema, removal, label):
+    lines = [f"MATCH (n:{label} {{{_map(load_schema, removal.key)}}})"]
+    if removal.unlink is None:
+        lines.append("DETACH DELETE n")
+    else:
+        # Other relationships (e.g. from cases) keep the node
+        lines += [
+            f"OPTIONAL MATCH (n)-[e:{'|'.join(removal.unlink)}]-()",
+            "DELETE e",
+            "WITH DISTINCT n",
+            "WHERE size((n)--()) = 0",
+            "DELETE n",
+        ]
+    return "\n".join(lines)
+
+
+def _merge_bodies(load_schema, merge):
+    """
+    (detail, body) of the statements loading one merge, removals of a label per
+    value remove each label by a statement of its own so matches use its index
+    """
+    if isinstance(merge, schema.Node):
+        bodies = [(", ".join(merge.labels), _node_body(load_schema, merge), None)]
+    elif isinstance(merge, schema.Relationship):
+        detail = f"{merge.start.label} -> {merge.end.label}"
+        bodies = [(detail, _relationship_body(load_schema, merge), None)]
+    elif isinstance(merge, schema.RelationshipRemoval):
+        detail = f"removed {merge.start.label} -> {merge.end.label}"
+        bodies = [(detail, _relationship_removal_body(load_schema, merge), None)]
+    elif isinstance(merge.label, dict):
+        bodies = [
+            (
+                f"removed {label}",
+                _node_removal_body(load_schema, merge, label),
+                f"r.{merge.label_column} = '{value}'",
+            )
+            for value, label in merge.label.items()
+        ]
+    else:
+        detail = f"removed {merge.label}"
+        bodies = [(detail, _node_removal_body(load_schema, merge, merge.label), None)]
+
+    for detail, body, where in bodies:
+        conditions = [c for c in [merge.where, where] if c]
+        if len(conditions) > 1:
+            conditions = [f"({c})" for c in conditions]
+        if conditions:
+            body = f"WITH r WHERE {' AND '.join(conditions)}\n{body}"
+        yield detail, body
+
+
+def load_statements(load_schema, file_name, merges=None):
+    """
+    Cypher statements loading a load file
+
+    Parameters
+    ----------
+    load_schema: schema.LoadSchema
+        Load schema of the file
+    file_name: str
+        Load file name, read from the Neo4J import folder
+    merges: list, optional
+        Merges of load_schema loaded, defaults to all
+
+    Returns
+    -------
+    str
+        One LOAD CSV statement per node or relationship merged from the file
+    """
+    comment = "".join(
+        f"// {line}\n" for line in (load_schema.comment or "").splitlines()
+    )
+    bodies = [
+        detail_body
+        for merge in (load_schema.merges if merges is None else merges)
+        for detail_body in _merge_bodies(load_schema, merge)
+    ]
+    statements = [
+        _LOAD.format(
+            file_name=file_name,
+            # Files loaded by several statements
+            detail=f" ({detail})" if len(load_schema.merges) > 1 else "",
+            periodic_commit=PERIODIC_COMMIT,
+            body=body,
+        )
+        for detail, body in bodies
+    ]
+    return comment + "\n".join(statements)
+
+
+def schema_statements(schemas):
+    """
+    Unique constraints of merged node keys, and declared indexes
+
+    Parameters
+    ----------
+    schemas: list
+        schema.LoadSchema objects
+
+    Returns
+    -------
+    str
+        CREATE CONSTRAINT and CREATE INDEX statements, each created once
+    """
+    constraints = {}
+    indexes = {}
+    for load_schema in schemas:
+        for merge in load_schema.merges:
+            if not isinstance(merge, schema.Node) or len(merge.key) != 1:
+                continue
+            (key,) = merge.key
+            for label in merge.labels:
+                name = f"{_lower_first(label)}{key}Constraint"
+                constraints[name] = (
+                    f"CREATE CONSTRAINT {name} IF NOT EXISTS "
+                    f"ON (n:{label}) ASSERT n.{key} IS UNIQUE;"
+                )
+        for index in load_schema.indexes:
+            name = f"{_lower_first(index.label)}{''.join(index.properties)}Index"
+            properties = ", ".join(f"n.{p}" for p in index.properties)
+            indexes[name] = (
+                f"CREATE INDEX {name} IF NOT EXISTS "
+                f"FOR (n:{index.label}) ON ({properties});"
+            )
+
+    lines = []
+    if constraints:
+        lines += ['RETURN "Creating constraints..." AS `Action:`;']
+        lines += list(constraints.values())
+    if indexes:
+        lines += ['RETURN "Creating indexes..." AS `Action:`;']
+        lines += list(indexes.values())
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def load_script(load_files):
+    """
+    Build the load script of a set of load files
+
+    Parameters
+    ----------
+    load_files: list
+        (file name, schema.LoadSchema or None) in load order, e.g. from
+        ImportPoolManager.load_files().  Files without a schema are not loaded.
+
+    Returns
+    -------
+    str
+        Script text, for cypher-shell -f
+    """
+    schemas = [s for _, s in load_files if s is not None]
+    sections = [_HEADER, schema_statements(schemas)]
+    for file_name, load_schema in load_files:
+        if load_schema is None:
+            sections.append(_NOT_LOADED.format(file_name=file_name))
+        else:
+            sections.append(load_statements(load_schema, file_name))
+    sections.append(_POST_IMPORT)
+    return "\n".join(sections)
+
+
+def meddra_term_scripts(term_files, script_name="load_meddra_terms.cypher"):
+    """
+    Build load scripts for MedDRA terms written one file per label
+
+    Parameters
+    ----------
+    term_files: dict
+        (file name, schema.LoadSchema) of each label's load file by MedDRA term type
+        (e.g. {"PT": ("MeddraTermPT.tsv", schema)})
+    script_name: str, optional
+        Name of the script loading every label, defaults to
+        "load_meddra_terms.cypher".  Per label scripts are named after it (e.g.
+        load_meddra_terms_PT.cypher).
+
+    Returns
+    -------
+    dict
+        Script text by script file name, the script for every label first
+    """
+    stem, suffix = script_name.rsplit(".", 1)
+    label_scripts = {
+        f"{stem}_{meddra_type}.{suffix}": schema_statements([load_schema])
+        + load_statements(load_schema, file_name)
+        for meddra_type, (file_name, load_schema) in term_files.items()
+    }
+    header = _HEADER + _MEDDRA_TERM_HEADER.format(
+        per_label="\n".join(f"//   {name}" for name in label_scripts)
+    )
+    scripts = {script_name: header + "\n".join(label_scripts.values())}
+    for name, text in label_scripts.items():
+        scripts[name] = header + text
+    return scripts
+
+
+def meddra_delta_script(load_files, meddra_version, term_labels):
+    """
+    Build the script applying MedDRA delta files to a graph loaded with the
+    previous MedDRA version
+
+    Parameters
+    ----------
+    load_files: list
+        (file name, schema.LoadSchema) of each delta file, in load order
+    meddra_version: str or None
+        Current MedDRA version from its release file, set on every term.  None
+        leaves MeddraVersion as loaded.
+    term_labels: list
+        Labels of the MedDRA terms updated with meddra_version
+
+    Returns
+    -------
+    str
+        Script text, for cypher-shell -f
+    """
+    sections = [_HEADER + _MEDDRA_DELTA_HEADER]
+    for file_name, load_schema in load_files:
+        merges = [
+            m for m in load_schema.merges if not isinstance(m, schema.NodeRemoval)
+        ]
+        sections.append(load_statements(load_schema, file_name, merges))
+    # Nodes are removed after the files linking them, in reverse load order
+    for file_name, load_schema in reversed(load_files):
+        merges = [m for m in load_schema.merges if isinstance(m, schema.NodeRemoval)]
+        if merges:
+            sections.append(load_statements(load_schema, file_name, merges))
+
+    if meddra_version is None:
+        sections.append(_NO_MEDDRA_VERSION)
+    else:
+        # A UNION of label matches uses the label stores, not a scan of all nodes
+        matches = "\n    UNION\n".join(
+            f"    MATCH (m:{label}) RETURN m" for label in term_labels
+        )
+        sections.append(
+            _MEDDRA_VERSION.format(
+                matches=matches, version=str(meddra_version).replace("'", "\\'")
+            )
+        )
+    return "\n".join(sections)
@@ -0,0 +1,459 @@
+###
+### Typed load file schemas
+###
+### Each generator base class declares the columns of its load file with a type, and
+### the nodes and relationships merged from every row (Generator._schema).  Output is
+### converted to the column types before it is written (LoadSchema.format_frame), and
+### load scripts are generated from the same declarations (see load_scripts), so the
+### load does no cleanup per row and the script always matches the file columns.
+###
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Format of datetime values in load files, read by the Cypher datetime() function
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# Cypher conversion of a LOAD CSV field by column type ({} is the field)
+CYPHER_CONVERSIONS = {
+    "string": "{}",
+    "integer": "toInteger({})",
+    "float": "toFloat({})",
+    "boolean": "toBoolean({})",
+    "datetime": "datetime({})",
+    "list": 'split({}, "{delimiter}")',
+}
+
+_BOOLEANS = {
+    True: "true",
+    False: "false",
+    "True": "true",
+    "False": "false",
+    "true": "true",
+    "false": "false",
+}
+
+
+class Column(object):
+    """
+    Typed load file column
+    """
+
+    def __init__(self, name, type="string", trim=False, positive=False, delimiter=","):
+        """
+        Parameters
+        ----------
+        name: str
+            Column header
+        type: str, optional
+            One of CYPHER_CONVERSIONS, defaults to "string"
+        trim: bool, optional
+            Strip leading and trailing whitespace from strings, blank values are
+            written empty (loaded as null)
+        positive: bool, optional
+            Write numbers that are not greater than zero empty
+        delimiter: str, optional
+            Separator of list items, defaults to ","
+        """
+        if type not in CYPHER_CONVERSIONS:
+            raise ValueError(f"Column {name}: unknown type {type}")
+        self.name = name
+        self.type = type
+        self.trim = trim
+        self.positive = positive
+        self.delimiter = delimiter
+
+    def __repr__(self) -> str:
+        return f"Column({self.name}, {self.type})"
+
+    def cypher(self, row="r"):
+        """
+        Cypher expression reading this column from a LOAD CSV row
+        """
+        return CYPHER_CONVERSIONS[self.type].format(
+            f"{row}.{self.name}", delimiter=self.delimiter
+        )
+
+    def format(self, values):
+        """
+        Convert column values for output
+
+        Parameters
+        ----------
+        values: pd.Series
+            Column values as assembled by a generator
+
+        Returns
+        -------
+        pd.Series
+            Values to write, missing or invalid values are NaN (written empty)
+        """
+        if self.type == "string":
+            if not self.trim:
+                return values
+            trimmed = values.where(values.isna(), values.astype(str).str.strip())
+            return trimmed.replace("", np.nan)
+        if self.type in ("integer", "float"):
+            numbers = pd.to_numeric(values, errors="coerce")
+            if self.positive:
+                numbers = numbers.where(numbers > 0)
+            if self.type == "integer" and numbers.dtype.kind != "i":
+                # As toInteger(), fractions are truncated
+                numbers = np.trunc(numbers.astype(float)).astype("Int64")
+            return numbers
+        if self.type == "boolean":
+            return values.map(_BOOLEANS)
+        if self.type == "datetime":
+            return pd.to_datetime(values, errors="coerce").dt.strftime(DATETIME_FORMAT)
+        # list
+        present = values.notna()
+        items = values[present].map(self._join_items)
+        return items.reindex(values.index).replace("", np.nan)
+
+    def _join_items(self, value):
+        if isinstance(value, str):
+            value = value.split(self.delimiter)
+        return self.delimiter.join(
+            str(item).strip() for item in value if str(item).strip()
+        )
+
+
+def _column_map(columns):
+    """
+    Property to column mapping from a column name, a list of names (properties
+    named as their columns) or a dict
+    """
+    if columns is None:
+        return None
+    if isinstance(columns, str):
+        return {columns: columns}
+    if isinstance(columns, dict):
+        return dict(columns)
+    return {name: name for name in columns}
+
+
+class Endpoint(object):
+    """
+    Node matched by a relationship, by a unique property read from a column
+    """
+
+    def __init__(self, label, key, column=None, type=None):
+        """
+        Parameters
+        ----------
+        label: str
+            Node label
+        key: str
+            Node property matched
+        column: str, optional
+            Column holding the property value, defaults to key
+        type: str, optional
+            Type the column is read as for this match, defaults to the column type
+            (e.g. "integer" to match codes in a column that also holds MeddraIds)
+        """
+        self.label = label
+        self.key = key
+        self.column = column or key
+        self.type = type
+
+
+class Node(object):
+    """
+    Node merged from each load file row
+    """
+
+    def __init__(
+        self,
+        label,
+        key,
+        properties=None,
+        label_column=None,
+        fill_missing=False,
+        where=None,
+    ):
+        """
+        Parameters
+        ----------
+        label: str or dict
+            Node label, or labels by value of label_column
+        key: str, list or dict
+            Properties merged on (see properties)
+        properties: list or dict, optional
+            Properties set on the node: column names, or columns by property name.
+            Defaults to every column not in key.
+        label_column: str, optional
+            Column selecting the label of each row, when label is a dict
+        fill_missing: bool, optional
+            Only set properties the node does not have yet, e.g. when earlier rows
+            take precedence
+        where: str, optional
+            Cypher condition on the row (r) selecting the rows merged, defaults to
+            every row
+        """
+        if isinstance(label, dict) and label_column is None:
+            raise ValueError("label_column is required with a label per value")
+        self.label = label
+        self.key = _column_map(key)
+        self.properties = _column_map(properties)
+        self.label_column = label_column
+        self.fill_missing = fill_missing
+        self.where = where
+
+    @property
+    def labels(self):
+        if isinstance(self.label, dict):
+            return list(self.label.values())
+        return [self.label]
+
+    def bind(self, column_names):
+        """
+        Resolve default properties against the load file columns
+        """
+        if self.properties is None:
+            self.properties = {
+                name: name for name in column_names if name not in self.key.values()
+            }
+
+    def columns(self):
+        columns = list(self.key.values()) + list(self.properties.values())
+        return columns + ([self.label_column] if self.label_column else [])
+
+
+class Relationship(object):
+    """
+    Relationship merged between two existing nodes from each load file row
+    """
+
+    def __init__(
+        self,
+        type,
+        start,
+        end,
+        properties=None,
+        key=None,
+        end_properties=None,
+        where=None,
+    ):
+        """
+        Parameters
+        ----------
+        type: str
+            Relationship type
+        start: Endpoint
+        end: Endpoint
+            Nodes linked, rows whose nodes do not both exist are skipped
+        properties: list or dict, optional
+            Properties set on the relationship: column names, or columns by
+            property name
+        key: list or dict, optional
+            Properties merged on, so one relationship is created per distinct key
+        end_properties: dict, optional
+            Cypher literals by property name, set on the end node
+        where: str, optional
+            Cypher condition on the row (r) selecting the rows merged, defaults to
+            every row
+        """
+        self.type = type
+        self.start = start
+        self.end = end
+        self.properties = _column_map(properties) or {}
+        self.key = _column_map(key) or {}
+        self.end_properties = end_properties or {}
+        self.where = where
+
+    def bind(self, column_names):
+        pass
+
+    def columns(self):
+        return (
+            [self.start.column, self.end.column]
+            + list(self.key.values())
+            + list(self.properties.values())
+        )
+
+
+class NodeRemoval(object):
+    """
+    Node deleted for each load file row, e.g. terms removed by a MedDRA delta
+    """
+
+    def __init__(self, label, key, label_column=None, unlink=None, where=None):
+        """
+        Parameters
+        ----------
+        label: str or dict
+            Node label, or labels by value of label_column.  Each label is removed
+            by a statement of its own, so every match uses the label's index.
+        key: str, list or dict
+            Properties matched (see Node)
+        label_column: str, optional
+            Column selecting the label of each row, when label is a dict
+        unlink: list, optional
+            Relationship types deleted with the node, which is then only deleted if
+            no other relationships (e.g. from cases) remain.  Defaults to deleting
+            the node with all its relationships.
+        where: str, optional
+            Cypher condition on the row (r) selecting the rows removed
+        """
+        if isinstance(label, dict) and label_column is None:
+            raise ValueError("label_column is required with a label per value")
+        self.label = label
+        self.key = _column_map(key)
+        self.label_column = label_column
+        self.unlink = unlink
+        self.where = where
+
+    @property
+    def labels(self):
+        if isinstance(self.label, dict):
+            return list(self.label.values())
+        return [self.label]
+
+    def bind(self, column_names):
+        pass
+
+    def columns(self):
+        columns = list(self.key.values())
+        return columns + ([self.label_column] if self.label_column else [])
+
+
+class RelationshipRemoval(object):
+    """
+    Relationship deleted for each load file row
+    """
+
+    def __init__(self, type, start, end, key=None, where=None):
+        """
+        Parameters
+        ----------
+        type: str
+            Relationship type
+        start: Endpoint
+        end: Endpoint
+            Nodes linked
+        key: list or dict, optional
+            Relationship properties matched, as merged (see Relationship)
+        where: str, optional
+            Cypher condition on the row (r) selecting the rows removed
+        """
+        self.type = type
+        self.start = start
+        self.end = end
+        self.key = _column_map(key) or {}
+        self.where = where
+
+    def bind(self, column_names):
+        pass
+
+    def columns(self):
+        return [self.start.column, self.end.column] + list(self.key.values())
+
+
+def rows_where(merge, where):
+    """
+    Copy of a merge (Node, Relationship or removal) applied only to the rows
+    matching a Cypher condition on the row (r)
+    """
+    merge = copy.copy(merge)
+    merge.where = f"({merge.where}) AND ({where})" if merge.where else where
+    return merge
+
+
+class Index(object):
+    """
+    Index on node properties, for lookups after the load
+    """
+
+    def __init__(self, label, *properties):
+        self.label = label
+        self.properties = list(properties)
+
+
+class LoadSchema(object):
+    """
+    Typed columns of a load file, and the nodes and relationships loaded from it
+    """
+
+    def __init__(self, columns, merges, indexes=(), comment=None):
+        """
+        Parameters
+        ----------
+        columns: list
+            Column objects, in file order
+        merges: list
+            Node, Relationship and removal objects, loaded in order
+        indexes: list, optional
+            Index objects created before the load
+        comment: str, optional
+            Note written before the load statements
+        """
+        self.columns = list(columns)
+        self.column_names = [c.name for c in self.columns]
+        self.merges = list(merges)
+        self.indexes = list(indexes)
+        self.comment = comment
+
+        for merge in self.merges:
+            merge.bind(self.column_names)
+            missing = [c for c in merge.columns() if c not in self.column_names]
+            if missing:
+                raise ValueError(f"Columns not in load file: {', '.join(missing)}")
+
+    def column(self, name):
+        return self.columns[self.column_names.index(name)]
+
+    def restrict(self, label_column, values):
+        """
+        Schema of a file holding only rows with the given label_column values
+
+        Parameters
+        ----------
+        label_column: str
+            Column selecting node labels
+        values: list
+            Values present in the file, nodes with a single label left are merged
+            without checking the row value
+
+        Returns
+        -------
+        LoadSchema
+        """
+        merges = []
+        for merge in self.merges:
+            if isinstance(merge, Node) and merge.label_column == label_column:
+                labels = {v: merge.label[v] for v in values}
+                merge = Node(
+                    label=labels if len(labels) > 1 else labels[values[0]],
+                    key=merge.key,
+                    properties=merge.properties,
+                    label_column=label_column if len(labels) > 1 else None,
+                    fill_missing=merge.fill_missing,
+                    where=merge.where,
+                )
+            merges.append(merge)
+        return LoadSchema(self.columns, merges, self.indexes, self.comment)
+
+    def format_frame(self, df):
+        """
+        Convert the columns of an output frame to their load file types
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Output rows, columns not in this schema are left as is
+
+        Returns
+        -------
+        pd.DataFrame
+            Copy of df with converted columns
+        """
+        return df.assign(
+            **{
+                column.name: column.format(df[column.name])
+                for column in self.columns
+                if column.type != "string" or column.trim
+                if column.name in df.columns
+            }
+        )
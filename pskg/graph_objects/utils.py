@@ -8,7 +8,9 @@
 
 import abc
 import datetime
+import hashlib
 import io
+import json
 import logging
 import os
 import time
@@ -17,13 +19,16 @@ from collections import namedtuple
 
 import boto3
 import pandas as pd
+import pyarrow as pa
 import s3fs
 
+from data_prep import csv_engine, dtype_plan, term_resolution
 from data_prep.s3_utils import (
     get_file_content_last_modified,
     get_file_content_length,
     write_data_frame_to_S3,
 )
+from graph_objects import schema
 
 
 class ImportPoolManager(object):
@@ -32,6 +37,23 @@ class ImportPoolManager(object):
     """
 
     manifest_file = "Manifest.tsv"
+    manifest_schema = schema.LoadSchema(
+        columns=[
+            schema.Column("Path"),
+            schema.Column("LastModified", "datetime"),
+            schema.Column("Tag"),
+            schema.Column("Rows", "float"),
+            schema.Column("Size", "float"),
+            schema.Column("Md5"),
+        ],
+        merges=[
+            schema.Node(
+                "Manifest",
+                key=["Path", "Tag", "Rows", "Size", "LastModified"],
+                properties=["Md5"],
+            )
+        ],
+    )
 
     def __init__(
         self,
@@ -39,6 +61,7 @@ class ImportPoolManager(object):
         s3_output_key=None,
         output_folder=None,
         name="ImportPoolManager",
+        segment_cache=None,
     ):
         """
         Build ImportPoolManager object.
@@ -50,6 +73,9 @@ class ImportPoolManager(object):
             Name of key within output bucket
         output_folder: str, optional
             Name of local output folder (exclusive with s3_bucket/s3_key)
+        segment_cache: SegmentCache, optional
+            Output segments from previous builds, reused by generators with a
+            matching segment_key
 
         Returns
         -------
@@ -69,6 +95,7 @@ class ImportPoolManager(object):
 
         self.registered_pools = []
         self.name = name
+        self.segment_cache = segment_cache
 
         if output_folder:
             if isinstance(output_folder, str):
@@ -123,6 +150,7 @@ class ImportPoolManager(object):
                 s3_bucket=self.s3_bucket,
                 s3_key=self.s3_key,
                 folder_path=self.output_folder,
+                segment_cache=self.segment_cache,
             )
 
             t = pool.gather_manifest()
@@ -134,37 +162,116 @@ class ImportPoolManager(object):
                 )
 
         final_manifest_df = pd.concat(manifests_df).drop_duplicates()
+        # Tag is part of the Manifest node key, which cannot be null
+        final_manifest_df["Tag"] = (
+            final_manifest_df["Tag"].fillna("").replace("", "(no tag)")
+        )
 
+        if self.segment_cache is not None:
+            self.segment_cache.prune()
+
+        self.write_report(
+            self.manifest_schema.format_frame(final_manifest_df),
+            self.manifest_file,
+            "manifest",
+        )
+
+    def load_files(self):
+        """
+        Load files of the registered pools and the manifest, with their load schemas
+
+        Returns
+        -------
+        list
+            (file name, schema.LoadSchema or None) in load order
+        """
+        load_files = [
+            (pool.output_file, pool.load_schema()) for pool in self.registered_pools
+        ]
+        return load_files + [(self.manifest_file, self.manifest_schema)]
+
+    def write_report(self, df, file_name, description="report"):
+        """
+        Write a TSV file with header alongside the load files
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Report contents
+        file_name: str
+            Name of the file in the output folder or key
+        description: str, optional
+            Used in log messages, defaults to "report"
+        """
         if self.output_folder:
-            manifest_path = self.output_folder / self.manifest_file
+            report_path = self.output_folder / file_name
             self.logger.info(
-                f"Writing manifest file: file://{manifest_path.resolve().as_posix()}"
-            )
-            final_manifest_df.to_csv(
-                self.output_folder / self.manifest_file,
-                sep="\t",
-                index=False,
+                f"Writing {description} file: file://{report_path.resolve().as_posix()}"
             )
+            df.to_csv(report_path, sep="\t", index=False)
         else:
-            manifest_key = f"s3://{self.s3_bucket}/{self.s3_key}/{self.manifest_file}"
-            self.logger.info(f"Writing manifest file: {manifest_key}")
+            report_key = f"s3://{self.s3_bucket}/{self.s3_key}/{file_name}"
+            self.logger.info(f"Writing {description} file: {report_key}")
             write_data_frame_to_S3(
-                df=final_manifest_df,
+                df=df,
                 bucket_name=self.s3_bucket,
-                file_name=f"{self.s3_key}/{self.manifest_file}",
+                file_name=f"{self.s3_key}/{file_name}",
                 sep="\t",
                 index=False,
             )
 
+    def write_text(self, text, file_name, description="text"):
+        """
+        Write a text file (e.g. a generated load script) alongside the load files
+
+        Parameters
+        ----------
+        text: str
+            File contents
+        file_name: str
+            Name of the file in the output folder or key
+        description: str, optional
+            Used in log messages, defaults to "text"
+        """
+        if self.output_folder:
+            text_path = self.output_folder / file_name
+            self.logger.info(
+                f"Writing {description} file: file://{text_path.resolve().as_posix()}"
+            )
+            text_path.write_text(text, encoding="utf-8")
+        else:
+            text_key = f"{self.s3_key}/{file_name}"
+            self.logger.info(
+                f"Writing {description} file: s3://{self.s3_bucket}/{text_key}"
+            )
+            boto3.client("s3").put_object(
+                Bucket=self.s3_bucket, Key=text_key, Body=text.encode("utf-8")
+            )
+
 
 class Pool(object):
     """
     Class for managing generating classes
     """
 
-    def __init__(self, name, output_file, output_buffer_mb=100):
+    def __init__(self, name, output_file, output_buffer_mb=100, generator_class=None):
+        """
+        Parameters
+        ----------
+        name: str
+            Pool name, used in log messages
+        output_file: str
+            Load file name
+        output_buffer_mb: int, optional
+            Minimum size of S3 upload parts, defaults to 100
+        generator_class: type, optional
+            Generator class whose columns and load schema the file has when no
+            generator is registered (e.g. a build without EudraVigilance sources), so
+            a header only file is written and loaded
+        """
         self.name = name
         self.output_file = output_file
+        self.generator_class = generator_class
         self.graph_object_list = []
         self.output_buffer_size_mb = float(output_buffer_mb)
         self.logger = logging.getLogger(f"pskg_loader.Pool.{name}")
@@ -184,7 +291,46 @@ class Pool(object):
         """
         self.graph_object_list.append(node)
 
-    def write_objects(self, s3_bucket=None, s3_key=None, folder_path=None):
+    def load_schema(self):
+        """
+        Load schema of the output file, as declared by the registered generators
+
+        Returns
+        -------
+        schema.LoadSchema
+            Schema, from generator_class if no generator is registered.  None if
+            neither declares one.
+        """
+        if self.graph_object_list:
+            return self.graph_object_list[0].load_schema()
+        if self.generator_class is not None:
+            return self.generator_class._schema
+        return None
+
+    def write_header(self, output_stream):
+        """
+        Write the TSV header of the output file
+
+        Raises
+        ------
+        ValueError
+            No generator is registered and the pool has no generator_class
+        """
+        if self.graph_object_list:
+            self.graph_object_list[0].write_header(output_stream)
+        elif self.generator_class is None:
+            raise ValueError(
+                f"{self.name}: no generators registered and no generator_class, "
+                f"the header of {self.output_file} is unknown"
+            )
+        else:
+            pd.DataFrame(None, columns=self.generator_class._output_columns).to_csv(
+                output_stream, index=False, sep="\t"
+            )
+
+    def write_objects(
+        self, s3_bucket=None, s3_key=None, folder_path=None, segment_cache=None
+    ):
         """
         Write out complete edge file from all registered classes.
 
@@ -196,6 +342,8 @@ class Pool(object):
             Name of key within output bucket
         folder_path: str, optional
             Name of local path (exclusive with s3_bucket/s3_key)
+        segment_cache: SegmentCache, optional
+            Output segments from previous builds, see write_graph_object()
 
         Returns
         -------
@@ -222,14 +370,14 @@ class Pool(object):
             else:
                 raise ValueError("folder_path must be of type str or Path")
 
-            if self.graph_object_list and len(self.graph_object_list) > 0:
+            if self.graph_object_list or self.generator_class is not None:
                 with open(destination_path, "wb") as f:
                     # Write header to TSV file
-                    self.graph_object_list[0].write_header(f)
+                    self.write_header(f)
                     for graph_obj in self.graph_object_list:
                         # Write out data to TSV file
                         try:
-                            graph_obj.write_objects(f)
+                            self.write_graph_object(graph_obj, f, segment_cache)
                         except Exception:
                             self.logger.error(f"{graph_obj}.write_objects()")
                             raise
@@ -251,14 +399,14 @@ class Pool(object):
             start_time = time.time()
 
             # Assemble output in chunks of at least min_size_mb
-            if len(self.graph_object_list) > 0:
+            if self.graph_object_list or self.generator_class is not None:
                 csv_buffer = io.BytesIO()
-                self.graph_object_list[0].write_header(csv_buffer)
+                self.write_header(csv_buffer)
 
                 for i, graph_obj in enumerate(self.graph_object_list):
                     object_file_start_time = time.time()
                     csv_buffer.seek(0, os.SEEK_END)
-                    graph_obj.write_objects(csv_buffer)
+                    self.write_graph_object(graph_obj, csv_buffer, segment_cache)
                     current_size_mb = csv_buffer.getbuffer().nbytes / 1024.0 / 1024.0
                     csv_buffer.seek(0, os.SEEK_END)
                     object_file_stop_time = time.time()
@@ -315,6 +463,57 @@ class Pool(object):
                 f"{self.output_file} complete, total time: {(stop_time - start_time ) / 60.0:.2f} minutes"
             )
 
+    def write_graph_object(self, graph_obj, output_stream, segment_cache=None):
+        """
+        Write the output of a registered generator to output_stream.  Generators
+        with a segment_key reuse the matching segment in segment_cache, if present,
+        otherwise their output is added to the cache.  Segments keep the unresolved
+        MedDRA term counts of their generator, which are counted again on reuse.
+
+        Parameters
+        ----------
+        graph_obj: Generator
+            Registered generator
+        output_stream: object
+            Open binary stream for output
+        segment_cache: SegmentCache, optional
+            Output segments from previous builds
+
+        Returns
+        -------
+        None
+        """
+        if segment_cache is None or graph_obj.segment_key is None:
+            graph_obj.write_objects(output_stream)
+            return
+
+        segment = segment_cache.get(graph_obj.segment_source, graph_obj.segment_key)
+        if segment is not None:
+            data, manifest_data, unresolved = segment
+            graph_obj.manifest_data = [
+                graph_obj._manifest_item(**m) for m in manifest_data
+            ]
+            term_resolution.add_unresolved(unresolved)
+            self.logger.info(f"Reusing output segment for {graph_obj}")
+        else:
+            counts_before = term_resolution.unresolved_counts()
+            segment_buffer = io.BytesIO()
+            graph_obj.write_objects(segment_buffer)
+            data = segment_buffer.getvalue()
+            unresolved = [
+                (*k, rows - counts_before.get(k, 0))
+                for k, rows in term_resolution.unresolved_counts().items()
+                if rows > counts_before.get(k, 0)
+            ]
+            segment_cache.put(
+                graph_obj.segment_source,
+                graph_obj.segment_key,
+                data,
+                [m._asdict() for m in graph_obj.manifest_data],
+                unresolved,
+            )
+        output_stream.write(data)
+
     def gather_manifest(self):
         """
         Build a combined dataframe with all available manifest data from
@@ -344,10 +543,19 @@ class Generator(object):
     """
 
     _output_columns = []
+    # Typed load file schema (see graph_objects.schema), None if not declared
+    _schema = None
     _manifest_item = namedtuple(
         "ManifestItem", ["Path", "LastModified", "Tag", "Rows", "Size", "Md5"]
     )
 
+    # Identifies this generator's output across builds (see SegmentCache), None
+    # means output is always regenerated
+    segment_key = None
+    # Identifies the generator class and source of segment_key, segments of the same
+    # source with other keys are outdated
+    segment_source = None
+
     def __init__(self, s3_bucket=None, s3_key=None, file_path=None):
         """
         Create a new generator object.  Either an s3_bucket and s3_key
@@ -394,6 +602,27 @@ class Generator(object):
         cls_name = type(self).__name__
         return f"{cls_name} ({self.source_url})"
 
+    def set_segment_key(self, *source_fingerprints):
+        """
+        Allow output to be reused from a previous build with the same sources.  The
+        key also covers the generator class, loader code and read settings.
+
+        Parameters
+        ----------
+        source_fingerprints: str
+            Fingerprints of all source data used by write_objects (e.g. from
+            source_fingerprint() or vaers.get_tag_fingerprints())
+        """
+        self.segment_source = _digest(
+            type(self).__name__, self.source_url, getattr(self, "data_set_tag", None)
+        )
+        self.segment_key = _digest(
+            type(self).__name__,
+            get_code_fingerprint(),
+            get_settings_fingerprint(),
+            *source_fingerprints,
+        )
+
     def check_content(self, s3_bucket=None, s3_key=None, file_path=None):
         """
         Do a quick sanity check on the given file_path or bucket to see if it exists
@@ -418,7 +647,14 @@ class Generator(object):
                 raise RuntimeError(f"Failed to read: {s3_bucket}/{s3_key} ({str(x)})")
 
     def get_manifest_data(
-        self, df, s3_bucket=None, s3_key=None, file_path=None, tag="", md5=None
+        self,
+        df=None,
+        s3_bucket=None,
+        s3_key=None,
+        file_path=None,
+        tag="",
+        md5=None,
+        rows=None,
     ):
         """
         Gather manifest data and return it to the caller as named tuple.  If no parameters for
@@ -433,6 +669,8 @@ class Generator(object):
             Name of S3 bucket, defaults to None
         s3_key: str
             Name of S3 key, defaults to None
+        rows: int, optional
+            Number of rows read, in place of df for data held in other forms
         """
         if file_path:
             # file path specified
@@ -468,7 +706,7 @@ class Generator(object):
             source_url,
             last_modified.strftime("%Y-%m-%dT%H:%M:%S"),
             tag,
-            len(df),
+            len(df) if rows is None else rows,
             content_length,
             Md5=md5,
         )
@@ -484,6 +722,29 @@ class Generator(object):
         else:
             raise RuntimeError("No column headers defined")
 
+    def load_schema(self):
+        """
+        Return the typed schema of this generator's load file, None if it has none
+        """
+        return self._schema
+
+    def format_output(self, df):
+        """
+        Convert output rows to the column types of the load schema, if any
+
+        Parameters
+        ----------
+        df: pd.DataFrame
+            Rows about to be written
+
+        Returns
+        -------
+        pd.DataFrame
+            Rows to write
+        """
+        schema = self.load_schema()
+        return df if schema is None else schema.format_frame(df)
+
     @abc.abstractmethod
     def write_objects(self, output_stream):
         raise NotImplementedError
@@ -498,3 +759,170 @@ class Generator(object):
             )
 
         return pd.DataFrame(self.manifest_data)
+
+
+###
+### Output segment reuse
+###
+
+_code_fingerprint = None
+
+
+def _digest(*parts):
+    return hashlib.sha1("\n".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+
+
+def get_code_fingerprint():
+    """
+    Digest of all loader source files, any code change invalidates previously
+    cached output segments.
+    """
+    global _code_fingerprint
+    if _code_fingerprint is None:
+        package_root = Path(__file__).resolve().parent.parent
+        h = hashlib.sha1()
+        for source_file in sorted(package_root.rglob("*.py")):
+            h.update(source_file.relative_to(package_root).as_posix().encode("utf-8"))
+            h.update(source_file.read_bytes())
+        _code_fingerprint = h.hexdigest()
+    return _code_fingerprint
+
+
+def get_settings_fingerprint():
+    """
+    Digest of the settings source files are read with (CSV engine options, dtype
+    plan read types, pandas and pyarrow versions), which may change output without
+    any change to the loader code.
+    """
+    return _digest(
+        sorted(csv_engine.get_csv_options().items()),
+        sorted((c, str(t)) for c, t in dtype_plan.read_type_settings().items()),
+        pd.__version__,
+        pa.__version__,
+    )
+
+
+def source_fingerprint(s3_bucket=None, s3_key=None, file_path=None):
+    """
+    Fingerprint of a source file from its size and modification time.  Missing
+    sources (e.g. an optional file that is not present) have a fingerprint too, so
+    output is regenerated when they are added.
+
+    Parameters
+    ----------
+    s3_bucket: str, optional
+    s3_key: str, optional
+        key within s3_bucket of the source file
+    file_path: str, optional
+        Path to local source file (exclusive with s3_bucket/s3_key)
+
+    Returns
+    -------
+    str
+        Fingerprint, changed whenever the source is replaced
+    """
+    if file_path:
+        if not Path(file_path).exists():
+            return _digest(Path(file_path).name, "missing")
+        stat = Path(file_path).stat()
+        return _digest(Path(file_path).name, stat.st_size, stat.st_mtime_ns)
+    if not (s3_bucket and s3_key):
+        return _digest("missing")
+    return _digest(
+        s3_key,
+        get_file_content_length(s3_bucket, s3_key),
+        get_file_content_last_modified(s3_bucket, s3_key).isoformat(),
+    )
+
+
+class SegmentCache(object):
+    """
+    Local folder of generator output segments (rows written by a single
+    Generator.write_objects call, with its manifest data and unresolved MedDRA term
+    counts), in a sub folder per
+    segment_source and keyed by the generator's segment_key.  prune() removes the
+    outdated segments of the sources used by a build, segments of sources a build
+    did not read (e.g. VAERS tags left out with vaers_limit_list) are kept.
+    """
+
+    def __init__(self, folder_path):
+        """
+        Parameters
+        ----------
+        folder_path: str or Path
+            Cache folder, created if absent
+        """
+        self.folder_path = Path(folder_path)
+        self.folder_path.mkdir(parents=True, exist_ok=True)
+        # Keys used by this build, by segment source
+        self.used_keys = {}
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger("pskg_loader.SegmentCache")
+
+    def __str__(self) -> str:
+        return f"SegmentCache(folder_path={self.folder_path})"
+
+    def _paths(self, source, key):
+        return (
+            self.folder_path / source / f"{key}.tsv",
+            self.folder_path / source / f"{key}.manifest.json",
+        )
+
+    def get(self, source, key):
+        """
+        Return (data, manifest_data, unresolved) for key, or None if not cached
+        """
+        data_path, manifest_path = self._paths(source, key)
+        self.used_keys.setdefault(source, set()).add(key)
+        if not (data_path.exists() and manifest_path.exists()):
+            self.misses += 1
+            return None
+        self.hits += 1
+        with open(manifest_path, "r") as f:
+            segment_info = json.load(f)
+        return (
+            data_path.read_bytes(),
+            segment_info["manifest_data"],
+            segment_info["unresolved"],
+        )
+
+    def put(self, source, key, data, manifest_data, unresolved=()):
+        """
+        Store output data, manifest data (list of dicts) and the unresolved MedDRA
+        term counts of its generator (list of (data source, field, term, rows), see
+        term_resolution.add_unresolved) for key
+        """
+        data_path, manifest_path = self._paths(source, key)
+        self.used_keys.setdefault(source, set()).add(key)
+        data_path.parent.mkdir(exist_ok=True)
+        # Write the manifest last, a segment is only valid once both exist
+        tmp_path = data_path.with_suffix(".tmp")
+        tmp_path.write_bytes(data)
+        tmp_path.replace(data_path)
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"manifest_data": manifest_data, "unresolved": list(unresolved)},
+                f,
+                default=str,
+            )
+        tmp_path.replace(manifest_path)
+
+    def prune(self):
+        """
+        Remove segments of the sources used since this cache was opened, other than
+        the segments used
+        """
+        removed = 0
+        for source, keys in self.used_keys.items():
+            for path in (self.folder_path / source).glob("*.tsv"):
+                key = path.name[: -len(".tsv")]
+                if key not in keys:
+                    for segment_path in self._paths(source, key):
+                        if segment_path.exists():
+                            segment_path.unlink()
+                    removed += 1
+        self.logger.info(
+            f"{self}: {self.hits} segments reused, {self.misses} regenerated, "
+            f"{removed} removed"
+        )
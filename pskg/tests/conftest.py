@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Modules are imported as in build_pskg_graph.py, from the pskg folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_prep import term_resolution
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    resolver = term_resolution.MeddraTermResolver.__new__(
+        term_resolution.MeddraTermResolver
+    )
+    resolver.version = "test"
+    resolver.index = pd.Series(["PT:10019211"], index=["headache"])
+    monkeypatch.setattr(term_resolution, "get_resolver", lambda: resolver)
+    monkeypatch.setattr(term_resolution, "_unresolved", {})
+    return resolver
+
+
+@pytest.mark.parametrize(
+    "terms",
+    [
+        pd.Series([], dtype=object),
+        pd.Series([np.nan, np.nan]),
+        pd.Series([None, None], dtype=object),
+    ],
+)
+def test_resolve_terms_without_names(resolver, terms):
+    meddra_ids = term_resolution.resolve_terms(terms, "EUDRAVIGILANCE", "Indication")
+    assert meddra_ids.tolist() == [""] * len(terms)
+    assert meddra_ids.index.equals(terms.index)
+    assert term_resolution.unresolved_report().empty
+
+
+def test_resolve_terms_with_missing_names(resolver):
+    terms = pd.Series([" Headache", np.nan, "Unknown"], index=[5, 6, 7])
+    meddra_ids = term_resolution.resolve_terms(terms, "VAERS", "ReportedAE")
+    assert meddra_ids.tolist() == ["PT:10019211", "", ""]
+    assert meddra_ids.index.tolist() == [5, 6, 7]
+    assert term_resolution.unresolved_report()["Term"].tolist() == ["Unknown"]